@@ -3,12 +3,33 @@
 # ============================================
 import streamlit as st
 import pandas as pd
-import pymysql
-from pymysql import Error
-from datetime import datetime
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from mysql.connector import pooling, Error, PoolError
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+import atexit
+import bisect
+import csv
+import functools
+import gzip
 import hashlib
+import io
+import ipaddress
+import json
+import os
+import random
+import socket
+import threading
 import time
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import urllib.request
 from typing import Optional, List, Dict, Tuple, Any
 import logging
 
@@ -27,18 +48,16 @@ class GestionAuthentification:
     def authentifier(identifiant: str, mot_de_passe: str) -> Dict[str, Any]:
         """Authentifie l'utilisateur et retourne ses informations"""
         try:
-            requete = """
-                SELECT idUtilisateur, nom, prenom, identifiant, statut 
-                FROM Utilisateur 
-                WHERE identifiant = %s AND mot_de_passe = %s
-            """
             parametres = (identifiant, mot_de_passe)
             
-            resultat = executer_requete(requete, parametres, fetch=True)
+            resultat = executer_requete_nommee('authentification', parametres, fetch=True)
             
             if resultat and len(resultat) > 0:
                 return resultat[0]
             return None
+        except PoolError:
+            # Base indisponible ou surchargée : ce n'est pas un échec d'authentification
+            raise
         except Exception as e:
             logger.error(f"Erreur d'authentification: {e}")
             return None
@@ -61,7 +80,11 @@ def page_connexion():
                 st.error("Veuillez remplir tous les champs obligatoires (*)")
             else:
                 with st.spinner("Authentification en cours..."):
-                    utilisateur = GestionAuthentification.authentifier(identifiant, mot_de_passe)
+                    try:
+                        utilisateur = GestionAuthentification.authentifier(identifiant, mot_de_passe)
+                    except PoolError:
+                        st.error("Base de données indisponible, veuillez réessayer dans quelques instants")
+                        return
                     
                     if utilisateur:
                         st.session_state['authentifie'] = True
@@ -70,10 +93,13 @@ def page_connexion():
                         st.session_state['role_utilisateur'] = utilisateur['statut']
                         st.session_state['id_utilisateur'] = utilisateur['idUtilisateur']
                         st.session_state['page_actuelle'] = 'accueil'
+                        # Après la session : la ligne d'audit porte l'idUtilisateur de l'utilisateur connecté
+                        consigner_audit("connexion", "Utilisateur", utilisateur['idUtilisateur'])
                         st.success(f"Authentification réussie! Bienvenue {utilisateur['prenom']}")
                         time.sleep(1)
                         st.rerun()
                     else:
+                        consigner_audit("echec_connexion", "Utilisateur", identifiant=identifiant)
                         st.error("Identifiant ou mot de passe incorrect")
 
 # ============================================
@@ -96,9 +122,34 @@ class Configuration:
 
     CONFIG_POOL = {
         "pool_name": "tloh_pool",
-        "pool_size": 5,
-        "pool_reset_session": True
+        "pool_size": 6,
+        # Une réinitialisation de session détruirait les instructions préparées du registre
+        "pool_reset_session": False
     }
+    DELAI_ATTENTE_POOL = 10  # Secondes d'attente maximale d'une connexion libre
+
+    # Contrôle d'admission : les connexions du pool sont attribuées par priorité de classe.
+    # La somme des limites hors saisie reste inférieure à pool_size : une place est toujours
+    # disponible pour les saisies des agents.
+    CLASSES_CHARGE = {
+        # classe: (priorité, requêtes simultanées, file d'attente maximale, attente maximale en s)
+        "saisie": (0, 5, 50, DELAI_ATTENTE_POOL),
+        "consultation": (1, 2, 20, 5),
+        "analytique": (2, 2, 8, 5),
+        # Travaux d'arrière-plan (journal d'audit, distributeur, rechargements complets) : ils
+        # peuvent attendre, mais ne doivent pas priver les rapports de leurs places
+        "fond": (3, 1, 4, 30),
+    }
+    DELAI_ANALYTIQUE_MS = 5000  # Budget d'une requête analytique (MAX_EXECUTION_TIME), puis annulation
+
+    # Résilience : reprise des erreurs transitoires et disjoncteur de la base
+    DELAI_CONNEXION = 5  # Secondes accordées à l'ouverture d'une connexion
+    REPRISE_TENTATIVES = 3  # Exécutions au plus d'une requête sur erreur transitoire
+    REPRISE_ATTENTE_BASE = 0.1  # Secondes ; attente tirée au hasard dans [0, base × 2^tentative]
+    REPRISE_ATTENTE_MAX = 2.0
+    DISJONCTEUR_SEUIL = 3  # Échecs de connexion consécutifs avant ouverture
+    DISJONCTEUR_DELAI = 30  # Secondes d'ouverture avant une connexion d'essai
+    DEGRADE_RESULTATS_GARDES = 500  # Derniers agrégats connus servis pendant une panne
     
     # Services disponibles
     SERVICES = [
@@ -116,46 +167,3040 @@ class Configuration:
         "décès"
     ]
 
+    # Colonnes numériques de Enregistrement
+    MESURES = ["cas", "décès", "notifié", "isolé", "institution", "communauté"]
+    
+    # Colonnes de Enregistrement agrégées pour chaque type d'indicateur
+    MESURES_PAR_TYPE = {
+        "Maladie endemique": ["cas", "décès"],
+        "maladies tropicales négligées": ["notifié", "isolé"],
+        "décès": ["institution", "communauté", "décès"]
+    }
+    # Ligne de surveillance des enregistrements saisis avant le rattachement à un indicateur
+    LIBELLE_SANS_INDICATEUR = "Sans indicateur (saisies antérieures)"
+
+    # API JSON servie à côté de l'application
+    API_ACTIVE = True
+    API_HOTE = "127.0.0.1"  # Une autre interface exige API_JETON
+    API_PORT = 8502
+    API_JETON = None  # Si défini, exige l'en-tête "Authorization: Bearer <jeton>"
+    API_MAX_AGE = 30  # Durée (s) pendant laquelle un client peut réutiliser une réponse sans revalider
+
+    # Planificateur des bulletins épidémiologiques précalculés
+    PLANIFICATEUR_ACTIF = True
+    PLANIFICATEUR_INTERVALLE = 300  # Secondes entre deux vérifications des soumissions tardives
+    ECHEANCE_RAPPORT = (0, 10)  # (jour de la semaine, heure) : lundi 10h
+
+    # Bulletins partagés entre les processus Streamlit d'un même serveur (Feather projeté en mémoire)
+    INSTANTANE_ACTIF = True
+    INSTANTANE_REPERTOIRE = "instantanes"
+    INSTANTANE_CONSERVES = 3  # Fichiers gardés pour les processus qui lisent encore un ancien instantané
+
+    # Courbes de tendance : points envoyés au navigateur au plus, par série
+    TENDANCES_POINTS_MAX = 150
+
+    # Alertes épidémiques : cas hebdomadaires d'une maladie endémique au-delà de la moyenne
+    # de la même semaine des années précédentes plus ALERTES_ECARTS écarts-types
+    ALERTES_ACTIVES = True
+    ALERTES_ANNEES_REFERENCE = 5  # Années précédentes prises comme référence
+    ALERTES_ANNEES_MIN = 2  # En dessous, pas de seuil
+    ALERTES_ECARTS = 2
+    ALERTES_CAS_MIN = 3  # Pas d'alerte pour moins de cas, même sans antécédent
+    ALERTES_SEMAINES_AFFICHEES = 4  # Alertes des dernières semaines montrées sur le tableau de bord
+
+    # Comparaison d'une année sur l'autre : années affichées, année de référence comprise (2 au moins)
+    COMPARAISON_ANNEES = 5
+
+    # Boîte d'envoi et flux sortant vers les systèmes d'information sanitaire
+    DISTRIBUTION_ACTIVE = True
+    DISTRIBUTION_DESTINATION = "repertoire"  # "repertoire" ou "http"
+    DISTRIBUTION_REPERTOIRE = "flux_sortant"
+    DISTRIBUTION_URL = None  # Point de réception pour la destination "http"
+    DISTRIBUTION_FORMAT = "jsonl"  # "jsonl" ou "csv"
+    DISTRIBUTION_TAILLE_LOT = 500  # Événements lus par cycle
+    DISTRIBUTION_INTERVALLE = 60  # Secondes entre deux cycles
+    DISTRIBUTION_TENTATIVES = 5
+    # Durée (s) pendant laquelle un lot attribué reste réservé à son processus ; au-delà d'une
+    # livraison complète avec toutes ses reprises, un autre processus peut le reprendre
+    DISTRIBUTION_BAIL = 900
+
+    # Fédération régionale : une base par hôpital de district
+    SITES = {
+        "Site local": CONFIG_DB,
+    }
+    FEDERATION_DELAI = 5  # Secondes accordées à chaque site
+    FEDERATION_CONNEXIONS_PAR_SITE = 2
+
+    # Journal d'audit asynchrone
+    AUDIT_ACTIF = True
+    AUDIT_DESTINATION = "table"  # "table" (JournalAudit) ou "fichier"
+    AUDIT_FICHIER = "journal_audit.jsonl"
+    AUDIT_CAPACITE = 10000  # Événements gardés en mémoire au plus
+    AUDIT_TAILLE_LOT = 200
+    AUDIT_INTERVALLE = 5  # Secondes entre deux écritures : perte maximale en cas d'arrêt brutal
+    AUDIT_LIGNES_AFFICHEES = 500
+
+    # Navigateur de données : pagination par clé, pages préchargées et partagées par les sessions
+    NAVIGATION_TAILLE_PAGE = 50
+    NAVIGATION_FRAICHEUR = 30  # Secondes pendant lesquelles une page lue reste servie
+    NAVIGATION_PAGES_GARDEES = 200
+
+# ============================================
+# 4. CONNEXION À LA BASE DE DONNÉES MYSQL
+# ============================================
+class RequeteRejetee(PoolError):
+    """Requête refusée sans attente : la file de sa classe est pleine"""
+
+def classer_requete(requete: str) -> str:
+    """Classe de charge d'une requête : saisie, consultation ou analytique (fond n'est jamais déduite)"""
+    texte = " ".join(requete.split()).upper()
+    if not texte.startswith(("SELECT", "SHOW", "EXPLAIN")):
+        return "saisie"
+    if "GROUP BY" in texte or any(fonction in texte for fonction in ("SUM(", "COUNT(", "AVG(")):
+        return "analytique"
+    return "consultation"
+
+def borner_requete(requete: str, delai_ms: int) -> str:
+    """Ajoute l'indication MAX_EXECUTION_TIME à un SELECT : le serveur l'interrompt au-delà du budget"""
+    texte = requete.lstrip()
+    if not texte[:6].upper() == "SELECT" or "MAX_EXECUTION_TIME" in texte:
+        return requete
+    return f"SELECT /*+ MAX_EXECUTION_TIME({int(delai_ms)}) */{texte[6:]}"
+
+class ControleAdmission:
+    """Attribue les places du pool par classe de charge.
+
+    Chaque classe a une priorité, un nombre maximal de requêtes simultanées et une file
+    bornée. Lorsqu'une place se libère, elle revient à la requête en attente la plus
+    prioritaire dont la classe n'a pas atteint sa limite : une saisie passe devant les
+    rapports, et les rapports ne peuvent pas occuper tout le pool. Une requête dont la
+    file est pleine est rejetée immédiatement plutôt que d'attendre.
+    """
+
+    def __init__(self, places: int, classes: Dict[str, Tuple[int, int, int, float]]):
+        self._condition = threading.Condition()
+        self._libres = places
+        self._classes = classes
+        self._file: List[Tuple[int, int, str]] = []
+        self._sequence = 0
+        self._en_cours = dict.fromkeys(classes, 0)
+        self.metriques = {
+            classe: {'admises': 0, 'rejetees': 0, 'expirees': 0, 'annulees': 0, 'attente_max_ms': 0.0}
+            for classe in classes
+        }
+
+    def _elue(self) -> Optional[Tuple[int, int, str]]:
+        """Requête en attente à admettre maintenant, s'il y en a une"""
+        if self._libres <= 0:
+            return None
+        for entree in self._file:
+            if self._en_cours[entree[2]] < self._classes[entree[2]][1]:
+                return entree
+        return None
+
+    def acquerir(self, classe: str):
+        priorite, _, file_max, attente = self._classes[classe]
+        debut = time.monotonic()
+        with self._condition:
+            if sum(1 for entree in self._file if entree[2] == classe) >= file_max:
+                self.metriques[classe]['rejetees'] += 1
+                raise RequeteRejetee(f"Base de données surchargée : requête {classe} rejetée")
+            self._sequence += 1
+            entree = (priorite, self._sequence, classe)
+            bisect.insort(self._file, entree)
+            while self._elue() is not entree:
+                restant = debut + attente - time.monotonic()
+                if restant <= 0:
+                    self._file.remove(entree)
+                    self.metriques[classe]['expirees'] += 1
+                    # Une requête moins prioritaire attendait peut-être derrière celle-ci
+                    self._condition.notify_all()
+                    raise PoolError("Aucune connexion disponible dans le pool")
+                self._condition.wait(restant)
+            self._file.remove(entree)
+            self._libres -= 1
+            self._en_cours[classe] += 1
+            metriques = self.metriques[classe]
+            metriques['admises'] += 1
+            metriques['attente_max_ms'] = max(metriques['attente_max_ms'], 1000 * (time.monotonic() - debut))
+            self._condition.notify_all()
+
+    def liberer(self, classe: str):
+        with self._condition:
+            self._libres += 1
+            self._en_cours[classe] -= 1
+            self._condition.notify_all()
+
+    def noter_erreur(self, classe: str, erreur: Error):
+        # ER_QUERY_TIMEOUT : requête interrompue par MAX_EXECUTION_TIME
+        if getattr(erreur, 'errno', None) == 3024:
+            with self._condition:
+                self.metriques[classe]['annulees'] += 1
+
+    def etat(self) -> List[Dict[str, Any]]:
+        """Requêtes en cours, profondeur de file et compteurs par classe"""
+        with self._condition:
+            return [
+                {'classe': classe, 'en_cours': self._en_cours[classe],
+                 'en_file': sum(1 for entree in self._file if entree[2] == classe),
+                 **self.metriques[classe]}
+                for classe in self._classes
+            ]
+
+class BaseIndisponible(PoolError):
+    """Requête refusée sans tentative ou abandonnée : la base ne répond plus"""
+
+# Erreurs MySQL transitoires : une nouvelle exécution a des chances de réussir
+ERREURS_CONNEXION = {
+    2003,  # CR_CONN_HOST_ERROR : connexion impossible
+    2006,  # CR_SERVER_GONE_ERROR
+    2013,  # CR_SERVER_LOST : connexion perdue pendant la requête
+    2055,  # CR_SERVER_LOST_EXTENDED
+}
+ERREURS_TRANSITOIRES = ERREURS_CONNEXION | {
+    1205,  # ER_LOCK_WAIT_TIMEOUT
+    1213,  # ER_LOCK_DEADLOCK : transaction annulée par le serveur
+}
+# Une écriture n'est rejouée que si elle n'a pas pu être appliquée : connexion jamais
+# établie ou transaction entièrement annulée. Une connexion perdue pendant le COMMIT
+# laisse le résultat inconnu.
+ERREURS_REJOUABLES_ECRITURE = {2003, 1213}
+
+def erreur_de_connexion(erreur: Exception) -> bool:
+    return getattr(erreur, 'errno', None) in ERREURS_CONNEXION
+
+class Disjoncteur:
+    """Coupe l'accès à la base après DISJONCTEUR_SEUIL échecs de connexion consécutifs.
+
+    Ouvert, il rejette aussitôt chaque requête (BaseIndisponible) au lieu de laisser chaque
+    rendu attendre un délai de connexion. Après DISJONCTEUR_DELAI secondes, une seule
+    connexion d'essai est tentée (semi-ouvert) : sa réussite referme le disjoncteur, son
+    échec le rouvre pour un nouveau délai.
+    """
+    FERME, OUVERT, SEMI_OUVERT = "fermé", "ouvert", "semi-ouvert"
+
+    def __init__(self, seuil: int, delai: float):
+        self._verrou = threading.Lock()
+        self._seuil = seuil
+        self._delai = delai
+        self._echecs = 0
+        self._ouvert_a = 0.0
+        self._essai_en_cours = False
+        self.etat = self.FERME
+        self.depuis = datetime.now()
+        self.derniere_erreur: Optional[str] = None
+        self.metriques = {'ouvertures': 0, 'rejets': 0, 'reprises': 0}
+
+    def autoriser(self):
+        """Laisse passer la requête ou lève BaseIndisponible"""
+        with self._verrou:
+            if self.etat == self.FERME:
+                return
+            if self.etat == self.OUVERT and time.monotonic() - self._ouvert_a >= self._delai:
+                self.etat = self.SEMI_OUVERT
+            if self.etat == self.SEMI_OUVERT and not self._essai_en_cours:
+                self._essai_en_cours = True
+                return
+            self.metriques['rejets'] += 1
+        raise BaseIndisponible("Base de données indisponible, nouvelle tentative dans quelques secondes")
+
+    def succes(self):
+        with self._verrou:
+            self._echecs = 0
+            self._essai_en_cours = False
+            if self.etat != self.FERME:
+                logger.info("Base de données rétablie")
+                self.etat = self.FERME
+                self.depuis = datetime.now()
+
+    def echec(self, erreur: Exception):
+        with self._verrou:
+            self._echecs += 1
+            self._essai_en_cours = False
+            self.derniere_erreur = str(erreur)
+            if self.etat == self.SEMI_OUVERT or (self.etat == self.FERME and self._echecs >= self._seuil):
+                if self.etat == self.FERME:
+                    logger.error(f"Base de données indisponible: {erreur}")
+                    self.depuis = datetime.now()
+                    self.metriques['ouvertures'] += 1
+                self.etat = self.OUVERT
+                self._ouvert_a = time.monotonic()
+
+    def relacher(self):
+        """L'essai s'est terminé sans renseigner sur la base (ex. file d'admission pleine)"""
+        with self._verrou:
+            self._essai_en_cours = False
+
+    def noter_reprise(self):
+        with self._verrou:
+            self.metriques['reprises'] += 1
+
+    def sante(self) -> Dict[str, Any]:
+        with self._verrou:
+            return {'etat': self.etat, 'depuis': self.depuis, 'echecs_consecutifs': self._echecs,
+                    'derniere_erreur': self.derniere_erreur, **self.metriques}
+
+@st.cache_resource
+def obtenir_disjoncteur() -> Disjoncteur:
+    return Disjoncteur(Configuration.DISJONCTEUR_SEUIL, Configuration.DISJONCTEUR_DELAI)
+
+def reprendre(operation, ecriture: bool = False):
+    """Exécute `operation()` en reprenant les erreurs transitoires après une attente aléatoire.
+
+    L'attente est tirée dans [0, REPRISE_ATTENTE_BASE × 2^tentative] : les sessions
+    touchées par un même incident ne reviennent pas toutes au même instant. Une erreur de
+    connexion persistante est levée en BaseIndisponible ; le disjoncteur ouvert interrompt
+    les tentatives restantes.
+    """
+    disjoncteur = obtenir_disjoncteur()
+    for tentative in range(Configuration.REPRISE_TENTATIVES):
+        try:
+            return operation()
+        except PoolError:
+            raise
+        except Error as erreur:
+            rejouable = erreur.errno in (ERREURS_REJOUABLES_ECRITURE if ecriture else ERREURS_TRANSITOIRES)
+            if not rejouable or tentative + 1 == Configuration.REPRISE_TENTATIVES:
+                if erreur_de_connexion(erreur):
+                    raise BaseIndisponible(f"Base de données indisponible: {erreur}") from erreur
+                raise
+            logger.warning(f"Erreur transitoire ({erreur}), nouvelle tentative")
+            disjoncteur.noter_reprise()
+            time.sleep(random.uniform(0, min(Configuration.REPRISE_ATTENTE_MAX,
+                                             Configuration.REPRISE_ATTENTE_BASE * 2 ** tentative)))
+
+@st.cache_resource
+def obtenir_pool() -> Tuple[pooling.MySQLConnectionPool, ControleAdmission]:
+    """Pool de connexions unique par processus.
+
+    Le pool de mysql.connector échoue immédiatement lorsqu'il est épuisé : le contrôle
+    d'admission fait attendre les threads (sessions, API, planificateur) qu'une connexion
+    se libère, par ordre de priorité.
+    """
+    config = {'connection_timeout': Configuration.DELAI_CONNEXION, **Configuration.CONFIG_DB}
+    pool = pooling.MySQLConnectionPool(**Configuration.CONFIG_POOL, **config)
+    return pool, ControleAdmission(Configuration.CONFIG_POOL["pool_size"], Configuration.CLASSES_CHARGE)
+
+@contextmanager
+def obtenir_connexion_db(classe: str = "consultation"):
+    """Contexte pour gérer les connexions à la base de données.
+
+    Lève BaseIndisponible sans attendre lorsque le disjoncteur est ouvert. Les erreurs de
+    connexion, à l'ouverture comme pendant une requête, sont comptées par le disjoncteur.
+    """
+    connexion = None
+    disjoncteur = obtenir_disjoncteur()
+    disjoncteur.autoriser()
+    try:
+        pool, admission = obtenir_pool()
+    except Error as erreur:
+        disjoncteur.echec(erreur)
+        raise
+    try:
+        admission.acquerir(classe)
+    except PoolError:
+        disjoncteur.relacher()
+        raise
+    try:
+        try:
+            connexion = pool.get_connection()
+        except Error as erreur:
+            if not erreur_de_connexion(erreur):
+                disjoncteur.relacher()
+            raise
+        # Une connexion du pool est vérifiée (ping) avant d'être rendue : la base répond
+        disjoncteur.succes()
+        yield connexion
+    except Error as erreur:
+        if erreur_de_connexion(erreur):
+            disjoncteur.echec(erreur)
+        logger.error(f"Erreur de connexion à la base de données: {erreur}")
+        raise
+    finally:
+        if connexion:
+            # Sans réinitialisation de session, une transaction laissée ouverte garderait sa vue
+            # REPEATABLE READ pour les emprunts suivants : les lectures seules sont closes ici
+            try:
+                connexion.rollback()
+            except Error as erreur:
+                logger.warning(f"Annulation avant retour au pool impossible: {erreur}")
+            # Rend la connexion au pool (sans la fermer côté serveur)
+            connexion.close()
+        admission.liberer(classe)
+
+def executer_requete(requete, parametres=None, fetch=False, classe=None):
+    """Exécute une requête SQL et retourne les résultats si nécessaire.
+
+    Sans `classe`, la classe de charge est déduite du texte ; une requête analytique est
+    interrompue par le serveur au-delà de Configuration.DELAI_ANALYTIQUE_MS. Les erreurs
+    transitoires sont reprises (voir reprendre) ; une base indisponible lève BaseIndisponible.
+    Les autres erreurs sont journalisées et retournent None : leur affichage revient aux pages,
+    ce qui permet d'appeler cette fonction hors d'une session Streamlit.
+    """
+    classe = classe or classer_requete(requete)
+    if classe == "analytique":
+        requete = borner_requete(requete, Configuration.DELAI_ANALYTIQUE_MS)
+
+    def executer():
+        with obtenir_connexion_db(classe) as connexion:
+            curseur = connexion.cursor(dictionary=True)
+            try:
+                curseur.execute(requete, parametres or ())
+                if fetch:
+                    resultat = curseur.fetchall()
+                else:
+                    connexion.commit()
+                    resultat = curseur.rowcount
+                return resultat
+            except Error as erreur:
+                if erreur.errno in ERREURS_TRANSITOIRES:
+                    raise
+                # Seul le texte de la requête est journalisé : ses paramètres (mots de passe compris) n'y figurent pas
+                logger.error(f"Erreur lors de l'exécution de la requête: {erreur}\n{requete}")
+                obtenir_pool()[1].noter_erreur(classe, erreur)
+                return None
+            finally:
+                curseur.close()
+
+    try:
+        return reprendre(executer, ecriture=not fetch)
+    except PoolError:
+        raise
+    except Error as erreur:
+        # Verrou toujours en conflit après toutes les tentatives
+        logger.error(f"Erreur lors de l'exécution de la requête: {erreur}\n{requete}")
+        return None
+
+def lire_par_lots(requete, parametres=None, taille_lot=10000, classe="analytique"):
+    """Parcourt le résultat d'une requête par lots de tuples, sans dictionnaire par ligne.
+
+    Contrairement à executer_requete, les erreurs sont propagées à l'appelant. La lecture
+    est admise dans `classe` mais sans budget de temps : elle alimente les caches.
+    """
+    with obtenir_connexion_db(classe) as connexion:
+        curseur = connexion.cursor()
+        try:
+            curseur.execute(requete, parametres or ())
+            while True:
+                lot = curseur.fetchmany(taille_lot)
+                if not lot:
+                    break
+                yield lot
+        finally:
+            curseur.close()
+
+# ============================================
+# 4.1 REGISTRE DES REQUÊTES PRÉPARÉES
+# ============================================
+REQUETES_FREQUENTES = {
+    'authentification': """
+        SELECT idUtilisateur, nom, prenom, identifiant, statut
+        FROM Utilisateur
+        WHERE identifiant = %s AND mot_de_passe = %s
+    """,
+    'indicateurs_par_type': """
+        SELECT idIndicateur, nom
+        FROM Indicateur
+        WHERE type = %s
+        ORDER BY nom
+    """,
+    'insertion_enregistrement': """
+        INSERT INTO Enregistrement
+        (numéro_TLOH, date_début, date_fin, institution,
+            communauté, notifié, décès,
+            cas, isolé, service)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'statistiques_globales': """
+        SELECT
+            IFNULL(SUM(cas), 0) AS total_cas,
+            IFNULL(SUM(décès), 0) AS total_décès,
+            IFNULL(SUM(isolé), 0) AS total_isolé,
+            IFNULL(SUM(notifié), 0) AS total_notifié
+        FROM Enregistrement
+    """,
+    'insertion_evenement_sortant': """
+        INSERT INTO BoiteEnvoi (type_evenement, numéro_TLOH, periode, charge)
+        VALUES (%s, %s, %s, %s)
+    """,
+    # MAX sur la clé primaire : une lecture d'index, là où COUNT(*) parcourt toute la table.
+    # Les suppressions, faites par corriger_tloh, incrémentent la version des corrections ;
+    # chaque transaction d'insertion incrémente la séquence des insertions (voir plus bas).
+    'filigrane': """
+        SELECT IFNULL(MAX(idEnregistrement), 0) AS dernier_id,
+               IFNULL((SELECT version FROM VersionDonnees WHERE cle = 'corrections'), 0) AS version_corrections,
+               IFNULL((SELECT version FROM VersionDonnees WHERE cle = 'insertions'), 0) AS sequence_insertions
+        FROM Enregistrement
+    """,
+    'insertion_indicateur_enregistrement': """
+        INSERT INTO IndicateurEnregistrement (idEnregistrement, idIndicateur)
+        VALUES (%s, %s)
+    """,
+    'lecture_tloh': """
+        SELECT e.idEnregistrement, e.numéro_TLOH, e.date_début, e.date_fin, e.service,
+               e.cas, e.décès, e.notifié, e.isolé, e.institution, e.communauté, ie.idIndicateur
+        FROM Enregistrement e
+        LEFT JOIN IndicateurEnregistrement ie ON ie.idEnregistrement = e.idEnregistrement
+        WHERE e.numéro_TLOH = %s
+        ORDER BY e.idEnregistrement
+    """,
+    'modification_enregistrement': """
+        UPDATE Enregistrement
+        SET date_début = %s, date_fin = %s, institution = %s, communauté = %s, notifié = %s,
+            décès = %s, cas = %s, isolé = %s, service = %s
+        WHERE idEnregistrement = %s
+    """,
+    'suppression_enregistrement': """
+        DELETE FROM Enregistrement WHERE idEnregistrement = %s
+    """,
+    'suppression_indicateur_enregistrement': """
+        DELETE FROM IndicateurEnregistrement WHERE idEnregistrement = %s
+    """,
+    'increment_version_corrections': """
+        UPDATE VersionDonnees SET version = LAST_INSERT_ID(version + 1) WHERE cle = 'corrections'
+    """,
+    # Première instruction de toute transaction qui insère dans Enregistrement : le verrou de
+    # ligne, tenu jusqu'à la validation, sérialise ces transactions. Les identifiants sont donc
+    # validés dans leur ordre d'attribution, et la lecture incrémentale (idEnregistrement >
+    # dernier lu) ne saute jamais une ligne validée en retard.
+    'increment_sequence_insertions': """
+        UPDATE VersionDonnees SET version = version + 1 WHERE cle = 'insertions'
+    """,
+}
+
+# Classe de charge imposée lorsque le texte induirait en erreur
+CLASSES_REQUETES = {
+    # MAX sur la clé primaire, lu à chaque rafraîchissement des caches : jamais interrompu
+    'filigrane': 'consultation',
+}
+
+class RegistreRequetes:
+    """Requêtes fréquentes nommées, préparées côté serveur une fois par connexion du pool.
+
+    Un curseur préparé de mysql.connector ne réutilise son instruction que si on lui
+    soumet le même texte SQL : le registre garde donc un curseur par (connexion, nom).
+    Les connexions étant rendues au pool sans réinitialisation de session
+    (pool_reset_session=False), les instructions survivent d'un emprunt à l'autre.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._requetes: Dict[str, str] = {}
+        self._classes: Dict[str, str] = {}
+        self._statistiques: Dict[str, Dict[str, Any]] = {}
+        self._curseurs: Dict[int, Dict[str, Any]] = {}
+        # Curseurs écartés, fermés au prochain emprunt de leur connexion (jamais depuis un autre thread)
+        self._a_fermer: "OrderedDict[int, List[Any]]" = OrderedDict()
+
+    def enregistrer(self, nom: str, requete: str, classe: Optional[str] = None):
+        """Ajoute une requête ; sa classe de charge est déduite du texte si elle n'est pas donnée"""
+        with self._verrou:
+            if nom not in self._requetes:
+                classe = classe or classer_requete(requete)
+                if classe == "analytique":
+                    requete = borner_requete(requete, Configuration.DELAI_ANALYTIQUE_MS)
+                self._requetes[nom] = requete
+                self._classes[nom] = classe
+                self._statistiques[nom] = {
+                    'nom': nom, 'classe': classe, 'executions': 0, 'preparations': 0, 'erreurs': 0,
+                    'duree_totale_ms': 0.0, 'duree_max_ms': 0.0, 'plan': None
+                }
+
+    def _curseur(self, connexion, nom: str):
+        """Curseur préparé de `nom` sur cette connexion, créé au premier usage"""
+        with self._verrou:
+            # Une reconnexion change connection_id : les instructions des sessions closes sont
+            # libérées par le serveur, celles des sessions vivantes doivent être fermées
+            if connexion.connection_id not in self._curseurs and \
+                    len(self._curseurs) >= 2 * Configuration.CONFIG_POOL["pool_size"]:
+                for identifiant, anciens in self._curseurs.items():
+                    self._a_fermer.setdefault(identifiant, []).extend(anciens.values())
+                self._curseurs.clear()
+                while len(self._a_fermer) > 2 * Configuration.CONFIG_POOL["pool_size"]:
+                    self._a_fermer.popitem(last=False)
+            a_fermer = self._a_fermer.pop(connexion.connection_id, [])
+            curseurs = self._curseurs.setdefault(connexion.connection_id, {})
+        for ancien in a_fermer:
+            try:
+                ancien.close()
+            except Error as erreur:
+                logger.warning(f"Fermeture d'une instruction préparée impossible: {erreur}")
+        curseur = curseurs.get(nom)
+        if curseur is None:
+            curseur = connexion.cursor(prepared=True, dictionary=True)
+            curseurs[nom] = curseur
+            with self._verrou:
+                self._statistiques[nom]['preparations'] += 1
+        return curseur
+
+    def _oublier(self, connexion, nom: str):
+        with self._verrou:
+            self._curseurs.get(connexion.connection_id, {}).pop(nom, None)
+
+    def _executer(self, connexion, nom: str, parametres=None, fetch=False):
+        """Exécute `nom` sur `connexion` sans valider ; les erreurs sont propagées.
+
+        Retourne les lignes lues, ou (lignes affectées, dernier identifiant inséré).
+        """
+        requete = self._requetes[nom]
+        statistiques = self._statistiques[nom]
+        debut = time.perf_counter()
+        try:
+            if statistiques['plan'] is None and fetch:
+                statistiques['plan'] = self._expliquer(connexion, requete, parametres)
+            for tentative in range(2):
+                curseur = self._curseur(connexion, nom)
+                try:
+                    curseur.execute(requete, parametres or ())
+                    break
+                except Error as erreur:
+                    # Instruction invalidée côté serveur (ER_UNKNOWN_STMT_HANDLER) : on la prépare à nouveau
+                    self._oublier(connexion, nom)
+                    if tentative or getattr(erreur, 'errno', None) != 1243:
+                        raise
+            if fetch:
+                return curseur.fetchall()
+            return curseur.rowcount, curseur.lastrowid
+        except Error:
+            with self._verrou:
+                statistiques['erreurs'] += 1
+            raise
+        finally:
+            duree = 1000 * (time.perf_counter() - debut)
+            with self._verrou:
+                statistiques['executions'] += 1
+                statistiques['duree_totale_ms'] += duree
+                statistiques['duree_max_ms'] = max(statistiques['duree_max_ms'], duree)
+
+    def executer(self, nom: str, parametres=None, fetch=False):
+        """Exécute la requête `nom` ; même contrat de retour que executer_requete"""
+        classe = self._classes[nom]
+
+        def executer():
+            with obtenir_connexion_db(classe) as connexion:
+                try:
+                    resultat = self._executer(connexion, nom, parametres, fetch)
+                    if fetch:
+                        return resultat
+                    connexion.commit()
+                    return resultat[0]
+                except Error as erreur:
+                    if erreur.errno in ERREURS_TRANSITOIRES:
+                        raise
+                    logger.error(f"Erreur lors de l'exécution de la requête '{nom}': {erreur}")
+                    obtenir_pool()[1].noter_erreur(classe, erreur)
+                    return None
+
+        try:
+            return reprendre(executer, ecriture=not fetch)
+        except PoolError:
+            raise
+        except Error as erreur:
+            logger.error(f"Erreur lors de l'exécution de la requête '{nom}': {erreur}")
+            return None
+
+    def executer_dans(self, connexion, nom: str, parametres=None, fetch=False):
+        """Exécute `nom` dans une transaction ouverte avec transaction() ; les erreurs sont propagées"""
+        resultat = self._executer(connexion, nom, parametres, fetch)
+        return resultat if fetch else resultat[0]
+
+    def inserer_dans(self, connexion, nom: str, parametres=None) -> int:
+        """Comme executer_dans pour un INSERT, en retournant l'identifiant AUTO_INCREMENT créé"""
+        return self._executer(connexion, nom, parametres)[1]
+
+    @staticmethod
+    def _expliquer(connexion, requete: str, parametres) -> Optional[List[Dict[str, Any]]]:
+        """Plan d'exécution (EXPLAIN) capturé à la première exécution d'une requête de lecture"""
+        curseur = connexion.cursor(dictionary=True)
+        try:
+            curseur.execute("EXPLAIN " + requete, parametres or ())
+            return [
+                {cle: ligne.get(cle) for cle in ('table', 'type', 'key', 'rows', 'Extra')}
+                for ligne in curseur.fetchall()
+            ]
+        except Error as erreur:
+            logger.warning(f"EXPLAIN impossible: {erreur}")
+            return []
+        finally:
+            curseur.close()
+
+    def statistiques(self) -> List[Dict[str, Any]]:
+        """Compteurs et latences par requête nommée, les plus coûteuses en premier"""
+        with self._verrou:
+            copies = [dict(statistiques) for statistiques in self._statistiques.values()]
+        lignes = []
+        for ligne in copies:
+            ligne['duree_moyenne_ms'] = round(ligne['duree_totale_ms'] / ligne['executions'], 2) \
+                if ligne['executions'] else 0.0
+            ligne['plan'] = ", ".join(
+                f"{etape['table']}:{etape['type']}({etape['key'] or '-'}, {etape['rows']} lignes)"
+                for etape in (ligne['plan'] or [])
+            )
+            lignes.append(ligne)
+        return sorted(lignes, key=lambda ligne: ligne['duree_totale_ms'], reverse=True)
+
+@st.cache_resource
+def obtenir_registre() -> RegistreRequetes:
+    """Registre unique par processus, partagé par toutes les sessions"""
+    registre = RegistreRequetes()
+    for nom, requete in REQUETES_FREQUENTES.items():
+        registre.enregistrer(nom, requete, CLASSES_REQUETES.get(nom))
+    return registre
+
+def executer_requete_nommee(nom: str, parametres=None, fetch=False):
+    """Exécute une requête du registre sous forme d'instruction préparée"""
+    return obtenir_registre().executer(nom, parametres, fetch)
+
+@contextmanager
+def transaction():
+    """Connexion dont toutes les requêtes sont validées ensemble à la sortie du bloc, ou annulées"""
+    with obtenir_connexion_db("saisie") as connexion:
+        try:
+            yield connexion
+            connexion.commit()
+        except Exception:
+            connexion.rollback()
+            raise
+
+# Tables ajoutées par l'application à côté du schéma d'origine
+CREATION_INDICATEUR_ENREGISTREMENT = """
+    CREATE TABLE IF NOT EXISTS IndicateurEnregistrement (
+        idEnregistrement INT PRIMARY KEY,
+        idIndicateur INT NOT NULL,
+        INDEX idx_indicateur_enregistrement (idIndicateur)
+    )
+"""
+
+CREATION_VERSION_DONNEES = """
+    CREATE TABLE IF NOT EXISTS VersionDonnees (
+        cle VARCHAR(32) PRIMARY KEY,
+        version BIGINT NOT NULL
+    )
+"""
+
+@st.cache_resource
+def initialiser_schema() -> bool:
+    """Crée une seule fois par processus les tables complémentaires manquantes"""
+    tables = {
+        'IndicateurEnregistrement': CREATION_INDICATEUR_ENREGISTREMENT,
+        'VersionDonnees': CREATION_VERSION_DONNEES,
+        'BoiteEnvoi': CREATION_BOITE_ENVOI,
+        'JournalAudit': CREATION_JOURNAL_AUDIT,
+    }
+    for table, creation in tables.items():
+        # Vérification préalable : avec raise_on_warnings, IF NOT EXISTS sur une table existante lève une erreur
+        existe = executer_requete("SHOW TABLES LIKE %s", (table,), fetch=True)
+        if existe is None:
+            raise RuntimeError(f"Vérification de la table {table} impossible")
+        if not existe:
+            if executer_requete(creation) is None:
+                raise RuntimeError(f"Création de la table {table} impossible")
+            logger.info(f"Table {table} créée")
+    # Compteurs du filigrane ; 'insertions' manque dans les bases créées avant son introduction
+    for cle in ('corrections', 'insertions'):
+        if executer_requete("INSERT INTO VersionDonnees (cle, version) VALUES (%s, 0) "
+                            "ON DUPLICATE KEY UPDATE version = version", (cle,)) is None:
+            raise RuntimeError(f"Initialisation du compteur {cle} impossible")
+    return True
+
+# ============================================
+# 4.2 AGRÉGATS PARTAGÉS (PAGES ET API)
+# ============================================
+class DerniersResultats:
+    """Derniers résultats connus des agrégats, par fonction et arguments, servis pendant une panne"""
+
+    def __init__(self, capacite: int):
+        self._verrou = threading.Lock()
+        self._capacite = capacite
+        self._resultats: "OrderedDict[Tuple, Tuple[Any, datetime]]" = OrderedDict()
+        self.servis = 0
+        self.dernier_service: Optional[datetime] = None
+
+    def garder(self, cle: Tuple, resultat: Any):
+        with self._verrou:
+            self._resultats[cle] = (resultat, datetime.now())
+            self._resultats.move_to_end(cle)
+            while len(self._resultats) > self._capacite:
+                self._resultats.popitem(last=False)
+
+    def relire(self, cle: Tuple) -> Any:
+        with self._verrou:
+            entree = self._resultats.get(cle)
+            if entree is None:
+                return None
+            self.servis += 1
+            self.dernier_service = datetime.now()
+            return entree[0]
+
+@st.cache_resource
+def obtenir_derniers_resultats() -> DerniersResultats:
+    return DerniersResultats(Configuration.DEGRADE_RESULTATS_GARDES)
+
+def servir_en_mode_degrade(fonction):
+    """Garde le dernier résultat de `fonction` et le sert lorsque la base ne permet plus de le calculer.
+
+    Seule une PoolError (base indisponible ou surchargée) déclenche le repli : un None dû à une
+    erreur SQL reste visible plutôt que d'être masqué par un résultat ancien.
+    """
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        cle = (fonction.__name__, args, tuple(sorted(kwargs.items())))
+        derniers = obtenir_derniers_resultats()
+        try:
+            resultat = fonction(*args, **kwargs)
+        except PoolError as erreur:
+            logger.warning(f"{fonction.__name__} servi en mode dégradé: {erreur}")
+            return derniers.relire(cle)
+        if resultat is not None:
+            derniers.garder(cle, resultat)
+        return resultat
+    return enveloppe
+
+def construire_clause_filtres(numero_tloh=None, annee=None, service=None) -> Tuple[str, List[Any]]:
+    """Construit la clause WHERE et ses paramètres à partir des filtres de surveillance"""
+    conditions = []
+    parametres = []
+
+    if numero_tloh:
+        conditions.append("numéro_TLOH LIKE %s")
+        parametres.append(f"%{numero_tloh}%")
+
+    if annee is not None:
+        conditions.append("YEAR(date_début) = %s")
+        parametres.append(annee)
+
+    if service is not None:
+        conditions.append("service = %s")
+        parametres.append(service)
+
+    clause_where = " AND ".join(conditions) if conditions else "1=1"
+    return clause_where, parametres
+
+@servir_en_mode_degrade
+def lister_indicateurs(type_indicateur: str) -> Optional[List[Dict[str, Any]]]:
+    """Retourne les indicateurs d'un type donné, triés par nom"""
+    return executer_requete_nommee('indicateurs_par_type', (type_indicateur,), fetch=True)
+
+@servir_en_mode_degrade
+def calculer_statistiques_globales() -> Optional[Dict[str, Any]]:
+    """Totaux affichés sur le tableau de bord"""
+    if Configuration.PLANIFICATEUR_ACTIF:
+        totaux = source_bulletins().totaux(["cas", "décès", "isolé", "notifié"])
+        if totaux is not None:
+            return {f"total_{mesure}": valeur for mesure, valeur in totaux.items()}
+
+    statistiques = executer_requete_nommee('statistiques_globales', fetch=True)
+    if statistiques and len(statistiques) > 0:
+        return statistiques[0]
+    return None
+
+@servir_en_mode_degrade
+def calculer_agregats_surveillance(type_indicateur: str, numero_tloh=None, annee=None,
+                                   service=None, periode=None) -> Optional[List[Dict[str, Any]]]:
+    """Agrège les mesures d'un type d'indicateur selon les filtres de surveillance.
+
+    `periode` (date de début, date de fin) remplace le filtre par année : elle retient les
+    lignes dont la période de déclaration chevauche cet intervalle. Retourne une ligne par
+    indicateur, totalisant les enregistrements qui lui sont rattachés (IndicateurEnregistrement),
+    puis une ligne pour les enregistrements antérieurs au suivi par indicateur s'il en reste ;
+    une liste vide si aucun indicateur n'est défini pour ce type, ou None si l'agrégation a échoué.
+    """
+    indicateurs = lister_indicateurs(type_indicateur)
+    if not indicateurs:
+        return []
+
+    mesures = Configuration.MESURES_PAR_TYPE[type_indicateur]
+    # idIndicateur -> totaux ; la clé 0 regroupe les enregistrements sans indicateur
+    par_indicateur = None
+    if periode is not None:
+        par_indicateur = obtenir_index_periodes().totaux_par_indicateur(
+            mesures, periode[0], periode[1], service, numero_tloh or None)
+        if par_indicateur is None:
+            return None
+    elif not numero_tloh and Configuration.PLANIFICATEUR_ACTIF:
+        # Les bulletins précalculés couvrent tous les filtres sauf le numéro TLOH
+        par_indicateur = source_bulletins().totaux_par_indicateur(mesures, annee, service)
+
+    if par_indicateur is None:
+        clause_where, parametres = construire_clause_filtres(numero_tloh, annee, service)
+        colonnes = ", ".join(f"IFNULL(SUM(e.{mesure}), 0) AS {mesure}" for mesure in mesures)
+        # Une requête nommée par combinaison de mesures et de filtres actifs
+        filtres_actifs = [nom for nom, valeur in (("numero", numero_tloh), ("annee", annee), ("service", service))
+                          if valeur]
+        nom = "surveillance_" + "_".join(mesures + filtres_actifs)
+        obtenir_registre().enregistrer(nom, f"""
+        SELECT IFNULL(ie.idIndicateur, 0) AS idIndicateur, {colonnes}
+        FROM Enregistrement e
+        LEFT JOIN IndicateurEnregistrement ie ON ie.idEnregistrement = e.idEnregistrement
+        WHERE {clause_where}
+        GROUP BY IFNULL(ie.idIndicateur, 0)
+        """)
+        resultat = executer_requete_nommee(nom, tuple(parametres), fetch=True)
+        if resultat is None:
+            return None
+        par_indicateur = {int(ligne['idIndicateur']): {mesure: int(ligne[mesure]) for mesure in mesures}
+                          for ligne in resultat}
+
+    vides = dict.fromkeys(mesures, 0)
+    lignes = [{'indicateur': indicateur['nom'], **par_indicateur.get(int(indicateur['idIndicateur']), vides)}
+              for indicateur in indicateurs]
+    # Les lignes saisies avant IndicateurEnregistrement ne peuvent être attribuées à un indicateur
+    anterieures = par_indicateur.get(0)
+    if anterieures and any(anterieures.values()):
+        lignes.append({'indicateur': Configuration.LIBELLE_SANS_INDICATEUR, **anterieures})
+    return lignes
+
+def obtenir_filigrane() -> Optional[Tuple[int, int, int]]:
+    """Filigrane des données : (dernier identifiant inséré, version des corrections, séquence
+    des insertions).
+
+    La séquence change à chaque validation d'une insertion, même si son identifiant est
+    inférieur au dernier lu. Une suppression faite hors de l'application doit incrémenter
+    VersionDonnees ('corrections'), comme le fait charge_TLOH.py, et une insertion
+    VersionDonnees ('insertions') en début de transaction, pour que les caches la voient.
+    """
+    try:
+        resultat = executer_requete_nommee('filigrane', fetch=True)
+    except BaseIndisponible:
+        # Les caches gardent alors leur dernier état
+        return None
+    if not resultat:
+        return None
+    ligne = resultat[0]
+    return int(ligne['dernier_id']), int(ligne['version_corrections']), int(ligne['sequence_insertions'])
+
+# ============================================
+# 4.3 API JSON AVEC CACHE HTTP
+# ============================================
+def _valeur_json(valeur):
+    """Convertit les types renvoyés par MySQL (Decimal, dates) en types JSON"""
+    if isinstance(valeur, Decimal):
+        return int(valeur) if valeur == valeur.to_integral_value() else float(valeur)
+    if isinstance(valeur, (datetime, date)):
+        return valeur.isoformat()
+    raise TypeError(f"Type non sérialisable: {type(valeur).__name__}")
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    """Expose en lecture seule les agrégats du tableau de bord et de la surveillance.
+
+    L'ETag dérive du filigrane des données : tant qu'aucun TLOH n'est ajouté ni corrigé, un client
+    qui renvoie If-None-Match reçoit un 304 sans que les agrégats soient recalculés. Lorsque les
+    bulletins précalculés sont en retard sur la base, la réponse part sans ETag : un ETag du
+    filigrane de la base décrirait des données que le corps ne contient pas encore.
+    """
+    server_version = "TLOH-API/1.0"
+
+    def log_message(self, format, *args):
+        logger.info("API %s - %s", self.address_string(), format % args)
+
+    def _envoyer(self, statut: int, corps: Optional[bytes] = None, entetes: Optional[Dict[str, str]] = None):
+        self.send_response(statut)
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        if corps is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        if corps is not None:
+            self.wfile.write(corps)
+
+    def _erreur(self, statut: int, message: str):
+        self._envoyer(statut, json.dumps({'erreur': message}, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        filtres = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+
+        if Configuration.API_JETON and self.headers.get("Authorization") != f"Bearer {Configuration.API_JETON}":
+            self._erreur(401, "Jeton d'accès manquant ou invalide")
+            return
+
+        if url.path == "/api/statistiques":
+            calcul = calculer_statistiques_globales
+        elif url.path == "/api/surveillance":
+            try:
+                calcul = self._preparer_surveillance(filtres)
+            except ValueError as erreur:
+                self._erreur(400, str(erreur))
+                return
+        else:
+            self._erreur(404, f"Ressource inconnue: {url.path}")
+            return
+
+        try:
+            filigrane = obtenir_filigrane()
+        except PoolError as erreur:
+            # Requête écartée par le contrôle d'admission : le client réessaiera plus tard
+            self._erreur(503, str(erreur))
+            return
+        if filigrane is None:
+            self._erreur(503, "Base de données indisponible")
+            return
+
+        # Les agrégats viennent des bulletins (instantané ou planificateur) : leur filigrane doit
+        # être celui de la base pour que l'ETag décrive le corps envoyé
+        source = source_bulletins() if Configuration.PLANIFICATEUR_ACTIF else None
+        if source is not None and source.filigrane != filigrane:
+            entetes = {"Cache-Control": "no-cache"}
+        else:
+            cle = url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(filtres.items()))
+            etag = '"' + hashlib.sha1(f"{filigrane}:{cle}".encode("utf-8")).hexdigest() + '"'
+            entetes = {
+                "ETag": etag,
+                "Cache-Control": f"private, max-age={Configuration.API_MAX_AGE}, must-revalidate",
+            }
+
+            etags_client = [e.strip() for e in self.headers.get("If-None-Match", "").split(",")]
+            if etag in etags_client or "*" in etags_client:
+                self._envoyer(304, entetes=entetes)
+                return
+
+        try:
+            donnees = calcul()
+        except PoolError as erreur:
+            self._erreur(503, str(erreur))
+            return
+        if donnees is None:
+            self._erreur(503, "Échec du calcul des agrégats")
+            return
+
+        corps = json.dumps(
+            {'filigrane': dict(zip(('dernier_id', 'version_corrections', 'sequence_insertions'),
+                                   source.filigrane if source is not None and source.filigrane else filigrane)),
+             'donnees': donnees},
+            ensure_ascii=False, default=_valeur_json
+        ).encode("utf-8")
+        self._envoyer(200, corps, entetes)
+
+    @staticmethod
+    def _preparer_surveillance(filtres: Dict[str, str]):
+        """Valide les filtres et retourne la fonction de calcul correspondante"""
+        annee = filtres.get("annee")
+        if annee is not None:
+            if not annee.isdigit():
+                raise ValueError(f"Année invalide: {annee}")
+            annee = int(annee)
+
+        service = filtres.get("service")
+        if service is not None and service not in Configuration.SERVICES:
+            raise ValueError(f"Service inconnu: {service}")
+
+        type_indicateur = filtres.get("type")
+        if type_indicateur is not None and type_indicateur not in Configuration.TYPES_INDICATEUR:
+            raise ValueError(f"Type d'indicateur inconnu: {type_indicateur}")
+        types = [type_indicateur] if type_indicateur else Configuration.TYPES_INDICATEUR
+
+        numero_tloh = filtres.get("numero_tloh")
+        return lambda: _agreger_types(types, numero_tloh, annee, service)
+
+def _agreger_types(types, numero_tloh, annee, service) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    resultats = {}
+    for type_indicateur in types:
+        agregats = calculer_agregats_surveillance(type_indicateur, numero_tloh, annee, service)
+        if agregats is None:
+            return None
+        resultats[type_indicateur] = agregats
+    return resultats
+
+@st.cache_resource
+def demarrer_serveur_api() -> Optional[ThreadingHTTPServer]:
+    """Démarre l'API une seule fois par processus, dans un thread d'arrière-plan"""
+    try:
+        locale = ipaddress.ip_address(Configuration.API_HOTE).is_loopback
+    except ValueError:
+        locale = Configuration.API_HOTE == "localhost"
+    if not Configuration.API_JETON and not locale:
+        logger.error(f"API non démarrée : l'écoute sur {Configuration.API_HOTE} exige Configuration.API_JETON")
+        return None
+    try:
+        serveur = ThreadingHTTPServer((Configuration.API_HOTE, Configuration.API_PORT), GestionnaireAPI)
+    except OSError as erreur:
+        logger.error(f"Impossible de démarrer l'API sur le port {Configuration.API_PORT}: {erreur}")
+        return None
+    serveur.daemon_threads = True
+    threading.Thread(target=serveur.serve_forever, name="tloh-api", daemon=True).start()
+    logger.info(f"API JSON démarrée sur http://{Configuration.API_HOTE}:{Configuration.API_PORT}")
+    return serveur
+
+# ============================================
+# 4.4 TABLE COMPACTE DES ENREGISTREMENTS
+# ============================================
+def _jours_vers_annees(jours: np.ndarray) -> np.ndarray:
+    """Année civile de dates exprimées en jours depuis le 01/01/1970"""
+    return (jours.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970).astype(np.int16)
+
+def _jours_vers_semaines_iso(jours: np.ndarray) -> np.ndarray:
+    """Semaine ISO au format YEARWEEK(date, 3) (ex. 202410) de dates en jours depuis le 01/01/1970"""
+    jours = jours.astype(np.int64)
+    # La semaine ISO est celle qui contient le jeudi ; le 01/01/1970 est un jeudi
+    jeudi = jours - (jours + 3) % 7 + 3
+    annee_iso = _jours_vers_annees(jeudi).astype(np.int64)
+    premier_janvier = (annee_iso - 1970).astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    return (annee_iso * 100 + (jeudi - premier_janvier) // 7 + 1).astype(np.int32)
+
+class TableEnregistrements:
+    """Copie en colonnes de la table Enregistrement, partagée par les caches et les analyses.
+
+    Les lignes sont lues par lots de tuples directement dans des tableaux NumPy : dates en
+    jours (int32), service et numéro TLOH encodés par dictionnaire, mesures en int32,
+    indicateur lié via IndicateurEnregistrement (0 pour les lignes antérieures). Une
+    ligne occupe ainsi une cinquantaine d'octets au lieu du kilo-octet d'un dictionnaire
+    Python. Les insertions sont ajoutées au fil de l'eau, dans l'ordre de validation garanti par
+    la séquence des insertions ; un changement de version des corrections venu d'un autre
+    processus provoque un rechargement complet et incrémente `generation`. Les corrections
+    faites depuis l'application sont appliquées sur place (voir appliquer_corrections) : une
+    ligne supprimée devient une ligne inactive aux mesures nulles.
+    """
+    # Type d'indicateur déduit des colonnes renseignées (voir page_nouvel_enregistrement)
+    TYPE_ENDEMIQUE, TYPE_TROPICALE, TYPE_DECES = range(3)
+
+    def __init__(self):
+        self.verrou = threading.RLock()
+        self.generation = 0
+        self.nb = 0
+        self.nb_supprimees = 0
+        self._filigrane: Optional[Tuple[int, int, int]] = None
+        self._vider()
+
+    def _vider(self):
+        self.services: List[str] = []
+        self.numeros: List[str] = []
+        self._codes_services: Dict[str, int] = {}
+        self._codes_numeros: Dict[str, int] = {}
+        self._colonnes = {
+            'id': np.empty(0, np.int64),
+            'debut': np.empty(0, np.int32),
+            'fin': np.empty(0, np.int32),
+            'annee': np.empty(0, np.int16),
+            'semaine': np.empty(0, np.int32),
+            'service': np.empty(0, np.int16),
+            'numero': np.empty(0, np.int32),
+            'type': np.empty(0, np.uint8),
+            'mesures': np.empty((0, len(Configuration.MESURES)), np.int32),
+            'indicateur': np.empty(0, np.int32),
+            'actif': np.empty(0, np.bool_),
+        }
+        self.nb = 0
+        self.nb_supprimees = 0
+
+    def rafraichir(self, complet: bool = False) -> bool:
+        """Intègre les lignes insérées depuis le dernier appel ; False si la base est indisponible"""
+        with self.verrou:
+            filigrane = obtenir_filigrane()
+            if filigrane is None:
+                return False
+            if not complet and filigrane == self._filigrane:
+                return True
+
+            # Une correction faite par un autre processus n'est connue que par sa version : tout recharger
+            recharger = complet or self._filigrane is None or filigrane[1] != self._filigrane[1]
+            dernier_id = 0 if recharger else self._filigrane[0]
+            # Un rechargement repart de dictionnaires vierges, remplacés seulement en cas de succès
+            dictionnaires = ({}, [], {}, []) if recharger else \
+                (self._codes_services, self.services, self._codes_numeros, self.numeros)
+            try:
+                lots = [self._encoder(lot, *dictionnaires) for lot in lire_par_lots(
+                    f"""
+                    SELECT e.idEnregistrement, e.numéro_TLOH, e.date_début, e.date_fin, e.service,
+                           {", ".join("e." + mesure for mesure in Configuration.MESURES)},
+                           IFNULL(ie.idIndicateur, 0)
+                    FROM Enregistrement e
+                    LEFT JOIN IndicateurEnregistrement ie ON ie.idEnregistrement = e.idEnregistrement
+                    WHERE e.idEnregistrement > %s
+                    ORDER BY e.idEnregistrement
+                    """,
+                    (dernier_id,),
+                    # Un rechargement complet lit toute la table : il passe après les rapports
+                    classe="fond" if recharger else "analytique"
+                )]
+            except (Error, TypeError, ValueError) as erreur:
+                # Une ligne inattendue ne doit pas casser tous les chargements : la table reste en l'état
+                logger.error(f"Erreur de chargement des enregistrements: {erreur}")
+                return False
+
+            if recharger:
+                self._vider()
+                self._codes_services, self.services, self._codes_numeros, self.numeros = dictionnaires
+                self.generation += 1
+            for lot in lots:
+                self._ajouter(lot)
+            self._filigrane = (int(self._colonnes['id'][self.nb - 1]) if self.nb else 0, *filigrane[1:])
+            logger.info(f"{self.nb} enregistrements en mémoire ({self.octets_par_ligne():.0f} octets/ligne)")
+            return True
+
+    def _encoder(self, lot: List[tuple], codes_services: Dict[str, int], services: List[str],
+                 codes_numeros: Dict[str, int], numeros: List[str]) -> Dict[str, np.ndarray]:
+        """Convertit un lot de tuples (id, numéro, début, fin, service, mesures..., idIndicateur ou 0)
+        en colonnes compactes.
+
+        Une mesure NULL vaut 0 ; une date manquante prend la valeur de l'autre. Une ligne sans
+        aucune date, rattachable à aucune semaine, est gardée inactive.
+        """
+        ids, valeurs_numeros, debuts, fins, valeurs_services, *mesures, indicateurs = zip(*lot)
+        datees = np.array([d is not None or f is not None for d, f in zip(debuts, fins)], np.bool_)
+        debuts, fins = zip(*((d or f or date(1970, 1, 1), f or d or date(1970, 1, 1)) for d, f in zip(debuts, fins)))
+        incompletes = int((~datees).sum()) + sum(valeur is None for colonne in mesures for valeur in colonne)
+        if incompletes:
+            logger.warning(f"{incompletes} valeur(s) NULL dans Enregistrement (lignes {ids[0]} à {ids[-1]})")
+        debut = np.array(debuts, dtype='datetime64[D]').astype(np.int32)
+        mesures = np.array([[valeur or 0 for valeur in colonne] for colonne in mesures], dtype=np.int32).T
+        indice = {mesure: i for i, mesure in enumerate(Configuration.MESURES)}
+        types = np.full(len(ids), self.TYPE_ENDEMIQUE, np.uint8)
+        types[(mesures[:, indice['notifié']] > 0) | (mesures[:, indice['isolé']] > 0)] = self.TYPE_TROPICALE
+        types[(mesures[:, indice['institution']] > 0) | (mesures[:, indice['communauté']] > 0)] = self.TYPE_DECES
+        return {
+            'id': np.array(ids, dtype=np.int64),
+            'debut': debut,
+            'fin': np.array(fins, dtype='datetime64[D]').astype(np.int32),
+            'annee': _jours_vers_annees(debut),
+            'semaine': _jours_vers_semaines_iso(debut),
+            'service': np.array([self._coder(codes_services, services, s) for s in valeurs_services], np.int16),
+            'numero': np.array([self._coder(codes_numeros, numeros, n) for n in valeurs_numeros], np.int32),
+            'type': types,
+            'mesures': mesures,
+            'indicateur': np.array(indicateurs, dtype=np.int32),
+            'actif': datees,
+        }
+
+    @staticmethod
+    def _coder(codes: Dict[str, int], valeurs: List[str], valeur: str) -> int:
+        code = codes.get(valeur)
+        if code is None:
+            code = codes[valeur] = len(valeurs)
+            valeurs.append(valeur)
+        return code
+
+    def _ajouter(self, lot: Dict[str, np.ndarray]):
+        """Ajoute un lot en fin de table, en doublant la capacité au besoin"""
+        taille = len(lot['id'])
+        capacite = len(self._colonnes['id'])
+        if self.nb + taille > capacite:
+            capacite = max(2 * capacite, self.nb + taille, 1024)
+            for nom, colonne in self._colonnes.items():
+                nouvelle = np.zeros((capacite,) + colonne.shape[1:], colonne.dtype)
+                nouvelle[:self.nb] = colonne[:self.nb]
+                self._colonnes[nom] = nouvelle
+        for nom, valeurs in lot.items():
+            self._colonnes[nom][self.nb:self.nb + taille] = valeurs
+        self.nb += taille
+
+    def appliquer_corrections(self, modifications: List[tuple], suppressions: List[int],
+                              version: int) -> Optional[List[Tuple[int, Optional[tuple], Optional[tuple]]]]:
+        """Applique sur place une correction validée en base, sans relecture.
+
+        `modifications` contient des tuples au format de la lecture (idEnregistrement, numéro,
+        début, fin, service, mesures..., idIndicateur) et `suppressions` des identifiants. Retourne, pour chaque
+        ligne touchée, (indice, ancienne cellule, nouvelle cellule) où une cellule est
+        ((année, semaine, service, indicateur), mesures) ; None si la table n'était pas exactement à la version
+        précédente, auquel cas le prochain rafraîchissement recharge tout. Les ajouts de la
+        correction suivent le chemin normal des insertions.
+        """
+        with self.verrou:
+            if self._filigrane is None or self._filigrane[1] != version - 1:
+                return None
+            ids = self._colonnes['id'][:self.nb]
+            cibles = [int(ligne[0]) for ligne in modifications] + [int(i) for i in suppressions]
+            indices = np.searchsorted(ids, cibles)
+            if any(i >= self.nb or ids[i] != cible for i, cible in zip(indices, cibles)):
+                return None
+
+            def cellule(i):
+                if not self._colonnes['actif'][i]:
+                    return None
+                cle = (int(self._colonnes['annee'][i]), int(self._colonnes['semaine'][i]),
+                       self.services[self._colonnes['service'][i]], int(self._colonnes['indicateur'][i]))
+                return cle, tuple(int(v) for v in self._colonnes['mesures'][i])
+
+            deltas = []
+            lot = self._encoder(modifications, self._codes_services, self.services,
+                                self._codes_numeros, self.numeros) if modifications else {}
+            for position, i in enumerate(indices[:len(modifications)]):
+                avant = cellule(i)
+                for nom, valeurs in lot.items():
+                    self._colonnes[nom][i] = valeurs[position]
+                deltas.append((int(i), avant, cellule(i)))
+            for i in indices[len(modifications):]:
+                avant = cellule(i)
+                if avant is None:
+                    continue
+                self._colonnes['mesures'][i] = 0
+                self._colonnes['actif'][i] = False
+                self.nb_supprimees += 1
+                deltas.append((int(i), avant, None))
+            # La séquence des insertions reste l'ancienne : les ajouts de la correction seront lus
+            # par le prochain rafraîchissement
+            self._filigrane = (self._filigrane[0], version, self._filigrane[2])
+            return deltas
+
+    def instantane(self) -> Dict[str, Any]:
+        """Vues en lecture seule des colonnes, cohérentes même si la table est rechargée ensuite.
+
+        Les corrections modifient les lignes existantes sur place : un instantané les voit.
+        """
+        with self.verrou:
+            instantane = {nom: colonne[:self.nb] for nom, colonne in self._colonnes.items()}
+            instantane.update(generation=self.generation, nb=self.nb, filigrane=self._filigrane,
+                              services=list(self.services), numeros=list(self.numeros))
+        return instantane
+
+    def filigrane(self) -> Optional[Tuple[int, int, int]]:
+        """Filigrane de la base correspondant au contenu actuel de la table"""
+        with self.verrou:
+            return self._filigrane
+
+    def octets_par_ligne(self) -> float:
+        if not self.nb:
+            return 0.0
+        return sum(colonne[:self.nb].nbytes for colonne in self._colonnes.values()) / self.nb
+
+@st.cache_resource
+def obtenir_table_enregistrements() -> TableEnregistrements:
+    """Table compacte unique par processus"""
+    return TableEnregistrements()
+
+# ============================================
+# 4.4.1 INDEX DES PÉRIODES DE DÉCLARATION
+# ============================================
+def _jour(valeur: date) -> int:
+    """Date en jours depuis le 01/01/1970, comme les colonnes de la table compacte"""
+    return int(np.datetime64(valeur, 'D').astype(np.int64))
+
+def _arbre_max(valeurs: np.ndarray) -> np.ndarray:
+    """Arbre binaire implicite (racine en 1) du maximum de chaque intervalle de feuilles"""
+    taille = 1 << max(0, int(len(valeurs) - 1).bit_length())
+    arbre = np.full(2 * taille, np.iinfo(np.int64).min, np.int64)
+    arbre[taille:taille + len(valeurs)] = valeurs
+    niveau = taille
+    while niveau > 1:
+        arbre[niveau // 2:niveau] = np.maximum(arbre[niveau:2 * niveau:2], arbre[niveau + 1:2 * niveau:2])
+        niveau //= 2
+    return arbre
+
+class IndexPeriodes:
+    """Index d'intervalles des périodes [date_début, date_fin] de la table compacte, par service.
+
+    Les lignes de chaque service sont triées par date de début et un arbre des maximums de
+    date de fin les couvre. Pour un intervalle [a, b], une recherche dichotomique borne les
+    lignes débutant au plus tard en b, puis la descente dans l'arbre écarte tout sous-arbre
+    dont aucune ligne ne finit après a : les k lignes chevauchantes sont trouvées en
+    O((k + 1) log n). Les lignes ajoutées depuis la construction restent dans une courte file
+    parcourue linéairement ; l'index est reconstruit quand elle dépasse TAILLE_FILE, après
+    un rechargement de la table ou une correction.
+    """
+    TAILLE_FILE = 4096
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._cle: Optional[Tuple[int, int]] = None
+        self._nb_indexees = 0
+        self._services: Dict[int, Dict[str, np.ndarray]] = {}
+        self._file = np.empty(0, np.int64)
+
+    def _actualiser(self) -> Optional[Dict[str, Any]]:
+        table = obtenir_table_enregistrements()
+        if not table.rafraichir():
+            return None
+        instantane = table.instantane()
+        cle = (instantane['generation'], table.filigrane()[1])
+        if cle != self._cle or instantane['nb'] - self._nb_indexees > self.TAILLE_FILE:
+            self._construire(instantane)
+            self._cle = cle
+        else:
+            self._file = np.arange(self._nb_indexees, instantane['nb'])
+        return instantane
+
+    def _construire(self, instantane: Dict[str, Any]):
+        lignes = np.flatnonzero(instantane['actif'])
+        services = instantane['service'][lignes]
+        self._services = {}
+        for code in np.unique(services):
+            selection = lignes[services == code]
+            selection = selection[np.argsort(instantane['debut'][selection], kind='stable')]
+            self._services[int(code)] = {
+                'debut': instantane['debut'][selection],
+                'fin': instantane['fin'][selection],
+                'lignes': selection,
+                'arbre': _arbre_max(instantane['fin'][selection]),
+            }
+        self._nb_indexees = instantane['nb']
+        self._file = np.empty(0, np.int64)
+
+    @staticmethod
+    def _chercher(index: Dict[str, np.ndarray], a: int, b: int) -> np.ndarray:
+        """Lignes de l'index dont la période chevauche [a, b], par date de début croissante"""
+        limite = int(np.searchsorted(index['debut'], b, side='right'))
+        arbre = index['arbre']
+        taille = len(arbre) // 2
+        positions = []
+        pile = [1]
+        while pile:
+            noeud = pile.pop()
+            profondeur = noeud.bit_length() - 1
+            if arbre[noeud] < a or (noeud - (1 << profondeur)) * (taille >> profondeur) >= limite:
+                continue
+            if noeud >= taille:
+                positions.append(noeud - taille)
+            else:
+                pile.extend((2 * noeud + 1, 2 * noeud))
+        return index['lignes'][np.array(positions, np.int64)]
+
+    def _lignes(self, instantane: Dict[str, Any], a: int, b: int, code: int) -> np.ndarray:
+        """Lignes d'un service chevauchant [a, b], index et file des ajouts récents compris"""
+        lignes = self._chercher(self._services[code], a, b) if code in self._services else np.empty(0, np.int64)
+        file = self._file
+        if len(file):
+            recentes = file[(instantane['service'][file] == code) & (instantane['debut'][file] <= b) &
+                            (instantane['fin'][file] >= a) & instantane['actif'][file]]
+            if len(recentes):
+                lignes = np.concatenate([lignes, recentes])
+                lignes = lignes[np.argsort(instantane['debut'][lignes], kind='stable')]
+        return lignes
+
+    def totaux_par_indicateur(self, mesures: List[str], debut: date, fin: date, service=None,
+                              numero_tloh=None) -> Optional[Dict[int, Dict[str, int]]]:
+        """Somme des mesures des lignes dont la période chevauche [debut, fin], par indicateur (0 : sans)"""
+        with self._verrou:
+            instantane = self._actualiser()
+            if instantane is None:
+                return None
+            a, b = _jour(debut), _jour(fin)
+            codes = [instantane['services'].index(service)] if service in instantane['services'] else \
+                ([] if service else range(len(instantane['services'])))
+            lignes = np.concatenate([self._lignes(instantane, a, b, code) for code in codes] or
+                                    [np.empty(0, np.int64)])
+        if numero_tloh:
+            # Comme le filtre SQL (LIKE '%x%') : sous-chaîne du numéro, sans distinction de casse
+            numeros = np.char.lower(np.array(instantane['numeros'], dtype=str))
+            retenus = np.char.find(numeros, numero_tloh.lower()) >= 0
+            lignes = lignes[retenus[instantane['numero'][lignes]]] if len(lignes) else lignes
+        colonnes = [Configuration.MESURES.index(mesure) for mesure in mesures]
+        indicateurs, groupes = np.unique(instantane['indicateur'][lignes], return_inverse=True)
+        sommes = np.zeros((len(indicateurs), len(colonnes)), np.int64)
+        np.add.at(sommes, groupes, instantane['mesures'][lignes][:, colonnes])
+        return {int(indicateur): {mesure: int(somme) for mesure, somme in zip(mesures, ligne)}
+                for indicateur, ligne in zip(indicateurs, sommes)}
+
+    def couverture(self, debut: date, fin: date) -> List[Dict[str, Any]]:
+        """Par service : TLOH chevauchant [debut, fin], jours couverts et lacunes de déclaration"""
+        with self._verrou:
+            instantane = self._actualiser()
+            if instantane is None:
+                return []
+            a, b = _jour(debut), _jour(fin)
+            resultat = []
+            for service in Configuration.SERVICES:
+                code = instantane['services'].index(service) if service in instantane['services'] else None
+                lignes = self._lignes(instantane, a, b, code) if code is not None else np.empty(0, np.int64)
+                # Balayage par date de début : tout jour non couvert par les périodes vues est une lacune
+                lacunes = []
+                couvert = a - 1
+                for jour_debut, jour_fin in zip(instantane['debut'][lignes], instantane['fin'][lignes]):
+                    if jour_debut > couvert + 1:
+                        lacunes.append((couvert + 1, int(jour_debut) - 1))
+                    couvert = max(couvert, int(jour_fin))
+                if couvert < b:
+                    lacunes.append((couvert + 1, b))
+                jours_lacunes = sum(min(fin_lacune, b) - max(debut_lacune, a) + 1 for debut_lacune, fin_lacune in lacunes)
+                resultat.append({
+                    'service': service,
+                    'tloh': len(np.unique(instantane['numero'][lignes])),
+                    'jours_couverts': (b - a + 1) - jours_lacunes,
+                    'lacunes': ", ".join(
+                        f"{np.datetime64(max(debut_lacune, a), 'D').astype(date):%d/%m}-"
+                        f"{np.datetime64(min(fin_lacune, b), 'D').astype(date):%d/%m}"
+                        for debut_lacune, fin_lacune in lacunes
+                    ),
+                })
+            return resultat
+
+@st.cache_resource
+def obtenir_index_periodes() -> IndexPeriodes:
+    return IndexPeriodes()
+
+# ============================================
+# 4.5 PLANIFICATEUR DES BULLETINS ÉPIDÉMIOLOGIQUES
+# ============================================
+def _prochaine_echeance(apres: datetime) -> datetime:
+    """Prochaine échéance de rapportage strictement postérieure à `apres`"""
+    jour, heure = Configuration.ECHEANCE_RAPPORT
+    echeance = apres.replace(hour=heure, minute=0, second=0, microsecond=0)
+    echeance += timedelta(days=(jour - apres.weekday()) % 7)
+    if echeance <= apres:
+        echeance += timedelta(days=7)
+    return echeance
+
+class PlanificateurBulletins:
+    """Précalcule les totaux hebdomadaires et annuels par service en arrière-plan.
+
+    Les totaux sont conservés par (année de date_début, semaine ISO, service, indicateur),
+    l'indicateur 0 regroupant les lignes qui n'y sont pas rattachées : le bulletin d'une
+    semaine comme celui d'une année s'obtiennent en sommant ces cellules. Chaque
+    semaine porte un numéro de version, incrémenté à chaque recalcul. Après l'échéance de
+    rapportage tout est recalculé ; entre deux échéances, seules les soumissions tardives
+    (lignes ajoutées à la table compacte depuis le dernier calcul) sont ajoutées aux
+    semaines qu'elles touchent.
+    """
+
+    def __init__(self):
+        self._verrou = threading.RLock()
+        # Sérialise les calculs (rafraîchissements, corrections) ; les lectures n'attendent que _verrou
+        self._calcul = threading.Lock()
+        self._arret = threading.Event()
+        self._reveil = threading.Event()
+        self._cellules: Dict[Tuple[int, int, str, int], Dict[str, int]] = {}
+        self._versions: Dict[int, int] = {}
+        self._generation: Optional[int] = None
+        self._nb_lignes = 0
+        self.version = 0
+        self.calcule_le: Optional[datetime] = None
+        # Filigrane des lignes agrégées dans les cellules, comme celui d'un instantané partagé
+        self.filigrane: Optional[Tuple[int, int, int]] = None
+        self.prochaine_echeance = _prochaine_echeance(datetime.now())
+
+    def demarrer(self):
+        threading.Thread(target=self._boucle, name="tloh-planificateur", daemon=True).start()
+
+    def arreter(self):
+        self._arret.set()
+        self._reveil.set()
+
+    def pret(self) -> bool:
+        """Vrai dès que le premier calcul complet est terminé"""
+        return self._generation is not None
+
+    def signaler(self):
+        """Demande au thread d'intégrer sans attendre les soumissions récentes"""
+        self._reveil.set()
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            try:
+                # Tant que le premier calcul n'a pas abouti (base injoignable au démarrage), il est retenté
+                if not self.pret():
+                    self.rafraichir(complet=True)
+                elif datetime.now() >= self.prochaine_echeance:
+                    self.prochaine_echeance = _prochaine_echeance(datetime.now())
+                    self.rafraichir(complet=True)
+                else:
+                    self.rafraichir()
+            except Exception as erreur:
+                logger.error(f"Erreur du planificateur de bulletins: {erreur}")
+            attente = (self.prochaine_echeance - datetime.now()).total_seconds()
+            self._reveil.wait(max(0, min(Configuration.PLANIFICATEUR_INTERVALLE, attente)))
+            self._reveil.clear()
+
+    def rafraichir(self, complet: bool = False) -> bool:
+        """Met les bulletins à jour ; retourne False si la base est indisponible.
+
+        Lecture et agrégation se font hors de _verrou : les pages continuent de lire les
+        bulletins précédents pendant un recalcul, remplacés ensuite en une fois.
+        """
+        with self._calcul:
+            table = obtenir_table_enregistrements()
+            if not table.rafraichir(complet):
+                return False
+            instantane = table.instantane()
+
+            if complet or instantane['generation'] != self._generation:
+                debut = 0
+            elif instantane['nb'] == self._nb_lignes:
+                with self._verrou:
+                    self.filigrane = instantane['filigrane']
+                return True
+            else:
+                debut = self._nb_lignes
+
+            cellules = self._agreger(instantane, debut)
+            with self._verrou:
+                if debut == 0:
+                    self._cellules = {}
+                    self._generation = instantane['generation']
+                for cle, valeurs in cellules.items():
+                    cumul = self._cellules.setdefault(cle, dict.fromkeys(Configuration.MESURES, 0))
+                    for mesure, valeur in valeurs.items():
+                        cumul[mesure] += valeur
+
+                semaines = {cle[1] for cle in (self._cellules if debut == 0 else cellules)}
+                for semaine in semaines:
+                    self._versions[semaine] = self._versions.get(semaine, 0) + 1
+                self._nb_lignes = instantane['nb']
+                self.filigrane = instantane['filigrane']
+                self.version += 1
+                self.calcule_le = datetime.now()
+            logger.info(f"Bulletins recalculés pour {len(semaines)} semaine(s)")
+            self._publier()
+            return True
+
+    def appliquer_corrections(self, modifications: List[tuple], suppressions: List[int], version: int) -> bool:
+        """Reporte une correction dans les cellules par différence (ancienne valeur retirée, nouvelle ajoutée).
+
+        Retourne False si la table a dû être laissée au rechargement : le prochain
+        rafraîchissement recalcule alors tout.
+        """
+        with self._calcul, self._verrou:
+            table = obtenir_table_enregistrements()
+            deltas = table.appliquer_corrections(modifications, suppressions, version)
+            if deltas is None:
+                return False
+            if table.generation != self._generation:
+                return True
+            semaines = set()
+            for indice, avant, apres in deltas:
+                # Les lignes pas encore agrégées seront lues avec leurs nouvelles valeurs
+                if indice >= self._nb_lignes:
+                    continue
+                for cellule, signe in ((avant, -1), (apres, 1)):
+                    if cellule is None:
+                        continue
+                    cle, valeurs = cellule
+                    cumul = self._cellules.setdefault(cle, dict.fromkeys(Configuration.MESURES, 0))
+                    for mesure, valeur in zip(Configuration.MESURES, valeurs):
+                        cumul[mesure] += signe * valeur
+                    if not any(cumul.values()):
+                        del self._cellules[cle]
+                    semaines.add(cle[1])
+            for semaine in semaines:
+                self._versions[semaine] = self._versions.get(semaine, 0) + 1
+            if self.filigrane is not None:
+                # Comme la table : version des corrections à jour, lignes lues inchangées
+                self.filigrane = (self.filigrane[0], version, self.filigrane[2])
+            self.version += 1
+            self.calcule_le = datetime.now()
+            logger.info(f"Correction reportée sur {len(semaines)} semaine(s)")
+            self._publier()
+            return True
+
+    def _publier(self):
+        """Partage les cellules avec les autres processus ; un échec n'affecte que ce partage"""
+        if not Configuration.INSTANTANE_ACTIF:
+            return
+        try:
+            obtenir_partage_instantanes().publier(self._cellules, self._versions, self.filigrane,
+                                                  self.version, self.calcule_le)
+        except (OSError, pa.ArrowException) as erreur:
+            logger.error(f"Publication de l'instantané des bulletins impossible: {erreur}")
+
+    @staticmethod
+    def _agreger(instantane: Dict[str, Any], debut: int) -> Dict[Tuple[int, int, str, int], Dict[str, int]]:
+        """Totaux par (année, semaine, service, indicateur) des lignes à partir de l'indice `debut`"""
+        cadre = pd.DataFrame(instantane['mesures'][debut:], columns=Configuration.MESURES)
+        cadre['annee'] = instantane['annee'][debut:]
+        cadre['semaine'] = instantane['semaine'][debut:]
+        cadre['service'] = instantane['service'][debut:]
+        cadre['indicateur'] = instantane['indicateur'][debut:]
+        groupes = cadre.groupby(['annee', 'semaine', 'service', 'indicateur'], sort=False).sum()
+        return {
+            (int(annee), int(semaine), instantane['services'][service], int(indicateur)):
+                {mesure: int(valeur) for mesure, valeur in zip(Configuration.MESURES, valeurs)}
+            for (annee, semaine, service, indicateur), valeurs in zip(groupes.index, groupes.to_numpy())
+        }
+
+    def totaux(self, mesures: List[str], annee=None, service=None, semaine=None) -> Optional[Dict[str, int]]:
+        """Somme des cellules correspondant aux filtres, ou None si aucun bulletin n'est disponible.
+
+        Aucune requête n'est faite ici : le thread est seulement réveillé pour intégrer les
+        soumissions arrivées depuis son dernier passage, visibles dès l'affichage suivant.
+        """
+        par_indicateur = self.totaux_par_indicateur(mesures, annee, service, semaine)
+        if par_indicateur is None:
+            return None
+        return {mesure: sum(valeurs[mesure] for valeurs in par_indicateur.values()) for mesure in mesures}
+
+    def totaux_par_indicateur(self, mesures: List[str], annee=None, service=None,
+                              semaine=None) -> Optional[Dict[int, Dict[str, int]]]:
+        """Comme totaux, séparés par indicateur (0 : lignes sans indicateur)"""
+        self.signaler()
+        with self._verrou:
+            if self._generation is None:
+                return None
+            totaux: Dict[int, Dict[str, int]] = {}
+            for (annee_cellule, semaine_cellule, service_cellule, indicateur), valeurs in self._cellules.items():
+                if annee is not None and annee_cellule != int(annee):
+                    continue
+                if service is not None and service_cellule != service:
+                    continue
+                if semaine is not None and semaine_cellule != semaine:
+                    continue
+                cumul = totaux.setdefault(indicateur, dict.fromkeys(mesures, 0))
+                for mesure in mesures:
+                    cumul[mesure] += valeurs[mesure]
+            return totaux
+
+    def cellules_modifiees(self, generation: Optional[int], versions: Dict[int, int]):
+        """Cellules des semaines dont la version diffère de `versions` (toutes si la génération a changé).
+
+        Retourne (génération, versions actuelles, semaines modifiées, cellules de ces semaines).
+        """
+        with self._verrou:
+            if generation != self._generation:
+                versions = {}
+            modifiees = {semaine for semaine, version in self._versions.items() if versions.get(semaine) != version}
+            cellules = {cle: dict(valeurs) for cle, valeurs in self._cellules.items() if cle[1] in modifiees}
+            return self._generation, dict(self._versions), modifiees, cellules
+
+    def bulletins_hebdomadaires(self, annee: int) -> List[Dict[str, Any]]:
+        """Lignes (semaine, service, version, mesures) du bulletin de chaque semaine de l'année"""
+        with self._verrou:
+            bulletins: Dict[Tuple[int, str], Dict[str, int]] = {}
+            for (annee_cellule, semaine, service, _), valeurs in self._cellules.items():
+                if annee_cellule != annee:
+                    continue
+                cumul = bulletins.setdefault((semaine, service), dict.fromkeys(Configuration.MESURES, 0))
+                for mesure, valeur in valeurs.items():
+                    cumul[mesure] += valeur
+            lignes = [
+                {'semaine': semaine % 100, 'service': service, 'version': self._versions.get(semaine, 0), **valeurs}
+                for (semaine, service), valeurs in sorted(bulletins.items())
+            ]
+        return lignes
+
+@st.cache_resource
+def obtenir_planificateur() -> PlanificateurBulletins:
+    """Planificateur unique par processus, démarré à la première utilisation"""
+    planificateur = PlanificateurBulletins()
+    planificateur.demarrer()
+    return planificateur
+
+# ============================================
+# 4.5.1 INSTANTANÉ DES BULLETINS PARTAGÉ ENTRE PROCESSUS
+# ============================================
+class InstantaneAgregats:
+    """Cellules des bulletins lues dans un fichier Feather projeté en mémoire.
+
+    Le fichier n'est pas compressé : les colonnes sont lues directement dans les pages du
+    fichier, partagées par tous les processus qui le projettent. Offre les mêmes lectures
+    que PlanificateurBulletins (totaux, bulletins_hebdomadaires, version, calcule_le).
+    """
+
+    def __init__(self, chemin: str):
+        self.table = feather.read_table(chemin, memory_map=True)
+        # Un instantané publié avant la colonne indicateur est illisible (KeyError) : il sera remplacé
+        self.table.column('indicateur')
+        meta = json.loads(self.table.schema.metadata[b'tloh'])
+        self.filigrane = tuple(meta['filigrane'])
+        self.version = meta['version']
+        self.calcule_le = datetime.fromisoformat(meta['calcule_le']) if meta['calcule_le'] else None
+
+    def _filtrer(self, annee=None, service=None, semaine=None) -> pa.Table:
+        conditions = [pc.equal(self.table[colonne], valeur) for colonne, valeur in
+                      (('annee', annee), ('service', service), ('semaine', semaine)) if valeur is not None]
+        if not conditions:
+            return self.table
+        masque = conditions[0]
+        for condition in conditions[1:]:
+            masque = pc.and_(masque, condition)
+        return self.table.filter(masque)
+
+    def totaux(self, mesures: List[str], annee=None, service=None, semaine=None) -> Dict[str, int]:
+        cellules = self._filtrer(None if annee is None else int(annee), service, semaine)
+        return {mesure: int(pc.sum(cellules[mesure]).as_py() or 0) for mesure in mesures}
+
+    def totaux_par_indicateur(self, mesures: List[str], annee=None, service=None,
+                              semaine=None) -> Dict[int, Dict[str, int]]:
+        cellules = self._filtrer(None if annee is None else int(annee), service, semaine)
+        groupes = cellules.group_by('indicateur').aggregate([(mesure, 'sum') for mesure in mesures])
+        return {
+            ligne['indicateur']: {mesure: int(ligne[f"{mesure}_sum"] or 0) for mesure in mesures}
+            for ligne in groupes.to_pylist()
+        }
+
+    def bulletins_hebdomadaires(self, annee: int) -> List[Dict[str, Any]]:
+        # Les cellules de chaque (semaine, service) sont sommées sur les indicateurs
+        cellules = self._filtrer(annee=int(annee)).group_by(['semaine', 'service']).aggregate(
+            [('version', 'max')] + [(mesure, 'sum') for mesure in Configuration.MESURES])
+        cellules = cellules.sort_by([('semaine', 'ascending'), ('service', 'ascending')])
+        return [
+            {'semaine': ligne['semaine'] % 100, 'service': ligne['service'], 'version': ligne['version_max'],
+             **{mesure: ligne[f"{mesure}_sum"] for mesure in Configuration.MESURES}}
+            for ligne in cellules.to_pylist()
+        ]
+
+class PartageInstantanes:
+    """Répertoire d'instantanés commun aux processus Streamlit d'un serveur.
+
+    Chaque publication écrit un nouveau fichier, puis remplace atomiquement (os.replace) le
+    petit fichier `courant` qui désigne le dernier. Un lecteur garde sa projection tant que
+    `courant` ne change pas ; un fichier encore projeté n'est jamais réécrit, ce qui reste
+    sûr sous Windows où un fichier projeté ne peut être remplacé.
+    """
+    POINTEUR = "courant"
+
+    def __init__(self, repertoire: str):
+        self.repertoire = repertoire
+        os.makedirs(repertoire, exist_ok=True)
+        self._verrou = threading.Lock()
+        self._nom: Optional[str] = None
+        self._instantane: Optional[InstantaneAgregats] = None
+
+    def lire(self) -> Optional[InstantaneAgregats]:
+        """Dernier instantané publié par n'importe quel processus, ou None s'il n'y en a pas"""
+        try:
+            with open(os.path.join(self.repertoire, self.POINTEUR), encoding="utf-8") as fichier:
+                nom = fichier.read().strip()
+        except FileNotFoundError:
+            return None
+        with self._verrou:
+            if nom != self._nom:
+                try:
+                    self._instantane = InstantaneAgregats(os.path.join(self.repertoire, nom))
+                    self._nom = nom
+                except (OSError, KeyError, ValueError, pa.ArrowException) as erreur:
+                    logger.warning(f"Instantané {nom} illisible: {erreur}")
+            return self._instantane
+
+    def publier(self, cellules: Dict[Tuple[int, int, str, int], Dict[str, int]], versions: Dict[int, int],
+                filigrane: Tuple[int, int, int], version: int, calcule_le: Optional[datetime]) -> bool:
+        """Écrit les cellules si l'instantané courant ne correspond pas déjà à ce filigrane"""
+        courant = self.lire()
+        if courant is not None and courant.filigrane == tuple(filigrane):
+            return False
+        cles = list(cellules)
+        table = pa.table({
+            'annee': pa.array([cle[0] for cle in cles], pa.int16()),
+            'semaine': pa.array([cle[1] for cle in cles], pa.int32()),
+            'service': pa.array([cle[2] for cle in cles], pa.string()),
+            'indicateur': pa.array([cle[3] for cle in cles], pa.int32()),
+            'version': pa.array([versions.get(cle[1], 0) for cle in cles], pa.int32()),
+            **{mesure: pa.array([cellules[cle][mesure] for cle in cles], pa.int64())
+               for mesure in Configuration.MESURES},
+        }).replace_schema_metadata({'tloh': json.dumps({
+            'filigrane': list(filigrane), 'version': version,
+            'calcule_le': calcule_le.isoformat() if calcule_le else None,
+        })})
+
+        nom = f"bulletins_{time.time_ns()}_{os.getpid()}.feather"
+        feather.write_feather(table, os.path.join(self.repertoire, nom), compression="uncompressed")
+        pointeur = os.path.join(self.repertoire, self.POINTEUR)
+        temporaire = f"{pointeur}.{os.getpid()}.{threading.get_ident()}"
+        with open(temporaire, "w", encoding="utf-8") as fichier:
+            fichier.write(nom)
+        os.replace(temporaire, pointeur)
+        self._nettoyer()
+        return True
+
+    def _nettoyer(self):
+        """Supprime les instantanés les plus anciens ; un fichier encore projeté ailleurs est ignoré"""
+        fichiers = sorted(nom for nom in os.listdir(self.repertoire) if nom.endswith(".feather"))
+        for nom in fichiers[:-Configuration.INSTANTANE_CONSERVES]:
+            try:
+                os.remove(os.path.join(self.repertoire, nom))
+            except OSError:
+                pass
+
+@st.cache_resource
+def obtenir_partage_instantanes() -> PartageInstantanes:
+    return PartageInstantanes(Configuration.INSTANTANE_REPERTOIRE)
+
+def source_bulletins():
+    """Bulletins à lire : l'instantané partagé si son filigrane est celui de la base ; sinon le
+    planificateur local, qui publiera sa mise à jour.
+
+    Un instantané périmé n'est servi que si la base est injoignable et que le planificateur n'a
+    encore rien calculé : ce sont alors les derniers totaux connus.
+    """
+    planificateur = obtenir_planificateur()
+    if Configuration.INSTANTANE_ACTIF:
+        instantane = obtenir_partage_instantanes().lire()
+        if instantane is not None:
+            filigrane = obtenir_filigrane()
+            if instantane.filigrane == filigrane or (filigrane is None and not planificateur.pret()):
+                return instantane
+    return planificateur
+
+# ============================================
+# 4.5.2 TENDANCES HEBDOMADAIRES SOUS-ÉCHANTILLONNÉES
+# ============================================
+def lttb(x: np.ndarray, y: np.ndarray, nb_points: int) -> np.ndarray:
+    """Indices des points retenus par Largest-Triangle-Three-Buckets.
+
+    Le premier et le dernier point sont gardés ; dans chaque intervalle intermédiaire, on
+    retient le point qui forme le plus grand triangle avec le point retenu précédemment et
+    la moyenne de l'intervalle suivant, ce qui préserve les pics d'une courbe épidémique.
+    """
+    n = len(x)
+    if nb_points >= n or nb_points < 3:
+        return np.arange(n)
+    indices = np.empty(nb_points, np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    bornes = np.linspace(1, n - 1, nb_points - 1).astype(np.int64)
+    precedent = 0
+    for i in range(nb_points - 2):
+        debut, fin = bornes[i], bornes[i + 1]
+        fin_suivant = bornes[i + 2] if i + 2 < len(bornes) else n
+        moyenne_x, moyenne_y = x[fin:fin_suivant].mean(), y[fin:fin_suivant].mean()
+        aires = np.abs((x[precedent] - moyenne_x) * (y[debut:fin] - y[precedent])
+                       - (x[precedent] - x[debut:fin]) * (moyenne_y - y[precedent]))
+        precedent = debut + int(np.argmax(aires))
+        indices[i + 1] = precedent
+    return indices
+
+class SeriesTendances:
+    """Séries hebdomadaires par mesure et indicateur, tirées des cellules du planificateur.
+
+    Seules les semaines dont la version a changé depuis le dernier appel sont recopiées
+    (en pratique les plus récentes) ; les séries sous-échantillonnées sont gardées jusqu'au
+    prochain changement. Le navigateur ne reçoit jamais plus de TENDANCES_POINTS_MAX
+    points par série, quel que soit le nombre d'années couvertes.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._generation: Optional[int] = None
+        self._versions: Dict[int, int] = {}
+        # Semaine (YEARWEEK) -> (année de date_début, service, indicateur) -> mesures
+        self._semaines: Dict[int, Dict[Tuple[int, str, int], Dict[str, int]]] = {}
+        self._echantillons: Dict[tuple, pd.DataFrame] = {}
+        self.version = 0
+
+    def rafraichir(self) -> bool:
+        """Intègre les semaines modifiées ; False tant que le planificateur n'a rien calculé"""
+        planificateur = obtenir_planificateur()
+        if not planificateur.pret():
+            return False
+        with self._verrou:
+            generation, versions, modifiees, cellules = planificateur.cellules_modifiees(
+                self._generation, self._versions)
+            if generation == self._generation and not modifiees:
+                return True
+            if generation != self._generation:
+                self._semaines = {}
+            for semaine in modifiees:
+                self._semaines.pop(semaine, None)
+            for (annee, semaine, service, indicateur), valeurs in cellules.items():
+                self._semaines.setdefault(semaine, {})[(annee, service, indicateur)] = valeurs
+            self._generation, self._versions = generation, versions
+            self._echantillons = {}
+            self.version += 1
+            return True
+
+    def serie(self, mesure: str, annee=None, service=None, indicateur=None,
+              nb_points: int = Configuration.TENDANCES_POINTS_MAX) -> pd.DataFrame:
+        """Série (lundi de la semaine ISO, valeur) sous-échantillonnée à nb_points au plus.
+
+        `indicateur` restreint la série aux lignes rattachées à cet idIndicateur (0 : lignes
+        sans indicateur) ; chaque série est échantillonnée séparément.
+        """
+        cle = (mesure, annee, service, indicateur, nb_points)
+        with self._verrou:
+            if cle in self._echantillons:
+                return self._echantillons[cle]
+            totaux = {}
+            for semaine, cellules in self._semaines.items():
+                valeur = sum(valeurs[mesure] for (annee_cellule, service_cellule, indicateur_cellule), valeurs
+                             in cellules.items()
+                             if (annee is None or annee_cellule == int(annee))
+                             and (service is None or service_cellule == service)
+                             and (indicateur is None or indicateur_cellule == indicateur))
+                if annee is None or any(annee_cellule == int(annee) for annee_cellule, _, _ in cellules):
+                    totaux[semaine] = valeur
+            if not totaux:
+                cadre = pd.DataFrame({'semaine': pd.Series(dtype='datetime64[ns]'), 'valeur': pd.Series(dtype=np.int64)})
+            else:
+                lundis = np.array([date.fromisocalendar(semaine // 100, semaine % 100, 1) for semaine in totaux],
+                                  dtype='datetime64[D]')
+                # Semaines sans déclaration comprises : une série continue, à zéro
+                axe = np.arange(lundis.min(), lundis.max() + 7, 7)
+                valeurs = np.zeros(len(axe), np.int64)
+                valeurs[(lundis - axe[0]).astype(np.int64) // 7] = list(totaux.values())
+                retenus = lttb(axe.astype(np.int64).astype(float), valeurs.astype(float), nb_points)
+                cadre = pd.DataFrame({'semaine': axe[retenus], 'valeur': valeurs[retenus]})
+            self._echantillons[cle] = cadre
+            return cadre
+
+@st.cache_resource
+def obtenir_series_tendances() -> SeriesTendances:
+    return SeriesTendances()
+
+# ============================================
+# 4.5.3 ALERTES ÉPIDÉMIQUES
+# ============================================
+class MoteurAlertes:
+    """Seuils épidémiques des maladies endémiques, tenus à jour ligne à ligne.
+
+    Pour chaque série (indicateur, service), le moteur garde les cas de chaque semaine ISO
+    et, par numéro de semaine, la somme et la somme des carrés des cas des
+    ALERTES_ANNEES_REFERENCE années précédentes. Le seuil d'une semaine (moyenne + k écarts-
+    types) se calcule donc en O(1) ; une nouvelle ligne ne met à jour que sa semaine et n'est
+    évaluée que là. L'indicateur 0 regroupe toutes les maladies endémiques, y compris les
+    lignes antérieures au suivi des indicateurs. Le nombre d'années de référence est propre à
+    chaque série, depuis sa première année de cas : une maladie suivie depuis peu n'a pas de
+    seuil. Une correction ou un changement d'année provoque une reconstruction complète, vectorisée.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._generation: Optional[int] = None
+        self._version_corrections: Optional[int] = None
+        self._nb_lignes = 0
+        self._annee: Optional[int] = None
+        # (indicateur, service) -> première année ISO avec des cas
+        self._premieres_annees: Dict[Tuple[int, str], int] = {}
+        # (indicateur, service, année ISO, semaine) -> cas
+        self._cas: Dict[Tuple[int, str, int, int], int] = {}
+        # (indicateur, service, semaine) -> [somme, somme des carrés] sur les années de référence
+        self._sommes: Dict[Tuple[int, str, int], List[int]] = {}
+        self._alertes: Dict[Tuple[int, str, int], Dict[str, Any]] = {}
+
+    @staticmethod
+    def pret() -> bool:
+        """Faux tant que le planificateur charge la table compacte au démarrage : on n'attend pas"""
+        return not Configuration.PLANIFICATEUR_ACTIF or obtenir_planificateur().pret()
+
+    def rafraichir(self) -> Optional[List[Dict[str, Any]]]:
+        """Intègre les nouvelles lignes de la table compacte ; retourne les alertes déclenchées
+        par ces lignes, ou None si la table n'est pas disponible"""
+        with self._verrou:
+            table = obtenir_table_enregistrements()
+            if not table.rafraichir():
+                return None
+            instantane = table.instantane()
+            filigrane = table.filigrane()
+            annee = date.today().isocalendar()[0]
+
+            if (instantane['generation'], filigrane[1], annee) != \
+                    (self._generation, self._version_corrections, self._annee):
+                self._reinitialiser(annee)
+                self._generation, self._version_corrections = instantane['generation'], filigrane[1]
+                debut = 0
+            elif instantane['nb'] == self._nb_lignes:
+                return []
+            else:
+                debut = self._nb_lignes
+
+            a_evaluer = set()
+            series_etendues = set()
+            for (indicateur, service, annee_iso, semaine), cas in self._semaines(instantane, debut).items():
+                if self._ajouter(indicateur, service, annee_iso, semaine, cas):
+                    series_etendues.add((indicateur, service))
+                a_evaluer.add((indicateur, service, semaine))
+            self._nb_lignes = instantane['nb']
+            if debut == 0 or series_etendues:
+                # Le nombre d'années de référence de ces séries a changé : toutes leurs semaines de l'année
+                # sont réévaluées
+                a_evaluer |= {(indicateur, service, semaine) for indicateur, service, annee_iso, semaine in self._cas
+                              if annee_iso == self._annee and (debut == 0 or (indicateur, service) in series_etendues)}
+            declenchees = [alerte for alerte in map(self._evaluer, a_evaluer) if alerte]
+            return [] if debut == 0 else declenchees
+
+    def _reinitialiser(self, annee: int):
+        self._annee = annee
+        self._premieres_annees = {}
+        self._cas, self._sommes, self._alertes = {}, {}, {}
+
+    @staticmethod
+    def _semaines(instantane: Dict[str, Any], debut: int) -> Dict[Tuple[int, str, int, int], int]:
+        """Cas des lignes endémiques à partir de l'indice `debut`, par (indicateur, service, année ISO, semaine)"""
+        masque = (instantane['type'][debut:] == TableEnregistrements.TYPE_ENDEMIQUE) & instantane['actif'][debut:]
+        cadre = pd.DataFrame({
+            'indicateur': instantane['indicateur'][debut:][masque],
+            'service': instantane['service'][debut:][masque],
+            'semaine': instantane['semaine'][debut:][masque],
+            'cas': instantane['mesures'][debut:, Configuration.MESURES.index('cas')][masque],
+        })
+        cadre = cadre[cadre['cas'] > 0]
+        # Chaque ligne compte pour son indicateur et pour l'ensemble des maladies endémiques (0)
+        cadre = pd.concat([cadre[cadre['indicateur'] != 0], cadre.assign(indicateur=0)])
+        groupes = cadre.groupby(['indicateur', 'service', 'semaine'], sort=False)['cas'].sum()
+        return {
+            (int(indicateur), instantane['services'][service], int(semaine) // 100, int(semaine) % 100): int(cas)
+            for (indicateur, service, semaine), cas in groupes.items()
+        }
+
+    def _ajouter(self, indicateur: int, service: str, annee: int, semaine: int, cas: int) -> bool:
+        """Ajoute des cas à une semaine ; True si la première année de la série a reculé"""
+        cle = (indicateur, service, annee, semaine)
+        ancien = self._cas.get(cle, 0)
+        nouveau = ancien + cas
+        self._cas[cle] = nouveau
+        premiere_annee = self._premieres_annees.get((indicateur, service))
+        recul = premiere_annee is None or annee < premiere_annee
+        if recul:
+            self._premieres_annees[(indicateur, service)] = annee
+        if self._annee - Configuration.ALERTES_ANNEES_REFERENCE <= annee < self._annee:
+            sommes = self._sommes.setdefault((indicateur, service, semaine), [0, 0])
+            sommes[0] += nouveau - ancien
+            sommes[1] += nouveau * nouveau - ancien * ancien
+        return recul
+
+    def _evaluer(self, serie: Tuple[int, str, int]) -> Optional[Dict[str, Any]]:
+        """Compare les cas de la semaine de l'année en cours à son seuil ; O(1)"""
+        indicateur, service, semaine = serie
+        cas = self._cas.get((indicateur, service, self._annee, semaine), 0)
+        nb_annees = self._annee - max(self._annee - Configuration.ALERTES_ANNEES_REFERENCE,
+                                      self._premieres_annees.get((indicateur, service), self._annee))
+        self._alertes.pop(serie, None)
+        if nb_annees < Configuration.ALERTES_ANNEES_MIN or cas < Configuration.ALERTES_CAS_MIN:
+            return None
+        somme, somme_carres = self._sommes.get(serie, (0, 0))
+        moyenne = somme / nb_annees
+        ecart_type = max(0.0, (somme_carres - nb_annees * moyenne * moyenne) / (nb_annees - 1)) ** 0.5
+        seuil = moyenne + Configuration.ALERTES_ECARTS * ecart_type
+        if cas <= seuil:
+            return None
+        alerte = {'indicateur': indicateur, 'service': service, 'annee': self._annee, 'semaine': semaine,
+                  'cas': cas, 'moyenne': round(moyenne, 1), 'seuil': round(seuil, 1)}
+        self._alertes[serie] = alerte
+        return alerte
+
+    def alertes_actives(self) -> List[Dict[str, Any]]:
+        """Alertes des ALERTES_SEMAINES_AFFICHEES dernières semaines, les plus fortes en premier"""
+        # Couples (année ISO, semaine) : le même numéro de semaine d'une autre année n'est pas retenu
+        aujourd_hui = date.today()
+        semaines = {tuple((aujourd_hui - timedelta(weeks=recul)).isocalendar()[:2])
+                    for recul in range(Configuration.ALERTES_SEMAINES_AFFICHEES)}
+        with self._verrou:
+            alertes = [alerte for alerte in self._alertes.values()
+                       if (alerte['annee'], alerte['semaine']) in semaines]
+        return sorted(alertes, key=lambda alerte: alerte['cas'] / max(alerte['seuil'], 1), reverse=True)
+
+@st.cache_resource
+def obtenir_moteur_alertes() -> MoteurAlertes:
+    return MoteurAlertes()
+
+def libeller_alertes(alertes: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Alertes avec le nom de l'indicateur, pour l'affichage"""
+    noms = {indicateur['idIndicateur']: indicateur['nom']
+            for indicateur in lister_indicateurs("Maladie endemique") or []}
+    noms[0] = "Toutes maladies endémiques"
+    return pd.DataFrame([
+        {**alerte, 'indicateur': noms.get(alerte['indicateur'], f"Indicateur {alerte['indicateur']}")}
+        for alerte in alertes
+    ])
+
+# ============================================
+# 4.5.4 COMPARAISON D'UNE ANNÉE SUR L'AUTRE
+# ============================================
+class ComparaisonAnnuelle:
+    """Tableau croisé indicateur × semaine épidémiologique × année ISO d'une mesure.
+
+    Une seule agrégation groupée (année, indicateur, semaine) sur la table compacte produit
+    les colonnes de toutes les années, gardées par (type, mesure, service). Les lignes
+    ajoutées depuis ne font recalculer que les années qu'elles touchent, en pratique l'année
+    en cours ; une correction ou un rechargement de la table recalcule tout. Variations et
+    cumuls depuis le début de l'année sont calculés sur le tableau assemblé, par colonnes
+    entières. Comme pour les alertes, l'indicateur 0 regroupe toutes les lignes du type, y
+    compris celles antérieures au suivi des indicateurs.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._cle: Optional[Tuple[int, int]] = None
+        # (type, mesure, service) -> (lignes intégrées, {année ISO: série (indicateur, semaine) -> total})
+        self._colonnes: Dict[Tuple[str, str, Optional[str]], Tuple[int, Dict[int, pd.Series]]] = {}
+
+    @staticmethod
+    def pret() -> bool:
+        """Faux tant que le planificateur charge la table compacte au démarrage : on n'attend pas"""
+        return not Configuration.PLANIFICATEUR_ACTIF or obtenir_planificateur().pret()
+
+    @staticmethod
+    def _grouper(instantane: Dict[str, Any], lignes: np.ndarray, mesure: str) -> Dict[int, pd.Series]:
+        """Totaux de la mesure par (indicateur, semaine), pour chaque année ISO des lignes données"""
+        semaines = instantane['semaine'][lignes]
+        cadre = pd.DataFrame({
+            'annee': semaines // 100,
+            'indicateur': instantane['indicateur'][lignes],
+            'semaine': semaines % 100,
+            'valeur': instantane['mesures'][lignes, Configuration.MESURES.index(mesure)].astype(np.int64),
+        })
+        cadre = pd.concat([cadre[cadre['indicateur'] != 0], cadre.assign(indicateur=0)])
+        groupes = cadre.groupby(['annee', 'indicateur', 'semaine'])['valeur'].sum()
+        return {int(annee): serie.droplevel('annee') for annee, serie in groupes.groupby(level='annee')}
+
+    def _colonnes_annees(self, type_indicateur: str, mesure: str, service=None) -> Optional[Dict[int, pd.Series]]:
+        with self._verrou:
+            table = obtenir_table_enregistrements()
+            if not table.rafraichir():
+                return None
+            instantane = table.instantane()
+            cle = (instantane['generation'], table.filigrane()[1])
+            if cle != self._cle:
+                self._colonnes = {}
+                self._cle = cle
+
+            entree = self._colonnes.get((type_indicateur, mesure, service))
+            if entree is not None and entree[0] == instantane['nb']:
+                return entree[1]
+            nb_lignes, colonnes = entree or (0, {})
+            masque = instantane['actif'] & \
+                (instantane['type'] == Configuration.TYPES_INDICATEUR.index(type_indicateur))
+            if service is not None:
+                code = instantane['services'].index(service) if service in instantane['services'] else -1
+                masque &= instantane['service'] == code
+            if nb_lignes:
+                # Seules les années des lignes ajoutées sont recalculées, sur toutes leurs lignes
+                annees = np.unique(instantane['semaine'][nb_lignes:] // 100)
+                masque &= np.isin(instantane['semaine'] // 100, annees)
+                colonnes = {annee: serie for annee, serie in colonnes.items() if annee not in annees}
+            colonnes = {**colonnes, **self._grouper(instantane, np.flatnonzero(masque), mesure)}
+            self._colonnes[(type_indicateur, mesure, service)] = (instantane['nb'], colonnes)
+            return colonnes
+
+    def tableau(self, type_indicateur: str, mesure: str, service=None, annee_reference: Optional[int] = None,
+                semaine: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """Une colonne par année, variation par rapport à l'année précédente et cumuls depuis la
+        semaine 1, indexés par (indicateur, semaine) ; None si la table n'est pas disponible"""
+        colonnes = self._colonnes_annees(type_indicateur, mesure, service)
+        if colonnes is None:
+            return None
+        annee_reference = annee_reference or date.today().isocalendar()[0]
+        precedente = annee_reference - 1
+        annees = range(annee_reference - max(2, Configuration.COMPARAISON_ANNEES) + 1, annee_reference + 1)
+        vide = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_arrays([[], []], names=['indicateur', 'semaine']))
+        cadre = pd.concat({str(annee): colonnes.get(annee, vide) for annee in annees}, axis=1)
+        cadre = cadre.fillna(0).astype(np.int64).sort_index()
+        if cadre.empty:
+            return cadre
+
+        cumuls = cadre[[str(precedente), str(annee_reference)]].groupby(level='indicateur').cumsum()
+        cadre['variation_%'] = self._variation(cadre[str(annee_reference)], cadre[str(precedente)])
+        cadre[f'cumul_{precedente}'] = cumuls[str(precedente)]
+        cadre[f'cumul_{annee_reference}'] = cumuls[str(annee_reference)]
+        cadre['variation_cumul_%'] = self._variation(cumuls[str(annee_reference)], cumuls[str(precedente)])
+        if semaine is not None:
+            cadre = cadre[cadre.index.get_level_values('semaine') == semaine]
+        return cadre
+
+    @staticmethod
+    def _variation(valeurs: pd.Series, reference: pd.Series) -> pd.Series:
+        """Variation en % ; indéfinie (NaN) lorsque la référence est nulle"""
+        return ((valeurs - reference) / reference.where(reference != 0) * 100).round(1)
+
+@st.cache_resource
+def obtenir_comparaison_annuelle() -> ComparaisonAnnuelle:
+    return ComparaisonAnnuelle()
+
+# ============================================
+# 4.6 BOÎTE D'ENVOI ET FLUX VERS LES SYSTÈMES NATIONAUX
+# ============================================
+CREATION_BOITE_ENVOI = """
+    CREATE TABLE IF NOT EXISTS BoiteEnvoi (
+        idEvenement BIGINT AUTO_INCREMENT PRIMARY KEY,
+        type_evenement VARCHAR(32) NOT NULL,
+        numéro_TLOH VARCHAR(64) NOT NULL,
+        periode CHAR(8) NOT NULL,
+        charge JSON NOT NULL,
+        date_creation DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        lot VARCHAR(64) NULL,
+        proprietaire VARCHAR(64) NULL,
+        bail_jusqu_au DATETIME NULL,
+        livre_le DATETIME NULL,
+        INDEX idx_boite_envoi_attente (lot, idEvenement),
+        INDEX idx_boite_envoi_livraison (livre_le, lot)
+    )
+"""
+
+COLONNES_FLUX = ['type_evenement', 'operation', 'idEnregistrement', 'numéro_TLOH', 'service', 'date_début', 'date_fin',
+                 'indicateur', 'type'] + Configuration.MESURES
+
+def periode_iso(jour: date) -> str:
+    """Période de rapportage d'une date : semaine ISO, ex. 2024-S10"""
+    annee, semaine, _ = jour.isocalendar()
+    return f"{annee}-S{semaine:02d}"
+
+def _parametres_enregistrement(numero_tloh: str, service: str, date_debut: date, date_fin: date,
+                               mesures: Dict[str, int]) -> tuple:
+    """Paramètres de 'insertion_enregistrement' dans l'ordre des colonnes"""
+    return (numero_tloh, date_debut, date_fin, mesures['institution'], mesures['communauté'],
+            mesures['notifié'], mesures['décès'], mesures['cas'], mesures['isolé'], service)
+
+def _ajouter_evenement(connexion, type_evenement: str, numero_tloh: str, service: str,
+                       date_debut: date, date_fin: date, lignes_evenement: List[Dict[str, Any]]):
+    """Ajoute l'événement sortant dans la transaction en cours"""
+    if not Configuration.DISTRIBUTION_ACTIVE:
+        return
+    charge = {'numéro_TLOH': numero_tloh, 'service': service, 'date_début': date_debut.isoformat(),
+              'date_fin': date_fin.isoformat(), 'lignes': lignes_evenement}
+    obtenir_registre().executer_dans(connexion, 'insertion_evenement_sortant', (
+        type_evenement, numero_tloh, periode_iso(date_debut), json.dumps(charge, ensure_ascii=False)
+    ))
+
+def enregistrer_tloh(numero_tloh: str, service: str, date_debut: date, date_fin: date,
+                     lignes: List[Tuple[int, str, str, Dict[str, int]]]) -> int:
+    """Insère les lignes d'un TLOH et son événement sortant dans une seule transaction.
+
+    `lignes` contient des quadruplets (idIndicateur, nom de l'indicateur, type, mesures
+    renseignées). Les erreurs sont propagées : en cas d'échec, rien n'est enregistré. Une
+    transaction annulée par un interblocage est rejouée en entier.
+    """
+    registre = obtenir_registre()
+
+    def ecrire():
+        lignes_evenement = []
+        with transaction() as connexion:
+            registre.executer_dans(connexion, 'increment_sequence_insertions')
+            for id_indicateur, indicateur, type_indicateur, valeurs in lignes:
+                mesures = {mesure: valeurs.get(mesure, 0) for mesure in Configuration.MESURES}
+                id_enregistrement = registre.inserer_dans(connexion, 'insertion_enregistrement',
+                                                          _parametres_enregistrement(numero_tloh, service, date_debut,
+                                                                                     date_fin, mesures))
+                registre.executer_dans(connexion, 'insertion_indicateur_enregistrement',
+                                       (id_enregistrement, id_indicateur))
+                lignes_evenement.append({'operation': 'ajout', 'idEnregistrement': id_enregistrement,
+                                         'indicateur': indicateur, 'type': type_indicateur, **mesures})
+            _ajouter_evenement(connexion, 'creation', numero_tloh, service, date_debut, date_fin, lignes_evenement)
+        return len(lignes_evenement)
+
+    return reprendre(ecrire, ecriture=True)
+
+# ============================================
+# 4.6.1 CORRECTION D'UN TLOH EXISTANT
+# ============================================
+def lire_tloh(numero_tloh: str) -> Optional[List[Dict[str, Any]]]:
+    """Lignes enregistrées d'un TLOH avec leur indicateur (None pour les lignes antérieures au lien)"""
+    return executer_requete_nommee('lecture_tloh', (numero_tloh,), fetch=True)
+
+def comparer_tloh(stockees: Dict[int, Dict[str, Any]], saisies: Dict[int, Tuple[str, str, Dict[str, int]]],
+                  entete: Tuple[str, date, date]) -> Dict[str, list]:
+    """Différence ligne à ligne entre un TLOH enregistré et le formulaire.
+
+    `stockees` associe l'idIndicateur à sa ligne lue par lire_tloh, `saisies` à (nom, type,
+    mesures) pour chaque indicateur affiché, zéros compris, et `entete` vaut (service, début,
+    fin). Un indicateur nouvellement renseigné est un ajout, un indicateur remis à zéro une
+    suppression ; une ligne n'est modifiée que si une mesure ou l'en-tête change.
+    """
+    differences = {'ajouts': [], 'modifications': [], 'suppressions': []}
+    for id_indicateur, (nom, type_indicateur, valeurs) in saisies.items():
+        mesures = {mesure: int(valeurs.get(mesure, 0)) for mesure in Configuration.MESURES}
+        ligne = stockees.get(id_indicateur)
+        if ligne is None:
+            if any(mesures.values()):
+                differences['ajouts'].append((id_indicateur, nom, type_indicateur, mesures))
+        elif not any(mesures.values()):
+            differences['suppressions'].append((ligne, nom, type_indicateur))
+        elif any(int(ligne[mesure]) != mesures[mesure] for mesure in Configuration.MESURES) or \
+                (ligne['service'], ligne['date_début'], ligne['date_fin']) != entete:
+            differences['modifications'].append((ligne, nom, type_indicateur, mesures))
+    return differences
+
+def corriger_tloh(numero_tloh: str, service: str, date_debut: date, date_fin: date,
+                  differences: Dict[str, list]) -> int:
+    """Applique une différence calculée par comparer_tloh dans une seule transaction.
+
+    Seules les lignes changées sont écrites ; la version des corrections est incrémentée
+    dans la même transaction, puis la correction est reportée par différence dans les
+    agrégats en mémoire. Retourne la nouvelle version. Une transaction annulée par un
+    interblocage est rejouée en entier.
+    """
+    registre = obtenir_registre()
+
+    def ecrire():
+        lignes_evenement = []
+        modifications = []
+        suppressions = []
+        with transaction() as connexion:
+            if differences['ajouts']:
+                registre.executer_dans(connexion, 'increment_sequence_insertions')
+            for id_indicateur, nom, type_indicateur, mesures in differences['ajouts']:
+                id_enregistrement = registre.inserer_dans(connexion, 'insertion_enregistrement',
+                                                          _parametres_enregistrement(numero_tloh, service, date_debut,
+                                                                                     date_fin, mesures))
+                registre.executer_dans(connexion, 'insertion_indicateur_enregistrement',
+                                       (id_enregistrement, id_indicateur))
+                lignes_evenement.append({'operation': 'ajout', 'idEnregistrement': id_enregistrement,
+                                         'indicateur': nom, 'type': type_indicateur, **mesures})
+            for ligne, nom, type_indicateur, mesures in differences['modifications']:
+                registre.executer_dans(connexion, 'modification_enregistrement',
+                                       _parametres_enregistrement(numero_tloh, service, date_debut, date_fin,
+                                                                  mesures)[1:] + (ligne['idEnregistrement'],))
+                modifications.append((ligne['idEnregistrement'], numero_tloh, date_debut, date_fin, service,
+                                      *(mesures[mesure] for mesure in Configuration.MESURES), ligne['idIndicateur']))
+                lignes_evenement.append({'operation': 'modification', 'idEnregistrement': ligne['idEnregistrement'],
+                                         'indicateur': nom, 'type': type_indicateur, **mesures})
+            for ligne, nom, type_indicateur in differences['suppressions']:
+                registre.executer_dans(connexion, 'suppression_indicateur_enregistrement', (ligne['idEnregistrement'],))
+                registre.executer_dans(connexion, 'suppression_enregistrement', (ligne['idEnregistrement'],))
+                suppressions.append(ligne['idEnregistrement'])
+                lignes_evenement.append({'operation': 'suppression', 'idEnregistrement': ligne['idEnregistrement'],
+                                         'indicateur': nom, 'type': type_indicateur,
+                                         **dict.fromkeys(Configuration.MESURES, 0)})
+            # LAST_INSERT_ID(expr) renvoie la nouvelle version sans relecture
+            version = registre.inserer_dans(connexion, 'increment_version_corrections')
+            _ajouter_evenement(connexion, 'correction', numero_tloh, service, date_debut, date_fin, lignes_evenement)
+        return version, modifications, suppressions
+
+    version, modifications, suppressions = reprendre(ecrire, ecriture=True)
+
+    # Après validation seulement : les agrégats ne voient jamais une correction annulée
+    if Configuration.PLANIFICATEUR_ACTIF:
+        obtenir_planificateur().appliquer_corrections(modifications, suppressions, version)
+    else:
+        obtenir_table_enregistrements().appliquer_corrections(modifications, suppressions, version)
+    return version
+
+class DestinationRepertoire:
+    """Dépose chaque lot dans un répertoire local (ou partagé) ; un lot déjà présent n'est pas réécrit"""
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        os.makedirs(chemin, exist_ok=True)
+
+    def livrer(self, lot: str, nom_fichier: str, contenu: bytes):
+        cible = os.path.join(self.chemin, nom_fichier)
+        if os.path.exists(cible):
+            return
+        # Propre au processus et au thread : deux livraisons simultanées du même lot ne se mélangent pas
+        temporaire = f"{cible}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporaire, "wb") as fichier:
+            fichier.write(contenu)
+        os.replace(temporaire, cible)
+
+class DestinationHTTP:
+    """Envoie chaque lot par POST ; l'en-tête Idempotency-Key permet au récepteur d'ignorer un doublon"""
+
+    def __init__(self, url: str, delai: float = 30):
+        self.url = url
+        self.delai = delai
+
+    def livrer(self, lot: str, nom_fichier: str, contenu: bytes):
+        type_contenu = "text/csv" if nom_fichier.endswith(".csv.gz") else "application/x-ndjson"
+        requete = urllib.request.Request(self.url, data=contenu, method="POST", headers={
+            "Content-Type": type_contenu,
+            "Content-Encoding": "gzip",
+            "Idempotency-Key": lot,
+            "X-Nom-Fichier": nom_fichier,
+        })
+        with urllib.request.urlopen(requete, timeout=self.delai):
+            pass
+
+DESTINATIONS = {
+    'repertoire': lambda: DestinationRepertoire(Configuration.DISTRIBUTION_REPERTOIRE),
+    'http': lambda: DestinationHTTP(Configuration.DISTRIBUTION_URL),
+}
+
+class DistributeurFlux:
+    """Livre en arrière-plan les événements de la boîte d'envoi, par lots compressés et par période.
+
+    L'identifiant d'un lot dérive de sa période et de ses premier et dernier événements ; il est
+    enregistré dans BoiteEnvoi avant la livraison, avec le processus propriétaire et la fin de son
+    bail (DISTRIBUTION_BAIL). Un verrou MySQL (GET_LOCK) garantit qu'un seul processus Streamlit
+    attribue des lots à la fois ; un lot n'est relivré que par son propriétaire, ou par un autre
+    processus une fois le bail expiré. La livraison reste « au moins une fois » : si le processus
+    s'arrête entre la livraison et le marquage, ou si son bail expire en cours de livraison, le
+    même lot est relivré sous le même identifiant et la destination l'ignore.
+    """
+
+    def __init__(self, destination):
+        self.destination = destination
+        self.proprietaire = f"{socket.gethostname()[:40]}:{os.getpid()}"
+        self._arret = threading.Event()
+        self.metriques = {
+            'evenements_livres': 0, 'lots_livres': 0, 'echecs': 0,
+            'debit_evenements_s': 0.0, 'en_attente': None, 'retard_s': None, 'derniere_livraison': None,
+        }
+
+    def demarrer(self):
+        threading.Thread(target=self._boucle, name="tloh-distributeur", daemon=True).start()
+
+    def arreter(self):
+        self._arret.set()
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            try:
+                self.distribuer()
+            except Exception as erreur:
+                logger.error(f"Erreur du distributeur de flux: {erreur}")
+            self._arret.wait(Configuration.DISTRIBUTION_INTERVALLE)
+
+    def distribuer(self) -> int:
+        """Un cycle de distribution ; retourne le nombre d'événements livrés.
+
+        La connexion (et sa place dans la classe de charge) est rendue avant la livraison : les
+        attentes entre deux essais peuvent durer plusieurs minutes.
+        """
+        lots = self._attribuer_lots()
+        if lots is None:
+            return 0
+
+        debut = time.perf_counter()
+        livres = []
+        for lot, evenements in lots.items():
+            nom_fichier = f"{lot}.{Configuration.DISTRIBUTION_FORMAT}.gz"
+            if self._livrer_avec_reprises(lot, nom_fichier, self._encoder(evenements)):
+                livres.append(lot)
+            else:
+                self.metriques['echecs'] += 1
+        duree = time.perf_counter() - debut
+
+        with obtenir_connexion_db("fond") as connexion:
+            curseur = connexion.cursor(dictionary=True)
+            try:
+                if livres:
+                    curseur.execute(
+                        f"UPDATE BoiteEnvoi SET livre_le = NOW() "
+                        f"WHERE livre_le IS NULL AND lot IN ({', '.join(['%s'] * len(livres))})",
+                        tuple(livres)
+                    )
+                    connexion.commit()
+                self._mesurer_retard(curseur)
+            finally:
+                curseur.close()
+
+        nb_livres = sum(len(lots[lot]) for lot in livres)
+        if nb_livres:
+            self.metriques['evenements_livres'] += nb_livres
+            self.metriques['lots_livres'] += len(livres)
+            self.metriques['debit_evenements_s'] = round(nb_livres / duree, 1)
+            self.metriques['derniere_livraison'] = datetime.now()
+        return nb_livres
+
+    def _attribuer_lots(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Lots à livrer, par identifiant ; None si un autre processus tient le verrou.
+
+        Les lots attribués mais jamais marqués livrés passent en premier, sous leur identifiant
+        d'origine : ceux de ce processus (échec d'un cycle précédent) et ceux dont le bail a expiré
+        (processus arrêté). Leur bail est alors renouvelé au nom de ce processus. Sinon les
+        nouveaux événements sont répartis en lots et l'attribution est validée avant toute livraison.
+        """
+        with obtenir_connexion_db("fond") as connexion:
+            curseur = connexion.cursor(dictionary=True)
+            try:
+                curseur.execute("SELECT GET_LOCK('tloh_distribution', 0) AS verrou")
+                if not curseur.fetchone()['verrou']:
+                    return None
+                try:
+                    lots: Dict[str, List[Dict[str, Any]]] = {}
+                    curseur.execute(
+                        """
+                        SELECT DISTINCT lot FROM BoiteEnvoi
+                        WHERE livre_le IS NULL AND lot IS NOT NULL
+                          AND (proprietaire = %s OR bail_jusqu_au IS NULL OR bail_jusqu_au < NOW())
+                        """,
+                        (self.proprietaire,)
+                    )
+                    en_suspens = [ligne['lot'] for ligne in curseur.fetchall()]
+                    if en_suspens:
+                        curseur.execute(
+                            f"UPDATE BoiteEnvoi SET proprietaire = %s, "
+                            f"bail_jusqu_au = NOW() + INTERVAL %s SECOND "
+                            f"WHERE lot IN ({', '.join(['%s'] * len(en_suspens))})",
+                            (self.proprietaire, Configuration.DISTRIBUTION_BAIL, *en_suspens)
+                        )
+                        connexion.commit()
+                        curseur.execute(
+                            f"""
+                            SELECT idEvenement, type_evenement, lot, charge
+                            FROM BoiteEnvoi
+                            WHERE lot IN ({', '.join(['%s'] * len(en_suspens))})
+                            ORDER BY idEvenement
+                            """,
+                            tuple(en_suspens)
+                        )
+                        for evenement in curseur.fetchall():
+                            lots.setdefault(evenement['lot'], []).append(evenement)
+                        return lots
+
+                    curseur.execute(
+                        """
+                        SELECT idEvenement, type_evenement, periode, charge
+                        FROM BoiteEnvoi
+                        WHERE lot IS NULL
+                        ORDER BY idEvenement
+                        LIMIT %s
+                        """,
+                        (Configuration.DISTRIBUTION_TAILLE_LOT,)
+                    )
+                    par_periode: Dict[str, List[Dict[str, Any]]] = {}
+                    for evenement in curseur.fetchall():
+                        par_periode.setdefault(evenement['periode'], []).append(evenement)
+
+                    for periode, evenements in par_periode.items():
+                        identifiants = [evenement['idEvenement'] for evenement in evenements]
+                        lot = f"tloh_{periode}_{identifiants[0]:010d}-{identifiants[-1]:010d}"
+                        curseur.execute(
+                            f"UPDATE BoiteEnvoi SET lot = %s, proprietaire = %s, "
+                            f"bail_jusqu_au = NOW() + INTERVAL %s SECOND "
+                            f"WHERE idEvenement IN ({', '.join(['%s'] * len(identifiants))})",
+                            (lot, self.proprietaire, Configuration.DISTRIBUTION_BAIL, *identifiants)
+                        )
+                        lots[lot] = evenements
+                    connexion.commit()
+                    return lots
+                finally:
+                    curseur.execute("DO RELEASE_LOCK('tloh_distribution')")
+            finally:
+                curseur.close()
+
+    @staticmethod
+    def _encoder(evenements: List[Dict[str, Any]]) -> bytes:
+        """Une ligne par Enregistrement, en JSON lines ou CSV, compressée en gzip"""
+        lignes = []
+        for evenement in evenements:
+            charge = json.loads(evenement['charge'])
+            entete = {cle: valeur for cle, valeur in charge.items() if cle != 'lignes'}
+            for ligne in charge['lignes']:
+                lignes.append({'type_evenement': evenement['type_evenement'], **entete, **ligne})
+
+        if Configuration.DISTRIBUTION_FORMAT == "csv":
+            tampon = io.StringIO()
+            ecrivain = csv.DictWriter(tampon, fieldnames=COLONNES_FLUX)
+            ecrivain.writeheader()
+            ecrivain.writerows(lignes)
+            texte = tampon.getvalue()
+        else:
+            texte = "".join(json.dumps(ligne, ensure_ascii=False) + "\n" for ligne in lignes)
+        # mtime fixé : un lot relivré est identique octet pour octet
+        return gzip.compress(texte.encode("utf-8"), mtime=0)
+
+    def _livrer_avec_reprises(self, lot: str, nom_fichier: str, contenu: bytes) -> bool:
+        for tentative in range(Configuration.DISTRIBUTION_TENTATIVES):
+            try:
+                self.destination.livrer(lot, nom_fichier, contenu)
+                return True
+            except Exception as erreur:
+                attente = min(60, 2 ** tentative) * (0.5 + random.random())
+                logger.warning(f"Livraison du lot {lot} échouée ({erreur}), nouvel essai dans {attente:.1f} s")
+                if self._arret.wait(attente):
+                    return False
+        return False
+
+    def _mesurer_retard(self, curseur):
+        curseur.execute(
+            "SELECT COUNT(*) AS en_attente, MIN(date_creation) AS plus_ancien FROM BoiteEnvoi WHERE livre_le IS NULL"
+        )
+        etat = curseur.fetchone()
+        self.metriques['en_attente'] = int(etat['en_attente'])
+        self.metriques['retard_s'] = (datetime.now() - etat['plus_ancien']).total_seconds() \
+            if etat['plus_ancien'] else 0
+
+@st.cache_resource
+def demarrer_distributeur() -> DistributeurFlux:
+    """Distributeur unique par processus, démarré une seule fois"""
+    distributeur = DistributeurFlux(DESTINATIONS[Configuration.DISTRIBUTION_DESTINATION]())
+    distributeur.demarrer()
+    return distributeur
+
 # ============================================
-# 4. CONNEXION À LA BASE DE DONNÉES MYSQL
+# 4.7 FÉDÉRATION DES BASES DE SITES
 # ============================================
-@contextmanager
-def obtenir_connexion_db():
-    """Contexte pour gérer les connexions à la base de données"""
-    connexion = None
-    try:
-        connexion = mysql.connector.connect(**Configuration.CONFIG_DB)
-        yield connexion
-    except Error as erreur:
-        logger.error(f"Erreur de connexion à la base de données: {erreur}")
-        st.error(f"Erreur de connexion à la base de données: {erreur}")
-        raise
-    finally:
-        if connexion and connexion.is_connected():
-            connexion.close()
+class SiteFedere:
+    """Base d'un hôpital de district, interrogée avec son propre petit pool de connexions"""
 
-def executer_requete(requete, parametres=None, fetch=False):
-    """Exécute une requête SQL et retourne les résultats si nécessaire"""
-    with obtenir_connexion_db() as connexion:
-        curseur = connexion.cursor(dictionary=True)
+    def __init__(self, nom: str, config: Dict[str, Any]):
+        self.nom = nom
+        self.config = config
+        self._pool = None
+        self._verrou = threading.Lock()
+        self._places = threading.BoundedSemaphore(Configuration.FEDERATION_CONNEXIONS_PAR_SITE)
+
+    def _obtenir_pool(self) -> pooling.MySQLConnectionPool:
+        # Créé à la première requête : un site injoignable ne bloque pas le démarrage
+        with self._verrou:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name="tloh_site_" + hashlib.md5(self.nom.encode("utf-8")).hexdigest()[:12],
+                    pool_size=Configuration.FEDERATION_CONNEXIONS_PAR_SITE,
+                    connection_timeout=Configuration.FEDERATION_DELAI,
+                    **self.config
+                )
+            return self._pool
+
+    def agreger(self, clause_where: str, parametres: List[Any]) -> Dict[str, Any]:
+        """Sommes des mesures et nombre de lignes du site ; les erreurs sont propagées"""
+        debut = time.perf_counter()
+        if not self._places.acquire(timeout=Configuration.FEDERATION_DELAI):
+            raise PoolError("Aucune connexion disponible pour ce site")
         try:
-            curseur.execute(requete, parametres or ())
-            if fetch:
-                resultat = curseur.fetchall()
+            connexion = self._obtenir_pool().get_connection()
+            try:
+                curseur = connexion.cursor(dictionary=True)
+                colonnes = ", ".join(f"IFNULL(SUM({mesure}), 0) AS {mesure}" for mesure in Configuration.MESURES)
+                curseur.execute(
+                    f"""
+                    SELECT /*+ MAX_EXECUTION_TIME({int(Configuration.FEDERATION_DELAI * 1000)}) */
+                        {colonnes}, COUNT(*) AS nb_lignes
+                    FROM Enregistrement
+                    WHERE {clause_where}
+                    """,
+                    tuple(parametres)
+                )
+                partiel = {cle: int(valeur) for cle, valeur in curseur.fetchone().items()}
+                curseur.close()
+            finally:
+                connexion.close()
+        finally:
+            self._places.release()
+        partiel['duree_ms'] = round(1000 * (time.perf_counter() - debut))
+        return partiel
+
+class Federation:
+    """Exécute les agrégats du tableau de bord et de la surveillance sur tous les sites en parallèle.
+
+    Chaque site renvoie des sommes et un nombre de lignes, qui s'additionnent sans perte. Les
+    sites qui n'ont pas répondu dans le délai sont signalés et exclus des totaux : la vue
+    régionale coûte la latence du site le plus lent, plafonnée à FEDERATION_DELAI.
+    """
+
+    def __init__(self, sites: Dict[str, Dict[str, Any]]):
+        self.sites = [SiteFedere(nom, config) for nom, config in sites.items()]
+        # Des travailleurs en réserve : une requête abandonnée après le délai occupe encore le sien
+        self._executeur = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.sites)),
+                                             thread_name_prefix="tloh-federation")
+
+    def agreger(self, numero_tloh=None, annee=None, service=None) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        """Totaux fusionnés et état de chaque site (répondu, délai dépassé ou erreur)"""
+        clause_where, parametres = construire_clause_filtres(numero_tloh, annee, service)
+        taches = {self._executeur.submit(site.agreger, clause_where, parametres): site for site in self.sites}
+        terminees, _ = wait(taches, timeout=Configuration.FEDERATION_DELAI)
+
+        totaux = dict.fromkeys(Configuration.MESURES + ['nb_lignes'], 0)
+        etats = []
+        for tache, site in taches.items():
+            if tache not in terminees:
+                etats.append({'site': site.nom, 'statut': "délai dépassé"})
+            elif tache.exception() is not None:
+                logger.error(f"Site {site.nom} en erreur: {tache.exception()}")
+                etats.append({'site': site.nom, 'statut': "erreur", 'detail': str(tache.exception())})
             else:
+                partiel = tache.result()
+                for cle in totaux:
+                    totaux[cle] += partiel[cle]
+                etats.append({'site': site.nom, 'statut': "répondu", **partiel})
+        return totaux, etats
+
+@st.cache_resource
+def obtenir_federation() -> Federation:
+    """Fédération unique par processus : pools des sites et threads sont partagés par les sessions"""
+    return Federation(Configuration.SITES)
+
+# ============================================
+# 4.8 JOURNAL D'AUDIT ASYNCHRONE
+# ============================================
+CREATION_JOURNAL_AUDIT = """
+    CREATE TABLE IF NOT EXISTS JournalAudit (
+        idAudit BIGINT AUTO_INCREMENT PRIMARY KEY,
+        horodatage DATETIME(3) NOT NULL,
+        idUtilisateur INT NULL,
+        identifiant VARCHAR(64) NULL,
+        action VARCHAR(32) NOT NULL,
+        objet VARCHAR(32) NOT NULL,
+        reference VARCHAR(128) NULL,
+        details JSON NULL,
+        INDEX idx_audit_horodatage (horodatage),
+        INDEX idx_audit_utilisateur (identifiant, horodatage),
+        INDEX idx_audit_action (action, horodatage),
+        INDEX idx_audit_reference (objet, reference)
+    )
+"""
+
+ACTIONS_AUDIT = ["connexion", "echec_connexion", "creation_tloh", "correction_tloh", "creation_indicateur",
+                 "creation_utilisateur"]
+
+class JournalAudit:
+    """Consigne les actions en mémoire et les écrit par lots depuis un thread d'arrière-plan.
+
+    consigner() ne fait qu'ajouter à un tampon circulaire : la saisie n'attend jamais la
+    base. Le tampon est vidé toutes les AUDIT_INTERVALLE secondes, ou dès qu'un lot est
+    plein, en un seul INSERT multi-lignes. Un arrêt brutal perd au plus les événements de
+    cet intervalle ; si le tampon déborde (base indisponible), les plus anciens sont
+    abandonnés et comptés dans `perdus`.
+    """
+
+    def __init__(self):
+        self._tampon = deque(maxlen=Configuration.AUDIT_CAPACITE)
+        self._verrou = threading.Lock()
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self.ecrits = 0
+        self.perdus = 0
+
+    @property
+    def en_attente(self) -> int:
+        return len(self._tampon)
+
+    def demarrer(self):
+        threading.Thread(target=self._boucle, name="tloh-audit", daemon=True).start()
+        atexit.register(self.vider)
+
+    def consigner(self, action: str, objet: str, reference=None, details=None,
+                  id_utilisateur=None, identifiant=None):
+        with self._verrou:
+            if len(self._tampon) == self._tampon.maxlen:
+                self.perdus += 1
+            self._tampon.append((datetime.now(), id_utilisateur, identifiant, action, objet,
+                                 None if reference is None else str(reference),
+                                 json.dumps(details, ensure_ascii=False, default=str) if details else None))
+            if len(self._tampon) >= Configuration.AUDIT_TAILLE_LOT:
+                self._reveil.set()
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            self._reveil.wait(Configuration.AUDIT_INTERVALLE)
+            self._reveil.clear()
+            self.vider()
+
+    def vider(self):
+        """Écrit tout le contenu du tampon, lot par lot"""
+        while True:
+            with self._verrou:
+                lot = [self._tampon.popleft() for _ in range(min(len(self._tampon), Configuration.AUDIT_TAILLE_LOT))]
+            if not lot:
+                return
+            try:
+                self._ecrire(lot)
+                self.ecrits += len(lot)
+            except Exception as erreur:
+                logger.error(f"Écriture du journal d'audit impossible: {erreur}")
+                with self._verrou:
+                    # Remis en tête du tampon pour le prochain passage, dans la limite de sa capacité
+                    place = self._tampon.maxlen - len(self._tampon)
+                    self.perdus += max(0, len(lot) - place)
+                    self._tampon.extendleft(reversed(lot[len(lot) - place:] if place < len(lot) else lot))
+                return
+
+    @staticmethod
+    def _ecrire(lot: List[tuple]):
+        if Configuration.AUDIT_DESTINATION == "fichier":
+            with open(Configuration.AUDIT_FICHIER, "a", encoding="utf-8") as fichier:
+                for horodatage, id_utilisateur, identifiant, action, objet, reference, details in lot:
+                    fichier.write(json.dumps({
+                        'horodatage': horodatage.isoformat(), 'idUtilisateur': id_utilisateur,
+                        'identifiant': identifiant, 'action': action, 'objet': objet,
+                        'reference': reference, 'details': json.loads(details) if details else None,
+                    }, ensure_ascii=False) + "\n")
+            return
+        # Écriture d'arrière-plan : elle ne doit prendre la place ni d'une saisie ni d'un rapport
+        with obtenir_connexion_db("fond") as connexion:
+            curseur = connexion.cursor()
+            try:
+                # mysql.connector regroupe executemany en un seul INSERT multi-lignes
+                curseur.executemany(
+                    """
+                    INSERT INTO JournalAudit
+                    (horodatage, idUtilisateur, identifiant, action, objet, reference, details)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    lot
+                )
                 connexion.commit()
-                resultat = curseur.rowcount
-            return resultat
-        except Error as erreur:
-            logger.error(f"Erreur lors de l'exécution de la requête: {erreur}")
-            st.error(f"Erreur lors de l'exécution de la requête: {erreur}")
-            # Afficher la requête SQL pour débogage
-            st.write(f"**Requête SQL:** {requete}")
-            if parametres:
-                st.write(f"**Paramètres:** {parametres}")
-            return None
-        finally:
-            curseur.close()
+            finally:
+                curseur.close()
+
+@st.cache_resource
+def obtenir_journal_audit() -> JournalAudit:
+    """Journal unique par processus"""
+    journal = JournalAudit()
+    journal.demarrer()
+    return journal
+
+def consigner_audit(action: str, objet: str, reference=None, details=None, identifiant=None):
+    """Consigne une action de l'utilisateur connecté (ou de `identifiant` s'il est précisé)"""
+    if not Configuration.AUDIT_ACTIF:
+        return
+    obtenir_journal_audit().consigner(
+        action, objet, reference, details,
+        id_utilisateur=st.session_state.get('id_utilisateur'),
+        identifiant=identifiant or st.session_state.get('identifiant')
+    )
+
+# ============================================
+# 4.9 NAVIGATEUR DE DONNÉES (PAGINATION PAR CLÉ)
+# ============================================
+SOURCES_NAVIGATION = {
+    'Enregistrement': {
+        'cle': 'idEnregistrement',
+        'colonnes': ['idEnregistrement', 'numéro_TLOH', 'date_début', 'date_fin', 'service'] + Configuration.MESURES,
+        # Libellé du tri : colonnes précédant la clé primaire, couvertes par un index
+        'tris': {
+            "Saisie": [],
+            "Date de début": ['date_début'],
+            "Numéro TLOH": ['numéro_TLOH'],
+            "Service": ['service', 'date_début'],
+        },
+        # Colonne filtrée : (libellé, valeurs) ; sans valeurs, filtre sur le début du texte
+        'filtres': {
+            'numéro_TLOH': ("Numéro TLOH commençant par", None),
+            'service': ("Service", Configuration.SERVICES),
+        },
+    },
+    'Utilisateur': {
+        'cle': 'idUtilisateur',
+        'colonnes': ['idUtilisateur', 'nom', 'prenom', 'identifiant', 'statut'],
+        'tris': {
+            "Nom": ['nom', 'prenom'],
+            "Identifiant": ['identifiant'],
+            "Statut": ['statut', 'nom', 'prenom'],
+        },
+        'filtres': {
+            'nom': ("Nom commençant par", None),
+            'statut': ("Statut", ["Administrateur", "Utilisateur"]),
+        },
+    },
+}
+
+# Index des tris du navigateur ; InnoDB y ajoute la clé primaire, qui départage les ex æquo.
+# Ils sont créés une fois par index_TLOH.py, pas au démarrage : sur une grande table, la
+# création dure plusieurs minutes. Sans eux, le navigateur reste juste mais trie en mémoire.
+INDEX_NAVIGATION = [
+    ('Enregistrement', 'idx_navigation_date', ['date_début']),
+    ('Enregistrement', 'idx_navigation_numero', ['numéro_TLOH']),
+    ('Enregistrement', 'idx_navigation_service', ['service', 'date_début']),
+    ('Utilisateur', 'idx_navigation_nom', ['nom', 'prenom']),
+    ('Utilisateur', 'idx_navigation_identifiant', ['identifiant']),
+    ('Utilisateur', 'idx_navigation_statut', ['statut', 'nom', 'prenom']),
+]
+
+def requete_page(source: str, tri: str, descendant: bool, filtres: Tuple[str, ...],
+                 suite: bool) -> Tuple[str, str]:
+    """Nom et texte de la requête d'une page : filtres, puis lignes après le curseur si `suite`"""
+    definition = SOURCES_NAVIGATION[source]
+    cles = definition['tris'][tri] + [definition['cle']]
+    conditions = [
+        f"{colonne} LIKE %s" if definition['filtres'][colonne][1] is None else f"{colonne} = %s"
+        for colonne in filtres
+    ]
+    if suite:
+        # Comparaison de lignes : MySQL la résout par un parcours d'intervalle sur l'index de tri
+        conditions.append(f"({', '.join(cles)}) {'<' if descendant else '>'} ({', '.join(['%s'] * len(cles))})")
+    sens = " DESC" if descendant else ""
+    requete = f"""
+        SELECT {', '.join(definition['colonnes'])}
+        FROM {source}
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY {', '.join(cle + sens for cle in cles)}
+        LIMIT {Configuration.NAVIGATION_TAILLE_PAGE + 1}
+    """
+    nom = "_".join(["navigation", source.lower(), *cles, "desc" if descendant else "asc",
+                    *filtres, "suite" if suite else "debut"])
+    return nom, requete
+
+class NavigateurDonnees:
+    """Pages des tables de SOURCES_NAVIGATION, lues par clé et préchargées en arrière-plan.
+
+    Une page est lue par `WHERE (tri, clé) > (dernière ligne vue) ORDER BY tri, clé LIMIT n + 1` :
+    le serveur descend l'index de tri jusqu'au curseur puis lit n + 1 lignes, quel que soit le
+    rang de la page, là où un OFFSET relirait toutes les lignes précédentes. La ligne en trop
+    indique s'il existe une page suivante, qui est aussitôt lue par un thread du navigateur.
+    Les pages sont gardées NAVIGATION_FRAICHEUR secondes et partagées par les sessions.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._pages: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._executeur = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tloh-navigation")
+
+    @staticmethod
+    def _lire(source: str, tri: str, descendant: bool, filtres: Tuple[Tuple[str, str], ...],
+              curseur: Optional[Tuple]) -> Tuple[List[Dict[str, Any]], Optional[Tuple]]:
+        """Lignes de la page et curseur de la page suivante (None s'il n'y en a pas)"""
+        definition = SOURCES_NAVIGATION[source]
+        nom, requete = requete_page(source, tri, descendant, tuple(colonne for colonne, _ in filtres),
+                                    curseur is not None)
+        registre = obtenir_registre()
+        registre.enregistrer(nom, requete, "consultation")
+        parametres = [
+            valeur.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            if definition['filtres'][colonne][1] is None else valeur
+            for colonne, valeur in filtres
+        ] + list(curseur or ())
+        with obtenir_connexion_db("consultation") as connexion:
+            lignes = registre.executer_dans(connexion, nom, tuple(parametres), fetch=True)
+        if len(lignes) <= Configuration.NAVIGATION_TAILLE_PAGE:
+            return lignes, None
+        lignes = lignes[:Configuration.NAVIGATION_TAILLE_PAGE]
+        cles = definition['tris'][tri] + [definition['cle']]
+        return lignes, tuple(lignes[-1][cle] for cle in cles)
+
+    def _tache(self, cle: Tuple):
+        """Lecture en cours ou terminée de la page `cle`, lancée si absente, périmée ou en échec"""
+        with self._verrou:
+            maintenant = time.monotonic()
+            entree = self._pages.get(cle)
+            if entree is not None and maintenant - entree[0] < Configuration.NAVIGATION_FRAICHEUR and \
+                    not (entree[1].done() and entree[1].exception() is not None):
+                self._pages.move_to_end(cle)
+                return entree[1]
+            tache = self._executeur.submit(self._lire, *cle)
+            self._pages[cle] = (maintenant, tache)
+            self._pages.move_to_end(cle)
+            while len(self._pages) > Configuration.NAVIGATION_PAGES_GARDEES:
+                self._pages.popitem(last=False)
+            return tache
+
+    def page(self, source: str, tri: str, descendant: bool, filtres: Dict[str, str],
+             curseur: Optional[Tuple] = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple]]:
+        """Page commençant après `curseur` (première page si None) ; les erreurs sont propagées"""
+        cle = (source, tri, descendant, tuple(sorted(filtres.items())), curseur)
+        lignes, suivant = self._tache(cle).result()
+        if suivant is not None:
+            # Préchargement : la page suivante est prête quand l'utilisateur la demande
+            self._tache(cle[:4] + (suivant,))
+        return lignes, suivant
+
+    def invalider(self, source: str):
+        """Oublie les pages d'une table après une modification faite depuis l'application"""
+        with self._verrou:
+            for cle in [cle for cle in self._pages if cle[0] == source]:
+                del self._pages[cle]
+
+@st.cache_resource
+def obtenir_navigateur() -> NavigateurDonnees:
+    return NavigateurDonnees()
+
+def afficher_navigateur(source: str, cle: str):
+    """Filtres, tri et page courante d'une table ; seule la page affichée est envoyée au navigateur"""
+    definition = SOURCES_NAVIGATION[source]
+    colonnes = st.columns(2 + len(definition['filtres']))
+    
+    with colonnes[0]:
+        tri = st.selectbox("Trier par", list(definition['tris']), key=f"{cle}_tri")
+    
+    with colonnes[1]:
+        descendant = st.selectbox("Ordre", ["Croissant", "Décroissant"], key=f"{cle}_ordre") == "Décroissant"
+    
+    filtres = {}
+    for colonne_widget, (colonne, (libelle, valeurs)) in zip(colonnes[2:], definition['filtres'].items()):
+        with colonne_widget:
+            if valeurs is None:
+                valeur = st.text_input(libelle, key=f"{cle}_{colonne}").strip()
+            else:
+                valeur = st.selectbox(libelle, ["Tous"] + valeurs, key=f"{cle}_{colonne}")
+                valeur = "" if valeur == "Tous" else valeur
+        if valeur:
+            filtres[colonne] = valeur
+    
+    # Curseurs des pages déjà vues : revenir en arrière ne relit que la page demandée
+    signature = (tri, descendant, tuple(sorted(filtres.items())))
+    position = st.session_state.get(f"{cle}_position")
+    if position is None or position['signature'] != signature:
+        position = {'signature': signature, 'curseurs': [None], 'page': 0}
+        st.session_state[f"{cle}_position"] = position
+    
+    try:
+        lignes, suivant = obtenir_navigateur().page(source, tri, descendant, filtres,
+                                                    position['curseurs'][position['page']])
+    except Exception as erreur:
+        st.error(f"Erreur lors de la lecture de {source}: {erreur}")
+        return
+    
+    if lignes:
+        st.dataframe(pd.DataFrame(lignes), hide_index=True, use_container_width=True)
+        premiere = position['page'] * Configuration.NAVIGATION_TAILLE_PAGE + 1
+        st.caption(f"Page {position['page'] + 1}, lignes {premiere} à {premiere + len(lignes) - 1}")
+    else:
+        st.info("Aucune ligne pour ces filtres")
+    
+    if suivant is not None:
+        del position['curseurs'][position['page'] + 1:]
+        position['curseurs'].append(suivant)
+    
+    colonne1, colonne2, colonne3 = st.columns(3)
+    with colonne1:
+        if st.button("Première page", key=f"{cle}_premiere", disabled=position['page'] == 0,
+                     use_container_width=True):
+            position['page'] = 0
+            st.rerun()
+    with colonne2:
+        if st.button("Page précédente", key=f"{cle}_precedente", disabled=position['page'] == 0,
+                     use_container_width=True):
+            position['page'] -= 1
+            st.rerun()
+    with colonne3:
+        if st.button("Page suivante", key=f"{cle}_suivante", disabled=suivant is None,
+                     use_container_width=True):
+            position['page'] += 1
+            st.rerun()
 
 # ============================================
 # 5. PAGE D'ACCUEIL
@@ -176,70 +3221,144 @@ def page_accueil():
     st.markdown("### Statistiques Globales")
     
     try:
-        # Vérifier d'abord si la table Enregistrement existe
-        check_table = executer_requete("SHOW TABLES LIKE 'Enregistrement'", fetch=True)
+        # Pas de requête préalable : pendant une panne, les derniers totaux connus restent servis
+        stats = calculer_statistiques_globales()
         
-        if check_table:
-            # Requête pour les statistiques globales
-            requete_statistiques = """
-            SELECT 
-                IFNULL(SUM(cas), 0) AS total_cas,
-                IFNULL(SUM(décès), 0) AS total_décès,
-                IFNULL(SUM(isolé), 0) AS total_isolé,
-                IFNULL(SUM(notifié), 0) AS total_notifié
-            FROM Enregistrement
-            """
+        if stats:
+            # Afficher les métriques
+            colonne1, colonne2, colonne3, colonne4 = st.columns(4)
             
-            statistiques = executer_requete(requete_statistiques, fetch=True)
+            with colonne1:
+                total_cas = stats['total_cas']
+                st.metric("Total Cas", total_cas)
             
-            if statistiques and len(statistiques) > 0:
-                stats = statistiques[0]
-                
-                # Afficher les métriques
-                colonne1, colonne2, colonne3, colonne4 = st.columns(4)
-                
-                with colonne1:
-                    total_cas = stats['total_cas']
-                    st.metric("Total Cas", total_cas)
-                
-                with colonne2:
-                    total_décès = stats['total_décès']
-                    st.metric("Total Décès", total_décès)
-                
-                with colonne3:
-                    total_isolé = stats['total_isolé']
-                    st.metric("Total Isolé", total_isolé)
-                
-                with colonne4:
-                    total_notifié = stats['total_notifié']
-                    st.metric("Total Notifié", total_notifié)
-            else:
-                st.info("Aucune donnée disponible dans la base")
+            with colonne2:
+                total_décès = stats['total_décès']
+                st.metric("Total Décès", total_décès)
+            
+            with colonne3:
+                total_isolé = stats['total_isolé']
+                st.metric("Total Isolé", total_isolé)
+            
+            with colonne4:
+                total_notifié = stats['total_notifié']
+                st.metric("Total Notifié", total_notifié)
         else:
-            st.warning("La table 'Enregistrement' n'existe pas encore dans la base de données")
+            st.info("Aucune donnée disponible dans la base")
             
     except Exception as erreur:
         st.error(f"Erreur lors de la récupération des statistiques: {erreur}")
+    
+    # Alertes épidémiques des dernières semaines
+    if Configuration.ALERTES_ACTIVES:
+        st.markdown("### Alertes épidémiques")
+        try:
+            moteur = obtenir_moteur_alertes()
+            if not moteur.pret():
+                st.info("Calcul des seuils épidémiques en cours")
+            elif moteur.rafraichir() is None:
+                st.info("Seuils épidémiques indisponibles")
+            else:
+                alertes = moteur.alertes_actives()
+                if alertes:
+                    st.dataframe(libeller_alertes(alertes), hide_index=True, use_container_width=True)
+                else:
+                    st.success("Aucun dépassement de seuil ces dernières semaines")
+                st.caption(f"Seuil : moyenne de la même semaine sur les {Configuration.ALERTES_ANNEES_REFERENCE} "
+                           f"années précédentes + {Configuration.ALERTES_ECARTS} écarts-types")
+        except Exception as erreur:
+            st.error(f"Erreur lors du calcul des alertes: {erreur}")
 
 # ============================================
 # 6. PAGE DE NOUVEL ENREGISTREMENT
 # ============================================
+# Clé du champ de saisie de chaque mesure, suivie de l'idIndicateur
+CHAMPS_MESURES = {'cas': 'cas_end_', 'décès': 'décès_end_', 'notifié': 'notifié_trop_', 'isolé': 'isolé_trop_',
+                  'institution': 'inst_décès_', 'communauté': 'comm_décès_'}
+
+def charger_tloh_dans_formulaire(numero_tloh: str):
+    """Pré-remplit le formulaire avec un TLOH enregistré et passe la page en mode correction"""
+    lignes = lire_tloh(numero_tloh)
+    if lignes is None:
+        st.error(f"Erreur lors de la lecture du TLOH {numero_tloh}")
+        return
+    if not lignes:
+        st.warning(f"Aucun TLOH enregistré sous le numéro {numero_tloh}")
+        return
+    
+    stockees = {}
+    non_modifiables = 0
+    for ligne in lignes:
+        if ligne['idIndicateur'] is None:
+            non_modifiables += 1
+        elif ligne['idIndicateur'] in stockees:
+            st.error(f"Le TLOH {numero_tloh} contient plusieurs lignes pour un même indicateur : "
+                     "correction impossible depuis le formulaire")
+            return
+        else:
+            stockees[ligne['idIndicateur']] = ligne
+    if non_modifiables:
+        st.warning(f"{non_modifiables} ligne(s) enregistrée(s) avant le suivi des indicateurs "
+                   "ne peuvent pas être corrigées ici")
+    if not stockees:
+        return
+    
+    # Remise à zéro de tous les champs, puis valeurs enregistrées
+    for cle in list(st.session_state.keys()):
+        if cle.startswith(tuple(CHAMPS_MESURES.values())):
+            st.session_state[cle] = 0
+    for id_indicateur, ligne in stockees.items():
+        for mesure, prefixe in CHAMPS_MESURES.items():
+            st.session_state[f"{prefixe}{id_indicateur}"] = int(ligne[mesure])
+    premiere = next(iter(stockees.values()))
+    st.session_state['numero_tloh_saisie'] = numero_tloh
+    if premiere['service'] in Configuration.SERVICES:
+        st.session_state['service_saisie'] = premiere['service']
+    st.session_state['date_debut_saisie'] = premiere['date_début']
+    st.session_state['date_fin_saisie'] = premiere['date_fin']
+    st.session_state['tloh_en_correction'] = {'numero': numero_tloh, 'lignes': stockees}
+
 def page_nouvel_enregistrement():
-    """Page pour créer un nouvel enregistrement TLOH"""
+    """Page pour créer un nouvel enregistrement TLOH ou corriger un TLOH existant"""
     st.title("Nouvel enregistrement TLOH")
     
+    # Alertes déclenchées par le dernier enregistrement, conservées à travers le rechargement de la page
+    for alerte in st.session_state.pop('alertes_declenchees', []):
+        st.warning(f"Seuil épidémique dépassé : {alerte['indicateur']} ({alerte['service']}, "
+                   f"semaine {alerte['semaine']}) : {alerte['cas']} cas pour un seuil "
+                   f"de {alerte['seuil']}")
+    
+    # Correction d'un TLOH déjà enregistré
+    with st.expander("Corriger un TLOH existant", expanded='tloh_en_correction' in st.session_state):
+        colonne1, colonne2, colonne3 = st.columns([3, 1, 1])
+        with colonne1:
+            numero_a_corriger = st.text_input("Numéro TLOH à corriger", key="numero_tloh_correction")
+        with colonne2:
+            if st.button("Charger", use_container_width=True) and numero_a_corriger:
+                charger_tloh_dans_formulaire(numero_a_corriger.strip())
+        with colonne3:
+            if st.button("Annuler la correction", use_container_width=True,
+                         disabled='tloh_en_correction' not in st.session_state):
+                del st.session_state['tloh_en_correction']
+                st.session_state['numero_tloh_saisie'] = ""
+    
+    correction = st.session_state.get('tloh_en_correction')
+    if correction:
+        st.info(f"Correction du TLOH {correction['numero']} : seules les lignes modifiées seront enregistrées")
+    
     # Section 1: Informations générales
     st.markdown('<h3 class="sous-titre">Informations générales</h3>', unsafe_allow_html=True)
     
     colonne1, colonne2 = st.columns(2)
     
     with colonne1:
-        numéro_TLOH = st.text_input("Numéro TLOH*", help="Numéro unique d'identification du TLOH")
-        service = st.selectbox("Service*", Configuration.SERVICES)
+        numéro_TLOH = st.text_input("Numéro TLOH*", help="Numéro unique d'identification du TLOH",
+                                    key="numero_tloh_saisie", disabled=bool(correction))
+        service = st.selectbox("Service*", Configuration.SERVICES, key="service_saisie")
     
     with colonne2:
-        date_début = st.date_input("Date de début*", value=datetime.now())
-        date_fin = st.date_input("Date de fin*", value=datetime.now())
+        date_début = st.date_input("Date de début*", key="date_debut_saisie")
+        date_fin = st.date_input("Date de fin*", key="date_fin_saisie")
     
     # Initialiser les dictionnaires pour stocker les données
     donnees_maladies = {}
@@ -254,13 +3373,7 @@ def page_nouvel_enregistrement():
     
     try:
         # Récupérer les maladies endémiques
-        requete_endemiques = """
-            SELECT idIndicateur, nom 
-            FROM Indicateur 
-            WHERE type = 'Maladie endemique'
-            ORDER BY nom
-        """
-        maladies_endemiques = executer_requete(requete_endemiques, fetch=True)
+        maladies_endemiques = lister_indicateurs("Maladie endemique")
         
         if maladies_endemiques:
             # Créer un tableau pour les maladies endémiques dans le même format que la page surveillance
@@ -285,7 +3398,6 @@ def page_nouvel_enregistrement():
                     cas = st.number_input(
                         "",
                         min_value=0,
-                        value=0,
                         key=f"cas_end_{maladie['idIndicateur']}",
                         label_visibility="collapsed"
                     )
@@ -299,7 +3411,6 @@ def page_nouvel_enregistrement():
                         décès = st.number_input(
                             "",
                             min_value=0,
-                            value=0,
                             key=f"décès_end_{maladie['idIndicateur']}",
                             label_visibility="collapsed"
                         )
@@ -314,6 +3425,8 @@ def page_nouvel_enregistrement():
                     'cas': cas,
                     'décès': décès
                 }
+        elif maladies_endemiques is None:
+            st.error("Erreur lors du chargement des maladies endémiques")
         else:
             st.info("Aucune maladie endémique définie")
             
@@ -325,13 +3438,7 @@ def page_nouvel_enregistrement():
     
     try:
         # Récupérer les maladies tropicales négligées
-        requete_tropicales = """
-            SELECT idIndicateur, nom 
-            FROM Indicateur 
-            WHERE type = 'maladies tropicales négligées'
-            ORDER BY nom
-        """
-        maladies_tropicales = executer_requete(requete_tropicales, fetch=True)
+        maladies_tropicales = lister_indicateurs("maladies tropicales négligées")
         
         if maladies_tropicales:
             # Créer un tableau pour les maladies tropicales négligées
@@ -356,7 +3463,6 @@ def page_nouvel_enregistrement():
                     notifié = st.number_input(
                         "",
                         min_value=0,
-                        value=0,
                         key=f"notifié_trop_{maladie['idIndicateur']}",
                         label_visibility="collapsed"
                     )
@@ -365,7 +3471,6 @@ def page_nouvel_enregistrement():
                     isolé = st.number_input(
                         "",
                         min_value=0,
-                        value=0,
                         key=f"isolé_trop_{maladie['idIndicateur']}",
                         label_visibility="collapsed"
                     )
@@ -380,6 +3485,8 @@ def page_nouvel_enregistrement():
                     'notifié': notifié,
                     'isolé': isolé
                 }
+        elif maladies_tropicales is None:
+            st.error("Erreur lors du chargement des maladies tropicales")
         else:
             st.info("Aucune maladie tropicale négligée définie")
             
@@ -391,13 +3498,7 @@ def page_nouvel_enregistrement():
     
     try:
         # Récupérer les types de décès
-        requete_décès = """
-            SELECT idIndicateur, nom 
-            FROM Indicateur 
-            WHERE type = 'décès'
-            ORDER BY nom
-        """
-        types_décès = executer_requete(requete_décès, fetch=True)
+        types_décès = lister_indicateurs("décès")
         
         if types_décès:
             # Créer un tableau pour les décès
@@ -422,7 +3523,6 @@ def page_nouvel_enregistrement():
                     institution = st.number_input(
                         "",
                         min_value=0,
-                        value=0,
                         key=f"inst_décès_{type_décès['idIndicateur']}",
                         label_visibility="collapsed"
                     )
@@ -431,7 +3531,6 @@ def page_nouvel_enregistrement():
                     communauté = st.number_input(
                         "",
                         min_value=0,
-                        value=0,
                         key=f"comm_décès_{type_décès['idIndicateur']}",
                         label_visibility="collapsed"
                     )
@@ -442,6 +3541,8 @@ def page_nouvel_enregistrement():
                     'communauté': communauté,
                     'total_décès': institution + communauté
                 }
+        elif types_décès is None:
+            st.error("Erreur lors du chargement des types de décès")
         else:
             st.info("Aucun type de décès défini")
             
@@ -456,7 +3557,8 @@ def page_nouvel_enregistrement():
         for erreur in validation_erreurs:
             st.error(erreur)
     
-    if st.button("Enregistrer le TLOH", type="primary", use_container_width=True, 
+    libelle = "Enregistrer les corrections" if correction else "Enregistrer le TLOH"
+    if st.button(libelle, type="primary", use_container_width=True, 
                 help="Cliquez pour enregistrer le TLOH", disabled=bool(validation_erreurs)):
         if not numéro_TLOH or not service:
             st.error("Veuillez remplir tous les champs obligatoires (*) dans la section Informations générales")
@@ -464,89 +3566,67 @@ def page_nouvel_enregistrement():
             st.error("Veuillez corriger les erreurs de validation avant d'enregistrer")
         else:
             try:
-                enregistrements_crees = 0
-                erreurs = []
+                # Saisie de chaque indicateur affiché : idIndicateur -> (nom, type, mesures renseignées)
+                saisies = {}
                 
-                # Enregistrer les maladies endémiques
+                # Maladies endémiques
                 for id_indicateur, maladie in donnees_maladies.items():
-                    if maladie['cas'] > 0 or maladie['décès'] > 0:
-                        try:
-                            executer_requete(
-                                """
-                                INSERT INTO Enregistrement 
-                                (numéro_TLOH, date_début, date_fin, institution, 
-                                    communauté, notifié, décès, 
-                                    cas, isolé, service)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)                                """,
-                                (
-                                    numéro_TLOH, date_début, date_fin, 0,
-                                    0, 0, maladie['décès'],
-                                    maladie['cas'], 0,
-                                    service                            
-                                )
-                            )
-                            enregistrements_crees += 1
-                        except Exception as e:
-                            erreurs.append(f"Maladie {maladie['nom']}: {e}")
+                    saisies[id_indicateur] = (maladie['nom'], "Maladie endemique",
+                                              {'cas': maladie['cas'], 'décès': maladie['décès']})
                 
-                # Enregistrer les maladies tropicales négligées
+                # Maladies tropicales négligées
                 for id_indicateur, maladie in donnees_tropicales.items():
-                    if maladie['notifié'] > 0 or maladie['isolé'] > 0:
-                        try:
-                            executer_requete(
-                                """
-                                INSERT INTO Enregistrement 
-                                (numéro_TLOH, date_début, date_fin, institution, 
-                                    communauté, notifié, décès, 
-                                    cas, isolé, service)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                """,
-                                (
-                                    numéro_TLOH, date_début, date_fin, 0,
-                                    0, maladie['notifié'], 0,
-                                    0, maladie['isolé'],
-                                    service
-                                )
-                            )
-                            enregistrements_crees += 1
-                        except Exception as e:
-                            erreurs.append(f"Maladie tropicale {maladie['nom']}: {e}")
+                    saisies[id_indicateur] = (maladie['nom'], "maladies tropicales négligées",
+                                              {'notifié': maladie['notifié'], 'isolé': maladie['isolé']})
                 
-                # Enregistrer les décès
+                # Décès
                 for id_indicateur, décès in donnees_décès.items():
-                    if décès['institution'] > 0 or décès['communauté'] > 0:
-                        try:
-                            executer_requete(
-                                """
-                                INSERT INTO Enregistrement 
-                                (numéro_TLOH, date_début, date_fin, institution, 
-                                    communauté, notifié, décès, 
-                                    cas, isolé, service)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                """,
-                                (
-                                    numéro_TLOH, date_début, date_fin, décès['institution'],
-                                    décès['communauté'], 0, décès['total_décès'],
-                                    0, 0,
-                                    service
-                                )
-                            )
-                            enregistrements_crees += 1
-                        except Exception as e:
-                            erreurs.append(f"Décès {décès['nom']}: {e}")
+                    saisies[id_indicateur] = (décès['nom'], "décès",
+                                              {'institution': décès['institution'], 'communauté': décès['communauté'],
+                                               'décès': décès['total_décès']})
                 
-                if enregistrements_crees > 0:
-                    st.success(f"TLOH {numéro_TLOH} enregistré avec succès! ({enregistrements_crees} indicateurs)")
-                    
-                    if erreurs:
-                        st.warning(f"Certains enregistrements ont échoué: {', '.join(erreurs)}")
-                    
-                    time.sleep(2)
-                    st.rerun()
+                if correction:
+                    differences = comparer_tloh(correction['lignes'], saisies, (service, date_début, date_fin))
+                    nb_changements = sum(len(lignes) for lignes in differences.values())
+                    if nb_changements:
+                        version = corriger_tloh(numéro_TLOH, service, date_début, date_fin, differences)
+                        consigner_audit("correction_tloh", "Enregistrement", numéro_TLOH,
+                                        {'version': version,
+                                         **{cle: len(lignes) for cle, lignes in differences.items()}})
+                        del st.session_state['tloh_en_correction']
+                        st.success(f"TLOH {numéro_TLOH} corrigé ({len(differences['ajouts'])} ajout(s), "
+                                   f"{len(differences['modifications'])} modification(s), "
+                                   f"{len(differences['suppressions'])} suppression(s))")
+                        
+                        time.sleep(2)
+                        st.rerun()
+                    else:
+                        st.info("Aucune modification par rapport au TLOH enregistré")
                 else:
-                    st.warning("Aucune donnée à enregistrer (tous les champs sont à 0)")
-                    if erreurs:
-                        st.error(f"Erreurs d'enregistrement: {', '.join(erreurs)}")
+                    # Seuls les indicateurs renseignés sont enregistrés
+                    lignes = [(id_indicateur, nom, type_indicateur, valeurs)
+                              for id_indicateur, (nom, type_indicateur, valeurs) in saisies.items()
+                              if any(valeurs.values())]
+                    
+                    if lignes:
+                        # Toutes les lignes et l'événement sortant sont enregistrés ensemble, ou pas du tout
+                        enregistrements_crees = enregistrer_tloh(numéro_TLOH, service, date_début, date_fin, lignes)
+                        consigner_audit("creation_tloh", "Enregistrement", numéro_TLOH,
+                                        {'service': service, 'date_début': date_début, 'date_fin': date_fin,
+                                         'indicateurs': [nom for _, nom, _, _ in lignes]})
+                        st.success(f"TLOH {numéro_TLOH} enregistré avec succès! ({enregistrements_crees} indicateurs)")
+                        
+                        # Seuils évalués pour les seules semaines touchées par ce TLOH
+                        moteur = obtenir_moteur_alertes()
+                        declenchees = moteur.rafraichir() if Configuration.ALERTES_ACTIVES and moteur.pret() else None
+                        if declenchees:
+                            # Affichées en tête de page après le rechargement qui vide le formulaire
+                            st.session_state['alertes_declenchees'] = libeller_alertes(declenchees).to_dict('records')
+                        
+                        time.sleep(2)
+                        st.rerun()
+                    else:
+                        st.warning("Aucune donnée à enregistrer (tous les champs sont à 0)")
                     
             except Exception as e:
                 st.error(f"Erreur générale lors de l'enregistrement: {e}")
@@ -576,65 +3656,47 @@ def page_surveillance_epidemiologique():
         # Filtre par service
         service = st.selectbox("Service", ["Tous les services"] + Configuration.SERVICES)
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    # Filtre par semaines épidémiologiques : périodes de déclaration chevauchant l'intervalle
+    colonne1, colonne2, colonne3 = st.columns(3)
     
-    # Construire les conditions WHERE
-    conditions = []
-    parametres = []
+    with colonne1:
+        filtre_semaines = st.checkbox("Filtrer par semaines épidémiologiques")
     
-    if numéro_tloh:
-        conditions.append("numéro_TLOH LIKE %s")
-        parametres.append(f"%{numéro_tloh}%")
+    with colonne2:
+        semaine_debut = st.number_input("De la semaine", min_value=1, max_value=53, value=1,
+                                        disabled=not filtre_semaines)
     
-    if annee != "Toutes les années":
-        conditions.append("YEAR(date_début) = %s")
-        parametres.append(annee)
+    with colonne3:
+        semaine_fin = st.number_input("À la semaine", min_value=1, max_value=53, value=53,
+                                      disabled=not filtre_semaines)
     
-    if service != "Tous les services":
-        conditions.append("service = %s")
-        parametres.append(service)
+    st.markdown('</div>', unsafe_allow_html=True)
     
-    clause_where = " AND ".join(conditions) if conditions else "1=1"
+    annee = None if annee == "Toutes les années" else annee
+    service = None if service == "Tous les services" else service
+    
+    periode = None
+    if filtre_semaines:
+        annee_iso = int(annee) if annee is not None else date.today().year
+        semaine_debut, semaine_fin = sorted((int(semaine_debut), int(semaine_fin)))
+        # Une année ISO sans semaine 53 s'arrête à la semaine 52
+        semaines_annee = date(annee_iso, 12, 28).isocalendar()[1]
+        periode = (date.fromisocalendar(annee_iso, min(semaine_debut, semaines_annee), 1),
+                   date.fromisocalendar(annee_iso, min(semaine_fin, semaines_annee), 7))
+        st.caption(f"Période du {periode[0]:%d/%m/%Y} au {periode[1]:%d/%m/%Y} : TLOH dont la période "
+                   "de déclaration chevauche ces semaines (le filtre par année est remplacé)")
     
     # Section 1: Maladies endémiques
     st.markdown('<h3 class="sous-titre">Maladies Endémiques</h3>', unsafe_allow_html=True)
     
     try:
-        # Récupérer les maladies endémiques pour afficher la liste
-        requete_endemiques_liste = """
-            SELECT idIndicateur, nom 
-            FROM Indicateur 
-            WHERE type = 'Maladie endemique'
-            ORDER BY nom
-        """
-        maladies_endemiques_liste = executer_requete(requete_endemiques_liste, fetch=True)
+        donnees_endemiques = calculer_agregats_surveillance("Maladie endemique", numéro_tloh, annee, service, periode)
         
-        if maladies_endemiques_liste:
-            # Pour chaque maladie endémique, afficher les statistiques
-            donnees_endemiques = []
-            
-            for maladie in maladies_endemiques_liste:
-                # Requête pour les statistiques de cette maladie spécifique
-                requete_maladie = f"""
-                SELECT 
-                    %s AS indicateur,
-                    IFNULL(SUM(cas), 0) AS cas,
-                    IFNULL(SUM(décès), 0) AS décès
-                FROM Enregistrement
-                WHERE {clause_where}
-                """
-                # Note: Comme il n'y a plus de lien avec la table Indicateur, 
-                # on ne peut pas filtrer par maladie spécifique
-                resultat_maladie = executer_requete(requete_maladie, tuple(parametres + [maladie['nom']]), fetch=True)
-                
-                if resultat_maladie and len(resultat_maladie) > 0:
-                    donnees_endemiques.append(resultat_maladie[0])
-            
-            if donnees_endemiques:
-                df_endemiques = pd.DataFrame(donnees_endemiques)
-                st.dataframe(df_endemiques, use_container_width=True)
-            else:
-                st.info("Aucune donnée disponible pour les maladies endémiques")
+        if donnees_endemiques:
+            df_endemiques = pd.DataFrame(donnees_endemiques)
+            st.dataframe(df_endemiques, use_container_width=True)
+        elif donnees_endemiques is None:
+            st.info("Aucune donnée disponible pour les maladies endémiques")
         else:
             st.info("Aucune maladie endémique définie dans la base")
             
@@ -647,39 +3709,13 @@ def page_surveillance_epidemiologique():
     st.markdown('<h3 class="sous-titre">Maladies tropicales négligées</h3>', unsafe_allow_html=True)
     
     try:
-        # Récupérer les maladies tropicales pour afficher la liste
-        requete_tropicales_liste = """
-            SELECT idIndicateur, nom 
-            FROM Indicateur 
-            WHERE type = 'maladies tropicales négligées'
-            ORDER BY nom
-        """
-        maladies_tropicales_liste = executer_requete(requete_tropicales_liste, fetch=True)
+        donnees_tropicales = calculer_agregats_surveillance("maladies tropicales négligées", numéro_tloh, annee, service, periode)
         
-        if maladies_tropicales_liste:
-            # Pour chaque maladie tropicale, afficher les statistiques
-            donnees_tropicales = []
-            
-            for maladie in maladies_tropicales_liste:
-                # Requête pour les statistiques de cette maladie spécifique
-                requete_maladie = f"""
-                SELECT 
-                    %s AS indicateur,
-                    IFNULL(SUM(notifié), 0) AS notifié,
-                    IFNULL(SUM(isolé), 0) AS isolé
-                FROM Enregistrement
-                WHERE {clause_where}
-                """
-                resultat_maladie = executer_requete(requete_maladie, tuple(parametres + [maladie['nom']]), fetch=True)
-                
-                if resultat_maladie and len(resultat_maladie) > 0:
-                    donnees_tropicales.append(resultat_maladie[0])
-            
-            if donnees_tropicales:
-                df_tropicales = pd.DataFrame(donnees_tropicales)
-                st.dataframe(df_tropicales, use_container_width=True)
-            else:
-                st.info("Aucune donnée disponible pour les maladies tropicales négligées")
+        if donnees_tropicales:
+            df_tropicales = pd.DataFrame(donnees_tropicales)
+            st.dataframe(df_tropicales, use_container_width=True)
+        elif donnees_tropicales is None:
+            st.info("Aucune donnée disponible pour les maladies tropicales négligées")
         else:
             st.info("Aucune maladie tropicale négligée définie dans la base")
             
@@ -692,45 +3728,108 @@ def page_surveillance_epidemiologique():
     st.markdown('<h3 class="sous-titre">Décès</h3>', unsafe_allow_html=True)
     
     try:
-        # Récupérer les types de décès pour afficher la liste
-        requete_deces_liste = """
-            SELECT idIndicateur, nom 
-            FROM Indicateur 
-            WHERE type = 'décès'
-            ORDER BY nom
-        """
-        types_deces_liste = executer_requete(requete_deces_liste, fetch=True)
+        donnees_deces = calculer_agregats_surveillance("décès", numéro_tloh, annee, service, periode)
         
-        if types_deces_liste:
-            # Pour chaque type de décès, afficher les statistiques
-            donnees_deces = []
-            
-            for type_deces in types_deces_liste:
-                # Requête pour les statistiques de ce type de décès spécifique
-                requete_deces = f"""
-                SELECT 
-                    %s AS indicateur,
-                    IFNULL(SUM(institution), 0) AS institution,
-                    IFNULL(SUM(communauté), 0) AS communauté,
-                    IFNULL(SUM(décès), 0) AS décès
-                FROM Enregistrement
-                WHERE {clause_where}
-                """
-                resultat_deces = executer_requete(requete_deces, tuple(parametres + [type_deces['nom']]), fetch=True)
-                
-                if resultat_deces and len(resultat_deces) > 0:
-                    donnees_deces.append(resultat_deces[0])
-            
-            if donnees_deces:
-                df_décès = pd.DataFrame(donnees_deces)
-                st.dataframe(df_décès, use_container_width=True)
-            else:
-                st.info("Aucune donnée disponible pour les décès")
+        if donnees_deces:
+            df_décès = pd.DataFrame(donnees_deces)
+            st.dataframe(df_décès, use_container_width=True)
+        elif donnees_deces is None:
+            st.info("Aucune donnée disponible pour les décès")
         else:
             st.info("Aucun type de décès défini dans la base")
             
     except Exception as erreur:
         st.error(f"Erreur lors de la récupération des données: {erreur}")
+    
+    # Lacunes de déclaration sur la période filtrée
+    if periode is not None:
+        with st.expander("Couverture de la période par service"):
+            couverture = obtenir_index_periodes().couverture(*periode)
+            if service is not None:
+                couverture = [ligne for ligne in couverture if ligne['service'] == service]
+            if couverture:
+                st.dataframe(pd.DataFrame(couverture), use_container_width=True)
+                st.caption("Lacunes : jours de la période couverts par aucun TLOH du service")
+            else:
+                st.info("Couverture indisponible")
+    
+    # Bulletins hebdomadaires précalculés par le planificateur
+    if Configuration.PLANIFICATEUR_ACTIF and annee is not None:
+        planificateur = source_bulletins()
+        with st.expander(f"Bulletins hebdomadaires {annee} par service"):
+            bulletins = planificateur.bulletins_hebdomadaires(annee)
+            if service is not None:
+                bulletins = [ligne for ligne in bulletins if ligne['service'] == service]
+            if bulletins:
+                st.dataframe(pd.DataFrame(bulletins), use_container_width=True)
+            else:
+                st.info("Aucun bulletin disponible pour cette période")
+            if planificateur.calcule_le:
+                st.caption(f"Version {planificateur.version} calculée le "
+                           f"{planificateur.calcule_le:%d/%m/%Y à %H:%M}")
+    
+    # Courbes de tendance hebdomadaires, sous-échantillonnées côté serveur
+    if Configuration.PLANIFICATEUR_ACTIF:
+        with st.expander("Tendances hebdomadaires"):
+            type_tendance = st.selectbox("Type d'indicateur", Configuration.TYPES_INDICATEUR, key="type_tendance")
+            series = obtenir_series_tendances()
+            if not series.rafraichir():
+                st.info("Les tendances seront disponibles après le premier calcul des bulletins")
+            else:
+                mesure_tendance = st.selectbox("Mesure", Configuration.MESURES_PAR_TYPE[type_tendance],
+                                               key="mesure_tendance")
+                # Une courbe par indicateur du type ; les lignes sans indicateur n'apparaissent que si elles comptent
+                courbes = [(int(indicateur['idIndicateur']), indicateur['nom'])
+                           for indicateur in lister_indicateurs(type_tendance) or []]
+                courbes.append((0, Configuration.LIBELLE_SANS_INDICATEUR))
+                cadres = [series.serie(mesure_tendance, annee, service, id_indicateur).assign(indicateur=nom)
+                          for id_indicateur, nom in courbes]
+                cadres = [cadre for (id_indicateur, _), cadre in zip(courbes, cadres)
+                          if id_indicateur or cadre['valeur'].any()]
+                cadre = pd.concat(cadres) if cadres else pd.DataFrame()
+                if cadre.empty:
+                    st.info("Aucune donnée pour ces filtres")
+                else:
+                    st.line_chart(cadre, x='semaine', y='valeur', color='indicateur')
+    
+    # Chaque semaine comparée aux mêmes semaines des années précédentes
+    with st.expander("Comparaison d'une année sur l'autre"):
+        annee_reference = int(annee) if annee is not None else date.today().isocalendar()[0]
+        semaine_courante = date.today().isocalendar()[1] if annee_reference == date.today().isocalendar()[0] else 0
+        
+        colonne1, colonne2, colonne3 = st.columns(3)
+        
+        with colonne1:
+            type_comparaison = st.selectbox("Type d'indicateur", Configuration.TYPES_INDICATEUR,
+                                            key="type_comparaison")
+        
+        with colonne2:
+            mesure_comparaison = st.selectbox("Mesure", Configuration.MESURES_PAR_TYPE[type_comparaison],
+                                              key="mesure_comparaison")
+        
+        with colonne3:
+            semaine_comparaison = st.selectbox("Semaine épidémiologique", ["Toutes"] + list(range(1, 54)),
+                                               index=semaine_courante, key="semaine_comparaison")
+        
+        comparaison = obtenir_comparaison_annuelle()
+        if not comparaison.pret():
+            st.info("La comparaison sera disponible après le chargement des enregistrements")
+        else:
+            cadre = comparaison.tableau(type_comparaison, mesure_comparaison, service, annee_reference,
+                                        None if semaine_comparaison == "Toutes" else semaine_comparaison)
+            if cadre is None:
+                st.info("Comparaison indisponible")
+            elif cadre.empty:
+                st.info("Aucune donnée pour ces filtres")
+            else:
+                noms = {indicateur['idIndicateur']: indicateur['nom']
+                        for indicateur in lister_indicateurs(type_comparaison) or []}
+                noms[0] = "Tous les indicateurs"
+                cadre = cadre.reset_index()
+                cadre['indicateur'] = cadre['indicateur'].map(lambda indicateur: noms.get(indicateur, f"Indicateur {indicateur}"))
+                st.dataframe(cadre, hide_index=True, use_container_width=True)
+            st.caption(f"Semaines ISO de {annee_reference} et des années précédentes (filtre service appliqué, "
+                       "numéro TLOH ignoré) ; variations par rapport à l'année précédente")
 
 # ============================================
 # 8. PAGE D'AJOUT D'INDICATEUR (CORRIGÉE)
@@ -769,7 +3868,9 @@ def page_ajout_indicateur():
                     """
                     resultat = executer_requete(requete_verification, (nom_indicateur, type_indicateur), fetch=True)
                     
-                    if resultat and resultat[0]['count'] > 0:
+                    if resultat is None:
+                        st.error("Erreur lors de la vérification de l'indicateur")
+                    elif resultat[0]['count'] > 0:
                         st.error(f"Cet indicateur existe déjà dans la base de données")
                     else:
                         # Insérer le nouvel indicateur - ne pas spécifier idIndicateur (AUTO_INCREMENT)
@@ -781,6 +3882,8 @@ def page_ajout_indicateur():
                         
                         rows_affected = executer_requete(requete_insertion, parametres)
                         if rows_affected is not None and rows_affected > 0:
+                            consigner_audit("creation_indicateur", "Indicateur", nom_indicateur,
+                                            {'type': type_indicateur})
                             st.success(f"Indicateur '{nom_indicateur}' ajouté avec succès!")
                         else:
                             st.error("Erreur lors de l'ajout de l'indicateur")
@@ -831,7 +3934,9 @@ def page_gestion_utilisateurs():
                     """
                     resultat = executer_requete(requete_verification, (identifiant,), fetch=True)
                     
-                    if resultat and resultat[0]['count'] > 0:
+                    if resultat is None:
+                        st.error("Erreur lors de la vérification de l'identifiant")
+                    elif resultat[0]['count'] > 0:
                         st.error(f"Cet identifiant existe déjà")
                     else:
                         # Insérer le nouvel utilisateur - ne pas spécifier idUtilisateur (AUTO_INCREMENT)
@@ -843,6 +3948,9 @@ def page_gestion_utilisateurs():
                         
                         rows_affected = executer_requete(requete_insertion, parametres)
                         if rows_affected is not None and rows_affected > 0:
+                            consigner_audit("creation_utilisateur", "Utilisateur", identifiant,
+                                            {'nom': nom, 'prenom': prenom, 'statut': statut})
+                            obtenir_navigateur().invalider("Utilisateur")
                             st.success(f"Utilisateur {identifiant} ajouté avec succès!")
                         else:
                             st.error("Erreur lors de l'ajout de l'utilisateur")
@@ -852,24 +3960,145 @@ def page_gestion_utilisateurs():
     
     st.divider()
     
-    # Liste des utilisateurs
+    # Liste des utilisateurs, page par page
     st.subheader("Liste des utilisateurs")
+    afficher_navigateur("Utilisateur", "navigation_utilisateurs")
+
+# ============================================
+# 9.1 PAGE DE VUE RÉGIONALE (FÉDÉRATION DES SITES)
+# ============================================
+def page_vue_regionale():
+    """Totaux combinés de tous les sites de la région"""
+    st.title("Vue régionale")
+    
+    # Section de filtres
+    st.markdown('<div class="section-filtres">', unsafe_allow_html=True)
+    st.subheader("Filtres de recherche")
+    
+    colonne1, colonne2, colonne3 = st.columns(3)
+    
+    with colonne1:
+        numéro_tloh = st.text_input("Numéro TLOH", placeholder="Tous les numéros")
+    
+    with colonne2:
+        annee = st.selectbox("Année", ["Toutes les années"] + Configuration.ANNEES)
+    
+    with colonne3:
+        service = st.selectbox("Service", ["Tous les services"] + Configuration.SERVICES)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    annee = None if annee == "Toutes les années" else annee
+    service = None if service == "Tous les services" else service
+    
+    with st.spinner(f"Interrogation de {len(Configuration.SITES)} site(s)..."):
+        totaux, etats = obtenir_federation().agreger(numéro_tloh, annee, service)
+    
+    repondus = sum(1 for etat in etats if etat['statut'] == "répondu")
+    if repondus < len(etats):
+        st.warning(f"{repondus} site(s) sur {len(etats)} ont répondu : les totaux sont partiels")
+    
+    # Totaux fusionnés, présentés comme sur le tableau de bord
+    st.markdown("### Statistiques régionales")
+    colonne1, colonne2, colonne3, colonne4 = st.columns(4)
+    with colonne1:
+        st.metric("Total Cas", totaux['cas'])
+    with colonne2:
+        st.metric("Total Décès", totaux['décès'])
+    with colonne3:
+        st.metric("Total Isolé", totaux['isolé'])
+    with colonne4:
+        st.metric("Total Notifié", totaux['notifié'])
+    
+    # Totaux par type d'indicateur
+    for type_indicateur in Configuration.TYPES_INDICATEUR:
+        st.markdown(f'<h3 class="sous-titre">{type_indicateur.capitalize()}</h3>', unsafe_allow_html=True)
+        mesures = Configuration.MESURES_PAR_TYPE[type_indicateur]
+        st.dataframe(pd.DataFrame([{mesure: totaux[mesure] for mesure in mesures}]),
+                     hide_index=True, use_container_width=True)
+    
+    # État des sites
+    st.divider()
+    st.subheader("Sites interrogés")
+    st.dataframe(pd.DataFrame(etats), hide_index=True, use_container_width=True)
+
+# ============================================
+# 9.2 PAGE DU JOURNAL D'AUDIT
+# ============================================
+def page_journal_audit():
+    """Consultation du journal d'audit"""
+    st.title("Journal d'audit")
+    
+    if Configuration.AUDIT_DESTINATION != "table":
+        st.info(f"Le journal est écrit dans le fichier {Configuration.AUDIT_FICHIER}")
+        return
+    
+    # Section de filtres
+    st.markdown('<div class="section-filtres">', unsafe_allow_html=True)
+    st.subheader("Filtres de recherche")
+    
+    colonne1, colonne2, colonne3 = st.columns(3)
+    
+    with colonne1:
+        identifiant = st.text_input("Identifiant", placeholder="Tous les utilisateurs")
+    
+    with colonne2:
+        action = st.selectbox("Action", ["Toutes les actions"] + ACTIONS_AUDIT)
+    
+    with colonne3:
+        periode = st.date_input("Période", value=(datetime.now().date() - timedelta(days=30), datetime.now().date()))
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Chaque combinaison de filtres s'appuie sur un index (horodatage, utilisateur ou action)
+    conditions = ["horodatage >= %s", "horodatage < %s"]
+    debut, fin = (periode[0], periode[-1]) if isinstance(periode, tuple) and periode else (periode, periode)
+    parametres = [debut, fin + timedelta(days=1)]
+    
+    if identifiant:
+        conditions.append("identifiant = %s")
+        parametres.append(identifiant)
+    
+    if action != "Toutes les actions":
+        conditions.append("action = %s")
+        parametres.append(action)
+    
     try:
-        requete_utilisateurs = """
-            SELECT idUtilisateur, nom, prenom, identifiant, statut
-            FROM Utilisateur
-            ORDER BY nom, prenom
-        """
-        utilisateurs = executer_requete(requete_utilisateurs, fetch=True)
+        evenements = executer_requete(
+            f"""
+            SELECT horodatage, identifiant, action, objet, reference, details
+            FROM JournalAudit
+            WHERE {" AND ".join(conditions)}
+            ORDER BY horodatage DESC
+            LIMIT {Configuration.AUDIT_LIGNES_AFFICHEES}
+            """,
+            tuple(parametres), fetch=True
+        )
         
-        if utilisateurs:
-            dataframe_utilisateurs = pd.DataFrame(utilisateurs)
-            st.dataframe(dataframe_utilisateurs, use_container_width=True)
+        if evenements:
+            st.dataframe(pd.DataFrame(evenements), hide_index=True, use_container_width=True)
+            if len(evenements) == Configuration.AUDIT_LIGNES_AFFICHEES:
+                st.caption(f"Seuls les {Configuration.AUDIT_LIGNES_AFFICHEES} événements les plus récents sont affichés")
+        elif evenements is None:
+            st.error("Erreur lors de la récupération du journal")
         else:
-            st.info("Aucun utilisateur trouvé")
+            st.info("Aucun événement pour ces filtres")
             
     except Exception as erreur:
-        st.error(f"Erreur lors de la récupération des utilisateurs: {erreur}")
+        st.error(f"Erreur lors de la récupération du journal: {erreur}")
+    
+    journal = obtenir_journal_audit()
+    st.caption(f"{journal.en_attente} événement(s) en attente d'écriture, {journal.perdus} perdu(s) depuis le démarrage")
+
+# ============================================
+# 9.3 PAGE DU NAVIGATEUR DE DONNÉES
+# ============================================
+def page_navigateur_donnees():
+    """Consultation ligne à ligne des enregistrements et des utilisateurs"""
+    st.title("Navigateur de données")
+    
+    source = st.selectbox("Table", list(SOURCES_NAVIGATION))
+    afficher_navigateur(source, f"navigation_{source.lower()}")
 
 # ============================================
 # 10. CSS PERSONNALISÉ
@@ -1017,9 +4246,51 @@ def menu_lateral():
             if st.button("Gérer utilisateurs", use_container_width=True):
                 st.session_state['page_actuelle'] = 'gestion_utilisateurs'
                 st.rerun()
+            
+            if st.button("Vue régionale", use_container_width=True):
+                st.session_state['page_actuelle'] = 'vue_regionale'
+                st.rerun()
+            
+            if st.button("Journal d'audit", use_container_width=True):
+                st.session_state['page_actuelle'] = 'journal_audit'
+                st.rerun()
+            
+            if st.button("Navigateur de données", use_container_width=True):
+                st.session_state['page_actuelle'] = 'navigateur'
+                st.rerun()
+            
+            if Configuration.DISTRIBUTION_ACTIVE:
+                with st.expander("Flux sortant"):
+                    metriques = demarrer_distributeur().metriques
+                    st.dataframe(pd.Series(metriques, name="valeur").astype(str), use_container_width=True)
+            
+            with st.expander("Charge de la base"):
+                try:
+                    st.dataframe(pd.DataFrame(obtenir_pool()[1].etat()).set_index('classe'), use_container_width=True)
+                except Error:
+                    st.info("Pool de connexions non initialisé")
+                sante = obtenir_disjoncteur().sante()
+                sante['depuis'] = f"{sante['depuis']:%d/%m/%Y %H:%M:%S}"
+                sante['resultats_servis_en_mode_degrade'] = obtenir_derniers_resultats().servis
+                st.dataframe(pd.Series(sante, name="valeur").astype(str), use_container_width=True)
+            
+            with st.expander("Requêtes fréquentes"):
+                statistiques = obtenir_registre().statistiques()
+                if statistiques:
+                    colonnes = ['nom', 'classe', 'executions', 'preparations', 'erreurs',
+                                'duree_moyenne_ms', 'duree_max_ms', 'plan']
+                    st.dataframe(pd.DataFrame(statistiques)[colonnes], hide_index=True, use_container_width=True)
         
         st.divider()
         
+        # État de la base : pendant une panne, les agrégats affichés sont les derniers connus
+        sante = obtenir_disjoncteur().sante()
+        if sante['etat'] == Disjoncteur.FERME:
+            st.caption("Base de données disponible")
+        else:
+            st.warning(f"Base de données indisponible depuis {sante['depuis']:%H:%M:%S} : "
+                       "les totaux affichés sont les derniers connus")
+        
         # Déconnexion
         if st.button("Déconnexion", use_container_width=True):
             for cle in list(st.session_state.keys()):
@@ -1053,6 +4324,20 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    # Tables complémentaires (boîte d'envoi, audit, corrections)
+    try:
+        initialiser_schema()
+    except Exception as erreur:
+        logger.error(f"Schéma complémentaire non initialisé: {erreur}")
+    
+    # API JSON pour les tableaux de bord externes (un seul serveur par processus)
+    if Configuration.API_ACTIVE:
+        demarrer_serveur_api()
+    
+    # Distribution des TLOH enregistrés vers les systèmes nationaux
+    if Configuration.DISTRIBUTION_ACTIVE:
+        demarrer_distributeur()
+    
     # Gestion de l'authentification
     if not st.session_state['authentifie']:
         page_connexion()
@@ -1067,6 +4352,9 @@ def main():
             'surveillance': page_surveillance_epidemiologique,
             'ajout_indicateur': page_ajout_indicateur,
             'gestion_utilisateurs': page_gestion_utilisateurs,
+            'vue_regionale': page_vue_regionale,
+            'journal_audit': page_journal_audit,
+            'navigateur': page_navigateur_donnees,
         }
         
         # Afficher la page actuelle
@@ -0,0 +1,251 @@
+# ============================================
+# TEST DE CHARGE DE LA PLATEFORME TLOH
+# ============================================
+"""Simule N sessions simultanées sur un même processus Streamlit et mesure la capacité.
+
+Chaque session suit un parcours réaliste : connexion, saisie d'un TLOH dans
+page_nouvel_enregistrement, enregistrement, puis consultation de la surveillance.
+Chaque interaction provoque une réexécution complète du script (comme dans le
+navigateur), dont la latence est mesurée ; les pauses de l'application (time.sleep
+après la connexion et l'enregistrement) y sont incluses. Un thread de suivi relève en parallèle le
+nombre de connexions MySQL ouvertes.
+
+Exemple (base locale, compte administrateur de test) :
+
+    python charge_TLOH.py --identifiant admin --mot-de-passe admin --sessions 1,2,4,8,16 --nettoyer
+
+Les TLOH créés portent le préfixe CHARGE- et sont supprimés avec --nettoyer.
+"""
+import argparse
+import csv
+import statistics
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pymysql
+from streamlit.testing.v1 import AppTest
+
+from TLOH_3 import Configuration
+
+PREFIXE_TLOH = "CHARGE-"
+
+# ============================================
+# 1. MESURES
+# ============================================
+@dataclass
+class Mesures:
+    latences: List[float] = field(default_factory=list)
+    erreurs: int = 0
+    parcours_termines: int = 0
+    verrou: threading.Lock = field(default_factory=threading.Lock)
+
+    def ajouter(self, latence: float, erreur: bool):
+        with self.verrou:
+            self.latences.append(latence)
+            if erreur:
+                self.erreurs += 1
+
+    def percentile(self, p: float) -> float:
+        if not self.latences:
+            return 0.0
+        valeurs = sorted(self.latences)
+        return valeurs[min(len(valeurs) - 1, int(p * len(valeurs)))]
+
+def _connexion_suivi():
+    return pymysql.connect(
+        host=Configuration.CONFIG_DB["host"],
+        user=Configuration.CONFIG_DB["user"],
+        password=Configuration.CONFIG_DB["password"],
+        database=Configuration.CONFIG_DB["database"],
+        charset=Configuration.CONFIG_DB["charset"],
+        autocommit=True
+    )
+
+class SuiviConnexions(threading.Thread):
+    """Relève périodiquement Threads_connected côté MySQL"""
+
+    def __init__(self, intervalle: float = 0.5):
+        super().__init__(name="suivi-connexions", daemon=True)
+        self.intervalle = intervalle
+        self.releves: List[int] = []
+        self._arret = threading.Event()
+
+    def run(self):
+        connexion = _connexion_suivi()
+        try:
+            with connexion.cursor() as curseur:
+                while not self._arret.is_set():
+                    curseur.execute("SHOW GLOBAL STATUS LIKE 'Threads_connected'")
+                    # La connexion de suivi elle-même n'est pas comptée
+                    self.releves.append(int(curseur.fetchone()[1]) - 1)
+                    self._arret.wait(self.intervalle)
+        finally:
+            connexion.close()
+
+    def arreter(self):
+        self._arret.set()
+        self.join()
+
+# ============================================
+# 2. PARCOURS D'UNE SESSION
+# ============================================
+class Session:
+    """Une session utilisateur pilotée via AppTest ; chaque appel à _executer est une réexécution"""
+
+    def __init__(self, script: str, mesures: Mesures, delai: float):
+        self.app = AppTest.from_file(script, default_timeout=delai)
+        self.mesures = mesures
+
+    def _executer(self):
+        debut = time.perf_counter()
+        erreur = False
+        try:
+            self.app.run()
+            erreur = bool(self.app.exception) or bool(self.app.error)
+        except Exception:
+            erreur = True
+        self.mesures.ajouter(time.perf_counter() - debut, erreur)
+
+    def _bouton(self, libelle: str):
+        for bouton in self.app.button:
+            if bouton.label == libelle:
+                return bouton
+        raise LookupError(f"Bouton introuvable: {libelle}")
+
+    def _champ_texte(self, libelle: str):
+        for champ in self.app.text_input:
+            if champ.label == libelle:
+                return champ
+        raise LookupError(f"Champ introuvable: {libelle}")
+
+    def connexion(self, identifiant: str, mot_de_passe: str):
+        self._executer()
+        self._champ_texte("Identifiant*").input(identifiant)
+        self._champ_texte("Mot de passe*").input(mot_de_passe)
+        self._bouton("Se connecter").click()
+        self._executer()
+
+    def saisie_tloh(self, nb_valeurs: int = 5):
+        self._bouton("Nouvel enregistrement").click()
+        self._executer()
+        self._champ_texte("Numéro TLOH*").input(f"{PREFIXE_TLOH}{uuid.uuid4().hex[:10]}")
+        self._executer()
+        # Même valeur partout : décès ≤ cas et isolé ≤ notifié restent valides
+        for champ in list(self.app.number_input)[:nb_valeurs]:
+            champ.set_value(1)
+            self._executer()
+        self._bouton("Enregistrer le TLOH").click()
+        self._executer()
+
+    def surveillance(self):
+        self._bouton("Surveillance épidémiologique").click()
+        self._executer()
+        for annee in Configuration.ANNEES[-2:]:
+            self.app.selectbox[0].select(annee)
+            self._executer()
+
+    def parcours(self, identifiant: str, mot_de_passe: str, nb_parcours: int):
+        try:
+            self.connexion(identifiant, mot_de_passe)
+            for _ in range(nb_parcours):
+                self.saisie_tloh()
+                self.surveillance()
+                with self.mesures.verrou:
+                    self.mesures.parcours_termines += 1
+        except Exception:
+            # Parcours interrompu (widget absent après une erreur) : compté comme échec
+            self.mesures.ajouter(0.0, True)
+
+# ============================================
+# 3. COURBE DE CAPACITÉ
+# ============================================
+def mesurer_palier(nb_sessions: int, args) -> dict:
+    """Lance nb_sessions sessions simultanées et retourne les mesures du palier"""
+    mesures = Mesures()
+    suivi = SuiviConnexions()
+    suivi.start()
+
+    sessions = [Session(args.script, mesures, args.delai) for _ in range(nb_sessions)]
+    threads = [
+        threading.Thread(target=session.parcours, args=(args.identifiant, args.mot_de_passe, args.parcours))
+        for session in sessions
+    ]
+    debut = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duree = time.perf_counter() - debut
+    suivi.arreter()
+
+    nb_executions = len(mesures.latences)
+    return {
+        'sessions': nb_sessions,
+        'parcours': mesures.parcours_termines,
+        'duree_s': round(duree, 2),
+        'parcours_par_min': round(60 * mesures.parcours_termines / duree, 2) if duree else 0,
+        'latence_p50_ms': round(1000 * mesures.percentile(0.50)),
+        'latence_p95_ms': round(1000 * mesures.percentile(0.95)),
+        'latence_max_ms': round(1000 * max(mesures.latences, default=0)),
+        'taux_erreur': round(mesures.erreurs / nb_executions, 4) if nb_executions else 0,
+        'connexions_max': max(suivi.releves, default=0),
+        'connexions_moy': round(statistics.mean(suivi.releves), 1) if suivi.releves else 0,
+    }
+
+def nettoyer():
+    connexion = _connexion_suivi()
+    try:
+        with connexion.cursor() as curseur:
+            curseur.execute("""
+                DELETE ie FROM IndicateurEnregistrement ie
+                JOIN Enregistrement e ON e.idEnregistrement = ie.idEnregistrement
+                WHERE e.numéro_TLOH LIKE %s
+            """, (f"{PREFIXE_TLOH}%",))
+            supprimees = curseur.execute("DELETE FROM Enregistrement WHERE numéro_TLOH LIKE %s",
+                                         (f"{PREFIXE_TLOH}%",))
+            # Événements sortants pas encore livrés : les TLOH de test ne partent pas vers le flux national
+            retires = curseur.execute("DELETE FROM BoiteEnvoi WHERE numéro_TLOH LIKE %s AND livre_le IS NULL",
+                                      (f"{PREFIXE_TLOH}%",))
+            curseur.execute("SELECT COUNT(*) FROM BoiteEnvoi WHERE numéro_TLOH LIKE %s AND livre_le IS NOT NULL",
+                            (f"{PREFIXE_TLOH}%",))
+            deja_livres = curseur.fetchone()[0]
+            # Les caches de l'application ne voient une suppression que par la version des corrections
+            curseur.execute("UPDATE VersionDonnees SET version = version + 1 WHERE cle = 'corrections'")
+        print(f"{supprimees} ligne(s) de test supprimée(s), {retires} événement(s) sortant(s) retiré(s)")
+        if deja_livres:
+            print(f"Attention : {deja_livres} événement(s) de test déjà livré(s) au flux national")
+    finally:
+        connexion.close()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Test de charge de la plateforme TLOH")
+    parser.add_argument("--identifiant", required=True, help="Compte administrateur de test")
+    parser.add_argument("--mot-de-passe", required=True)
+    parser.add_argument("--sessions", default="1,2,4,8", help="Paliers de sessions simultanées")
+    parser.add_argument("--parcours", type=int, default=3, help="Parcours par session")
+    parser.add_argument("--script", default="TLOH_3.py")
+    parser.add_argument("--delai", type=float, default=60, help="Délai maximal d'une réexécution (s)")
+    parser.add_argument("--sortie", default="courbe_capacite.csv")
+    parser.add_argument("--nettoyer", action="store_true", help="Supprime les TLOH de test à la fin")
+    args = parser.parse_args(argv)
+
+    resultats = []
+    for nb_sessions in (int(n) for n in args.sessions.split(",")):
+        resultat = mesurer_palier(nb_sessions, args)
+        resultats.append(resultat)
+        print(" | ".join(f"{cle}={valeur}" for cle, valeur in resultat.items()))
+
+    with open(args.sortie, "w", newline="", encoding="utf-8") as fichier:
+        ecrivain = csv.DictWriter(fichier, fieldnames=list(resultats[0]))
+        ecrivain.writeheader()
+        ecrivain.writerows(resultats)
+    print(f"Courbe de capacité écrite dans {args.sortie}")
+
+    if args.nettoyer:
+        nettoyer()
+
+if __name__ == "__main__":
+    main()
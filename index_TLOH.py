@@ -0,0 +1,95 @@
+# ============================================
+# MIGRATION DES INDEX ET COLONNES DE LA BASE TLOH
+# ============================================
+"""Crée les index secondaires dont dépend l'application, une fois, hors des heures de saisie.
+
+Sur une grande table Enregistrement, un CREATE INDEX dure plusieurs minutes : il n'a pas sa
+place au démarrage de l'application. Ce script vérifie chaque index attendu et ne crée que
+ceux qui manquent. Un index existant qui commence par les mêmes colonnes suffit (par exemple
+l'unicité de l'identifiant). La création est faite en ligne (ALGORITHM=INPLACE, LOCK=NONE) :
+les saisies restent possibles pendant la migration.
+
+Les colonnes ajoutées depuis la création des tables complémentaires (propriétaire et bail
+des lots de BoiteEnvoi) sont ajoutées de la même façon ; le distributeur de flux en a besoin,
+le script est donc à lancer avant de déployer la version qui les utilise.
+
+Exemple :
+
+    python index_TLOH.py --simulation   # affiche les requêtes sans les exécuter
+    python index_TLOH.py
+
+Le script peut être relancé sans risque : les colonnes et index présents sont ignorés.
+"""
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+
+import mysql.connector
+
+from TLOH_3 import Configuration, INDEX_NAVIGATION
+
+# (table, nom de l'index, colonnes)
+# (table, colonne, définition)
+COLONNES_ATTENDUES: List[Tuple[str, str, str]] = [
+    ('BoiteEnvoi', 'proprietaire', "VARCHAR(64) NULL AFTER lot"),
+    ('BoiteEnvoi', 'bail_jusqu_au', "DATETIME NULL AFTER proprietaire"),
+]
+
+INDEX_ATTENDUS: List[Tuple[str, str, List[str]]] = INDEX_NAVIGATION + [
+    # Lots attribués mais non livrés du distributeur de flux (tables créées avant cet index)
+    ('BoiteEnvoi', 'idx_boite_envoi_livraison', ['livre_le', 'lot']),
+]
+
+def colonnes_manquantes(curseur) -> List[Tuple[str, str, str]]:
+    """Colonnes attendues absentes de leur table"""
+    manquantes = []
+    for table, colonne, definition in COLONNES_ATTENDUES:
+        curseur.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (colonne,))
+        if not curseur.fetchall():
+            manquantes.append((table, colonne, definition))
+    return manquantes
+
+def index_manquants(curseur) -> List[Tuple[str, str, List[str]]]:
+    """Index attendus qu'aucun index existant ne couvre"""
+    manquants = []
+    for table, nom_index, colonnes in INDEX_ATTENDUS:
+        curseur.execute(f"SHOW INDEX FROM {table}")
+        existants: Dict[str, List[str]] = {}
+        for ligne in sorted(curseur.fetchall(), key=lambda ligne: ligne['Seq_in_index']):
+            existants.setdefault(ligne['Key_name'], []).append(ligne['Column_name'])
+        if not any(existant[:len(colonnes)] == colonnes for existant in existants.values()):
+            manquants.append((table, nom_index, colonnes))
+    return manquants
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Création des colonnes et index de la base TLOH")
+    parser.add_argument("--simulation", action="store_true", help="Affiche les requêtes sans les exécuter")
+    args = parser.parse_args(argv)
+
+    connexion = mysql.connector.connect(**Configuration.CONFIG_DB)
+    try:
+        curseur = connexion.cursor(dictionary=True)
+        manquantes = colonnes_manquantes(curseur)
+        print(f"{len(COLONNES_ATTENDUES)} colonne(s) attendue(s), {len(manquantes)} à ajouter")
+        for table, colonne, definition in manquantes:
+            requete = f"ALTER TABLE {table} ADD COLUMN {colonne} {definition}, ALGORITHM=INPLACE, LOCK=NONE"
+            print(requete)
+            if not args.simulation:
+                curseur.execute(requete)
+
+        manquants = index_manquants(curseur)
+        print(f"{len(INDEX_ATTENDUS)} index attendu(s), {len(manquants)} à créer")
+        for table, nom_index, colonnes in manquants:
+            requete = f"CREATE INDEX {nom_index} ON {table} ({', '.join(colonnes)}) ALGORITHM=INPLACE LOCK=NONE"
+            print(requete)
+            if args.simulation:
+                continue
+            debut = time.perf_counter()
+            curseur.execute(requete)
+            print(f"  créé en {time.perf_counter() - debut:.0f} s")
+        curseur.close()
+    finally:
+        connexion.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# ============================================
+# CONTRÔLE QUALITÉ DES DONNÉES TLOH
+# ============================================
+"""Parcourt tout l'historique de Enregistrement et produit un rapport des anomalies.
+
+La table est découpée en tranches d'idEnregistrement, contrôlées en parallèle par des
+processus distincts (une connexion MySQL chacun). Les règles portant sur une ligne sont
+évaluées de façon vectorisée sur chaque tranche ; chaque tranche terminée est écrite dans le
+répertoire de reprise, de sorte qu'un contrôle interrompu reprend là où il s'était arrêté.
+Les règles qui croisent plusieurs tranches (chevauchement des périodes d'un service,
+numéros TLOH en double) sont évaluées ensuite sur les résumés des tranches.
+
+Exemple :
+
+    python qualite_TLOH.py --processus 4 --taille-tranche 200000
+    python qualite_TLOH.py --reprendre          # après une interruption
+
+Le rapport (CSV) contient une ligne par anomalie : règle, ligne concernée et détail.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from TLOH_3 import Configuration
+
+COLONNES = ['idEnregistrement', 'numéro_TLOH', 'service', 'date_début', 'date_fin'] + \
+    Configuration.MESURES + ['idIndicateur']
+COLONNES_RAPPORT = ['regle', 'idEnregistrement', 'numéro_TLOH', 'service', 'date_début', 'date_fin', 'detail']
+
+# ============================================
+# 1. RÈGLES PAR LIGNE (VECTORISÉES)
+# ============================================
+def _violations(cadre: pd.DataFrame, masque: pd.Series, regle: str, detail: pd.Series) -> pd.DataFrame:
+    lignes = cadre.loc[masque, COLONNES_RAPPORT[1:-1]].copy()
+    lignes.insert(0, 'regle', regle)
+    lignes['detail'] = detail[masque].astype(str)
+    return lignes
+
+def controler_lignes(cadre: pd.DataFrame) -> pd.DataFrame:
+    """Anomalies détectables ligne par ligne.
+
+    Les valeurs NULL sont signalées avant tout : les mesures manquantes valent ensuite 0 pour
+    les autres règles, et une période dont une date manque n'est pas comparée.
+    """
+    manquantes = cadre[Configuration.MESURES].isna()
+    noms_manquantes = manquantes.astype(object).dot(
+        pd.Series([f"{mesure}, " for mesure in Configuration.MESURES], index=Configuration.MESURES))
+    date_debut = pd.to_datetime(cadre['date_début'])
+    date_fin = pd.to_datetime(cadre['date_fin'])
+    dates_manquantes = date_debut.isna() | date_fin.isna()
+
+    cadre = cadre.copy()
+    cadre[Configuration.MESURES] = cadre[Configuration.MESURES].fillna(0).astype(np.int64)
+    mesures = cadre[Configuration.MESURES]
+    # Type déduit des colonnes renseignées, comme dans la table compacte de l'application
+    deces_type = (cadre['institution'] > 0) | (cadre['communauté'] > 0)
+    tropicale = ~deces_type & ((cadre['notifié'] > 0) | (cadre['isolé'] > 0))
+    endemique = ~deces_type & ~tropicale
+
+    controles = [
+        ('valeur_manquante', manquantes.any(axis=1),
+         "mesure(s) NULL : " + noms_manquantes.str.rstrip(", ")),
+        ('date_manquante', dates_manquantes,
+         "date_début ou date_fin NULL"),
+        ('valeur_negative', (mesures < 0).any(axis=1),
+         "mesure négative"),
+        ('ligne_vide', (mesures == 0).all(axis=1),
+         "toutes les mesures sont à 0"),
+        ('deces_superieur_cas', endemique & (cadre['décès'] > cadre['cas']),
+         "décès=" + cadre['décès'].astype(str) + " > cas=" + cadre['cas'].astype(str)),
+        ('isole_superieur_notifie', cadre['isolé'] > cadre['notifié'],
+         "isolé=" + cadre['isolé'].astype(str) + " > notifié=" + cadre['notifié'].astype(str)),
+        ('deces_incoherent', deces_type & (cadre['décès'] != cadre['institution'] + cadre['communauté']),
+         "décès=" + cadre['décès'].astype(str) + " ≠ institution+communauté"),
+        ('periode_inversee', date_fin < date_debut,
+         "date_fin antérieure à date_début"),
+    ]
+    return pd.concat(
+        [_violations(cadre, masque, regle, detail if isinstance(detail, pd.Series)
+                     else pd.Series(detail, index=cadre.index))
+         for regle, masque, detail in controles],
+        ignore_index=True
+    )
+
+# ============================================
+# 2. CONTRÔLE D'UNE TRANCHE (PROCESSUS DISTINCT)
+# ============================================
+def _chemin(repertoire: str, debut: int, partie: str) -> str:
+    return os.path.join(repertoire, f"tranche_{debut:012d}.{partie}.feather")
+
+def controler_tranche(debut: int, fin: int, repertoire: str) -> int:
+    """Contrôle les lignes d'identifiant ]debut, fin] et écrit les résultats de la tranche.
+
+    Trois fichiers sont écrits : anomalies par ligne, périodes distinctes (numéro, service,
+    dates) et couples (numéro, indicateur) ; le marqueur .fait n'est posé qu'ensuite.
+    """
+    connexion = mysql.connector.connect(**Configuration.CONFIG_DB)
+    try:
+        curseur = connexion.cursor()
+        curseur.execute(
+            f"""
+            SELECT e.idEnregistrement, e.numéro_TLOH, e.service, e.date_début, e.date_fin,
+                   {", ".join("e." + mesure for mesure in Configuration.MESURES)}, ie.idIndicateur
+            FROM Enregistrement e
+            LEFT JOIN IndicateurEnregistrement ie ON ie.idEnregistrement = e.idEnregistrement
+            WHERE e.idEnregistrement > %s AND e.idEnregistrement <= %s
+            """,
+            (debut, fin)
+        )
+        cadre = pd.DataFrame(curseur.fetchall(), columns=COLONNES)
+        curseur.close()
+    finally:
+        connexion.close()
+
+    violations = controler_lignes(cadre)
+    periodes = cadre.groupby(['numéro_TLOH', 'service', 'date_début', 'date_fin'], dropna=False).agg(
+        idEnregistrement=('idEnregistrement', 'min'), nb_lignes=('idEnregistrement', 'size')).reset_index()
+    indicateurs = cadre.dropna(subset=['idIndicateur']).groupby(['numéro_TLOH', 'idIndicateur']).agg(
+        idEnregistrement=('idEnregistrement', 'max'), nb_lignes=('idEnregistrement', 'size')).reset_index()
+
+    for partie, resultat in (('violations', violations), ('periodes', periodes), ('indicateurs', indicateurs)):
+        temporaire = _chemin(repertoire, debut, partie) + ".tmp"
+        feather.write_feather(pa.Table.from_pandas(resultat, preserve_index=False), temporaire)
+        os.replace(temporaire, _chemin(repertoire, debut, partie))
+    with open(os.path.join(repertoire, f"tranche_{debut:012d}.fait"), "w") as marqueur:
+        marqueur.write(str(len(cadre)))
+    return len(cadre)
+
+# ============================================
+# 3. RÈGLES ENTRE TRANCHES
+# ============================================
+def controler_periodes(periodes: pd.DataFrame) -> pd.DataFrame:
+    """Numéros TLOH portant plusieurs périodes, et périodes d'un même service qui se chevauchent"""
+    # Une même période peut être à cheval sur deux tranches : on la fusionne d'abord
+    periodes = periodes.groupby(['numéro_TLOH', 'service', 'date_début', 'date_fin']).agg(
+        idEnregistrement=('idEnregistrement', 'min')).reset_index()
+    periodes['date_début'] = pd.to_datetime(periodes['date_début'])
+    periodes['date_fin'] = pd.to_datetime(periodes['date_fin'])
+
+    nb_periodes = periodes.groupby('numéro_TLOH')['date_début'].transform('size')
+    doublons = periodes[nb_periodes > 1].copy()
+    doublons.insert(0, 'regle', 'numero_en_double')
+    doublons['detail'] = "numéro utilisé pour " + nb_periodes[nb_periodes > 1].astype(str) + " périodes ou services"
+
+    # Balayage par service : une période chevauche la précédente si elle débute avant la fin
+    # la plus tardive des périodes déjà vues ; le numéro qui porte cette fin est propagé
+    triees = periodes.sort_values(['service', 'date_début', 'date_fin']).reset_index(drop=True)
+    groupes = triees.groupby('service', sort=False)
+    fin_max = groupes['date_fin'].cummax()
+    porteur = triees['numéro_TLOH'].where(triees['date_fin'] == fin_max)
+    porteur = porteur.groupby(triees['service']).ffill()
+    fin_precedente = fin_max.groupby(triees['service']).shift()
+    porteur_precedent = porteur.groupby(triees['service']).shift()
+    masque = (triees['date_début'] <= fin_precedente) & (porteur_precedent != triees['numéro_TLOH'])
+    chevauchements = triees[masque].copy()
+    chevauchements.insert(0, 'regle', 'chevauchement_periode')
+    chevauchements['detail'] = "chevauche " + porteur_precedent[masque] + " (jusqu'au " + \
+        fin_precedente[masque].dt.strftime('%d/%m/%Y') + ")"
+
+    resultat = pd.concat([doublons, chevauchements], ignore_index=True)
+    resultat['date_début'] = resultat['date_début'].dt.date
+    resultat['date_fin'] = resultat['date_fin'].dt.date
+    return resultat[COLONNES_RAPPORT]
+
+def controler_indicateurs(indicateurs: pd.DataFrame) -> pd.DataFrame:
+    """TLOH contenant plusieurs lignes pour un même indicateur"""
+    totaux = indicateurs.groupby(['numéro_TLOH', 'idIndicateur']).agg(
+        idEnregistrement=('idEnregistrement', 'max'), nb_lignes=('nb_lignes', 'sum')).reset_index()
+    doublons = totaux[totaux['nb_lignes'] > 1]
+    return pd.DataFrame({
+        'regle': 'indicateur_en_double',
+        'idEnregistrement': doublons['idEnregistrement'],
+        'numéro_TLOH': doublons['numéro_TLOH'],
+        'service': None, 'date_début': None, 'date_fin': None,
+        'detail': doublons['nb_lignes'].astype(str) + " lignes pour l'indicateur " +
+                  doublons['idIndicateur'].astype(int).astype(str),
+    })[COLONNES_RAPPORT]
+
+def _lire_parties(repertoire: str, partie: str) -> pd.DataFrame:
+    fichiers = sorted(nom for nom in os.listdir(repertoire) if nom.endswith(f".{partie}.feather"))
+    cadres = [feather.read_feather(os.path.join(repertoire, nom)) for nom in fichiers]
+    return pd.concat(cadres, ignore_index=True) if cadres else pd.DataFrame()
+
+# ============================================
+# 4. ORCHESTRATION ET REPRISE
+# ============================================
+def planifier(repertoire: str, taille_tranche: int, reprendre: bool) -> Dict[str, int]:
+    """Plan des tranches : bornes figées au premier lancement pour que la reprise soit exacte"""
+    chemin_plan = os.path.join(repertoire, "plan.json")
+    if reprendre and os.path.exists(chemin_plan):
+        with open(chemin_plan, encoding="utf-8") as fichier:
+            return json.load(fichier)
+    if os.path.isdir(repertoire):
+        for nom in os.listdir(repertoire):
+            if nom.startswith("tranche_") or nom == "plan.json":
+                os.remove(os.path.join(repertoire, nom))
+    os.makedirs(repertoire, exist_ok=True)
+
+    connexion = mysql.connector.connect(**Configuration.CONFIG_DB)
+    try:
+        curseur = connexion.cursor()
+        curseur.execute("SELECT IFNULL(MIN(idEnregistrement), 1), IFNULL(MAX(idEnregistrement), 0) FROM Enregistrement")
+        premier, dernier = curseur.fetchone()
+        curseur.close()
+    finally:
+        connexion.close()
+    plan = {'premier': int(premier), 'dernier': int(dernier), 'taille_tranche': taille_tranche}
+    with open(chemin_plan, "w", encoding="utf-8") as fichier:
+        json.dump(plan, fichier)
+    return plan
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Contrôle qualité de l'historique TLOH")
+    parser.add_argument("--processus", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--taille-tranche", type=int, default=200000, help="Identifiants par tranche")
+    parser.add_argument("--repertoire", default="controle_qualite", help="Répertoire de reprise")
+    parser.add_argument("--reprendre", action="store_true", help="Reprend un contrôle interrompu")
+    parser.add_argument("--sortie", default="rapport_qualite.csv")
+    args = parser.parse_args(argv)
+
+    plan = planifier(args.repertoire, args.taille_tranche, args.reprendre)
+    bornes = range(plan['premier'] - 1, plan['dernier'], plan['taille_tranche'])
+    restantes = [debut for debut in bornes
+                 if not os.path.exists(os.path.join(args.repertoire, f"tranche_{debut:012d}.fait"))]
+    print(f"{len(bornes)} tranche(s), {len(bornes) - len(restantes)} déjà contrôlée(s)")
+
+    debut_controle = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processus) as executeur:
+        taches = {
+            executeur.submit(controler_tranche, debut, min(debut + plan['taille_tranche'], plan['dernier']),
+                             args.repertoire): debut
+            for debut in restantes
+        }
+        for numero, tache in enumerate(as_completed(taches), 1):
+            lignes = tache.result()
+            print(f"[{numero}/{len(restantes)}] tranche {taches[tache]}: {lignes} lignes "
+                  f"({time.perf_counter() - debut_controle:.0f} s)")
+
+    violations = [_lire_parties(args.repertoire, 'violations')]
+    periodes = _lire_parties(args.repertoire, 'periodes')
+    if not periodes.empty:
+        violations.append(controler_periodes(periodes))
+    indicateurs = _lire_parties(args.repertoire, 'indicateurs')
+    if not indicateurs.empty:
+        violations.append(controler_indicateurs(indicateurs))
+    rapport = pd.concat([cadre for cadre in violations if not cadre.empty], ignore_index=True) \
+        if any(not cadre.empty for cadre in violations) else pd.DataFrame(columns=COLONNES_RAPPORT)
+    rapport.sort_values(['regle', 'idEnregistrement']).to_csv(args.sortie, index=False, encoding="utf-8")
+
+    print(rapport['regle'].value_counts().to_string() if not rapport.empty else "Aucune anomalie")
+    print(f"Rapport écrit dans {args.sortie} ({time.perf_counter() - debut_controle:.0f} s)")
+
+if __name__ == "__main__":
+    main()